@@ -13,21 +13,25 @@ try:
 except ImportError:
     ASYNC_MODE = 'threading'
 
-from flask import Flask, request, redirect, render_template, jsonify, session, flash, has_request_context
+from flask import Flask, Response, request, redirect, render_template, jsonify, session, flash, g, has_request_context, copy_current_request_context
 import os
 import re
+import hashlib
 import json
 from pathlib import Path
 from flask_cors import CORS
 from flask_socketio import SocketIO, emit
 from kiteconnect import KiteConnect
 from kiteconnect import exceptions as kite_exceptions
+from werkzeug.exceptions import MethodNotAllowed
 import logging
 import random
 import time
-from collections import Counter
+from collections import Counter, deque
 from threading import Thread, Lock
-from typing import Dict, List, Tuple, Any, Optional, Callable, Set
+from typing import Dict, List, Tuple, Any, Optional, Callable, Set, Deque
+from dataclasses import dataclass, field
+from functools import lru_cache, wraps
 from strategies.orb import ORB
 from strategies.capture_mountain_signal import CaptureMountainSignal
 from mountain_signal_live_auto_trader import MountainSignalLiveAutoTrader
@@ -35,6 +39,7 @@ from rules import load_mountain_signal_pe_rules
 from ticker import Ticker
 import uuid
 import sqlite3
+from concurrent.futures import Future, ThreadPoolExecutor
 from sqlite3 import OperationalError as SqliteOperationalError
 import smtplib, ssl
 import socket
@@ -53,6 +58,10 @@ from requests.exceptions import (
     Timeout as RequestsTimeout,
 )
 from database import get_db_connection, ensure_core_schema
+from candle_cache import load_cached_candles, store_cached_candles
+from otp_store import consume_otp, new_otp, store_otp
+from server_session import InMemorySessionInterface, check_single_worker
+from running_registry import RunningStrategies
 from live_trade import (
     ensure_live_trade_tables,
     create_deployment as live_create_deployment,
@@ -74,7 +83,8 @@ from kite_auth.orchestrator import AuthJobInput, ZerodhaPlaywrightAuthOrchestrat
 # Constants for market instruments
 BANKNIFTY_SPOT_SYMBOL = 'NSE:NIFTY BANK'
 NIFTY_SPOT_SYMBOL = 'NSE:NIFTY 50'
-IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+IST_OFFSET_SECONDS = 5 * 3600 + 30 * 60
+IST = datetime.timezone(datetime.timedelta(seconds=IST_OFFSET_SECONDS))
 
 
 def is_nse_fo_market_open(utc_now: datetime.datetime) -> Tuple[bool, str]:
@@ -91,6 +101,8 @@ def is_nse_fo_market_open(utc_now: datetime.datetime) -> Tuple[bool, str]:
 from chat import chat_bp
 from options_routes import options_bp
 from utils.backtest_metrics import calculate_all_metrics
+from utils.indicators import calculate_ema, calculate_rsi
+from utils.rate_limiter import TokenBucket
 from ai_ml import train_lstm_on_candles, load_model_and_predict, load_lstm_checkpoint
 from ai_ml import candles_to_dataframe, prepare_training_data
 try:
@@ -106,6 +118,7 @@ except ImportError as e:
     def evaluate_rl_agent(*args, **kwargs):
         raise RuntimeError("RL module not available. Install PyTorch.")
 import numpy as np
+import pandas as pd
 import torch
 
 try:
@@ -142,6 +155,14 @@ def _is_transient_kite_network_error(exc: Exception) -> bool:
     return _is_retryable_exception(exc) and not isinstance(exc, kite_exceptions.TokenException)
 
 
+_INVALID_KITE_CREDENTIALS_RE = re.compile(r"(?:Invalid|Incorrect) `api_key` or `access_token`")
+
+
+def _is_invalid_kite_credentials_error(exc: Exception) -> bool:
+    """True for Kite's bad api_key/access_token message when it arrives outside TokenException."""
+    return _INVALID_KITE_CREDENTIALS_RE.search(str(exc)) is not None
+
+
 def execute_with_retries(description: str, func: Callable[[], Any], *, max_attempts: int = 3, base_delay: float = 1.5) -> Any:
     """
     Execute a callable with automatic retries for transient Kite/HTTP errors.
@@ -209,9 +230,13 @@ def _safe_float(value: Any) -> Optional[float]:
         return None
 
 
+_JSON_PASSTHROUGH_TYPES = frozenset((str, int, bool, type(None)))
+
+
 def _simplify_for_json(value: Any) -> Any:
-    if value is None:
-        return None
+    # Exact-type fast path: most insight/meta values are already JSON primitives.
+    if type(value) in _JSON_PASSTHROUGH_TYPES:
+        return value
     if isinstance(value, bool):
         return value
     if isinstance(value, (datetime.datetime, datetime.date)):
@@ -580,30 +605,19 @@ def compute_drawdown_metrics(trades: List[Dict[str, Any]], initial_capital: floa
     if initial_capital <= 0:
         return 0.0, 0.0, 0.0
 
-    equity = initial_capital
-    equity_curve = [initial_capital]
-    for trade in trades:
-        pnl = trade.get('pnl')
-        if pnl is None:
-            continue
-        equity += float(pnl)
-        equity_curve.append(equity)
-
-    if len(equity_curve) <= 1:
+    pnls = np.fromiter((float(trade['pnl']) for trade in trades if trade.get('pnl') is not None), dtype=float)
+    if not pnls.size:
         return 0.0, 0.0, 0.0
 
-    running_max = equity_curve[0]
-    max_drawdown = 0.0
-    for value in equity_curve[1:]:
-        if value > running_max:
-            running_max = value
-        drawdown = value - running_max
-        if drawdown < max_drawdown:
-            max_drawdown = drawdown
+    # Cumulative sum seeded with the capital adds in the same order as a running total.
+    equity_curve = np.cumsum(np.concatenate(([float(initial_capital)], pnls)))
+    running_max = np.maximum.accumulate(equity_curve)
+    max_drawdown = float((equity_curve - running_max).min())
+    peak_equity = float(running_max[-1])
 
     max_drawdown_abs = abs(max_drawdown)
-    max_drawdown_percent = (max_drawdown_abs / running_max * 100) if running_max != 0 else 0.0
-    roi_percent = ((equity_curve[-1] - initial_capital) / initial_capital * 100) if initial_capital != 0 else 0.0
+    max_drawdown_percent = (max_drawdown_abs / peak_equity * 100) if peak_equity != 0 else 0.0
+    roi_percent = ((float(equity_curve[-1]) - initial_capital) / initial_capital * 100) if initial_capital != 0 else 0.0
     return max_drawdown_abs, max_drawdown_percent, roi_percent
 
 
@@ -614,11 +628,18 @@ def get_option_symbol_from_components(instrument_key: str, strike: int, option_t
     dt_obj = ensure_datetime(candle_date)
     # Use next monthly expiry instead of the month from candle_date
     expiry_date = get_next_monthly_expiry(dt_obj.date() if isinstance(dt_obj, datetime.datetime) else dt_obj)
+    return _monthly_option_symbol(instrument_key, int(strike), option_type, expiry_date)
+
+
+_OPTION_MONTH_NAMES = ('JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC')
+
+
+# Backtests ask for the same few strikes against one or two expiries per range.
+@lru_cache(maxsize=4096)
+def _monthly_option_symbol(instrument_key: str, strike: int, option_type: str, expiry_date: datetime.date) -> str:
     year = expiry_date.year % 100
-    month_names = ['JAN', 'FEB', 'MAR', 'APR', 'MAY', 'JUN', 'JUL', 'AUG', 'SEP', 'OCT', 'NOV', 'DEC']
-    month = month_names[expiry_date.month - 1]
-    strike_int = int(strike)
-    return f"{instrument_key}{year:02d}{month}{strike_int}{option_type}"
+    month = _OPTION_MONTH_NAMES[expiry_date.month - 1]
+    return f"{instrument_key}{year:02d}{month}{strike}{option_type}"
 
 
 def simulate_option_premium(index_price: float, strike: float, option_type: str) -> float:
@@ -760,6 +781,147 @@ def create_trading_strategy_from_chat(
     return clean_strategy_output(generated)
 
 
+# Backtests square off an open position on candles inside [15:15, 15:30).
+MARKET_CLOSE_SQUARE_OFF_START = datetime.time(15, 15)
+MARKET_CLOSE_SQUARE_OFF_END = datetime.time(15, 30)
+
+
+def _square_off_window_mask(candle_dates: 'pd.Series') -> List[bool]:
+    """Per candle, whether its time of day falls in the market-close square-off window.
+
+    Evaluated once over the whole frame instead of a .time() per candle; candles
+    without a datetime fall back to the wall clock, as the backtest loops did.
+    """
+    if candle_dates.dtype.kind == 'M':
+        minute_of_day = (candle_dates.dt.hour * 60 + candle_dates.dt.minute).to_numpy()
+        start = MARKET_CLOSE_SQUARE_OFF_START.hour * 60 + MARKET_CLOSE_SQUARE_OFF_START.minute
+        end = MARKET_CLOSE_SQUARE_OFF_END.hour * 60 + MARKET_CLOSE_SQUARE_OFF_END.minute
+        return ((minute_of_day >= start) & (minute_of_day < end)).tolist()
+    return [
+        MARKET_CLOSE_SQUARE_OFF_START
+        <= (value.time() if isinstance(value, datetime.datetime) else datetime.datetime.now().time())
+        < MARKET_CLOSE_SQUARE_OFF_END
+        for value in candle_dates
+    ]
+
+
+def _open_mountain_signal_trade(
+    side: str,
+    signal_candle: Dict[str, Any],
+    entry_time: Any,
+    entry_price: float,
+    trade_index: int,
+    option_trade_id: int,
+    instrument_key: str,
+    lot_size_value: int,
+    strike_step: int,
+    stop_loss_percent: float,
+    target_percent: float,
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Index trade record and its simulated ATM option trade for a Mountain Signal entry on ``side`` ('PE'/'CE')."""
+    trade_date = entry_time.date() if isinstance(entry_time, datetime.datetime) else entry_time
+    atm_strike = round_to_atm_price(entry_price, strike_step)
+    option_symbol = get_option_symbol_from_components(instrument_key, atm_strike, side, entry_time)
+    option_entry_price = simulate_option_premium(entry_price, atm_strike, side)
+    stop_loss_price_abs = float(round(option_entry_price * (1 + stop_loss_percent), 2))
+    target_price_abs = float(round(option_entry_price * (1 + target_percent), 2))
+    option_entry_price = float(option_entry_price)
+
+    trade_record = {
+        'signal_time': signal_candle['date'],
+        'signal_type': side,
+        'signal_high': signal_candle['high'],
+        'signal_low': signal_candle['low'],
+        'entry_time': entry_time,
+        'entry_price': entry_price,
+        'exit_time': None,
+        'exit_price': None,
+        'exit_type': None,
+        'pnl': None,
+        'pnl_percent': None,
+        'date': trade_date,
+        'lot_size': lot_size_value,
+        'option_trade_id': option_trade_id,
+        'option_symbol': option_symbol,
+        'option_entry_price': option_entry_price,
+        'stop_loss_price': stop_loss_price_abs,
+        'target_price': target_price_abs,
+        'option_exit_price': None
+    }
+    option_trade = {
+        'id': option_trade_id,
+        'index_trade_index': trade_index,
+        'signal_time': signal_candle['date'],
+        'signal_type': side,
+        'signal_high': float(signal_candle['high']),
+        'signal_low': float(signal_candle['low']),
+        'entry_time': entry_time,
+        'index_at_entry': float(entry_price),
+        'atm_strike': float(atm_strike),
+        'option_symbol': option_symbol,
+        'option_entry_price': option_entry_price,
+        'stop_loss_price': stop_loss_price_abs,
+        'target_price': target_price_abs,
+        'option_exit_price': None,
+        'exit_time': None,
+        'exit_type': None,
+        'pnl': None,
+        'pnl_percent': None,
+        'status': 'open',
+        'lot_size': lot_size_value,
+        'date': trade_date
+    }
+    return trade_record, option_trade
+
+
+# Option-leg exit type for index exit types whose option-side name differs.
+_OPTION_EXIT_TYPE_FOR_INDEX_EXIT = {'MKT_CLOSE': 'MARKET_CLOSE'}
+
+
+def _close_mountain_signal_trade(
+    trade: Dict[str, Any],
+    option_trade: Optional[Dict[str, Any]],
+    position: int,
+    exit_time: Any,
+    exit_price: float,
+    exit_type: str,
+    default_lot_size: int,
+) -> None:
+    """Record an exit on an index trade and, when linked, on its simulated option trade.
+
+    ``position`` is -1 for a PE (short index) trade and 1 for CE. The option leg
+    is repriced at ``exit_price`` and closed with the option-side exit type.
+    """
+    lot_size = trade.get('lot_size', default_lot_size)
+    entry_price = trade['entry_price']
+    if position == -1:
+        pnl = (entry_price - exit_price) * lot_size
+        pnl_percent = ((entry_price - exit_price) / entry_price) * 100 if entry_price else 0
+    else:
+        pnl = (exit_price - entry_price) * lot_size
+        pnl_percent = ((exit_price - entry_price) / entry_price) * 100 if entry_price else 0
+
+    option_exit_price = None
+    if option_trade:
+        option_exit_price = simulate_option_premium(exit_price, option_trade['atm_strike'], option_trade['signal_type'])
+        entry_opt_price = option_trade.get('option_entry_price')
+        option_trade['option_exit_price'] = option_exit_price
+        option_trade['exit_time'] = exit_time
+        option_trade['exit_type'] = _OPTION_EXIT_TYPE_FOR_INDEX_EXIT.get(exit_type, exit_type)
+        if entry_opt_price:
+            lot_size_opt = option_trade.get('lot_size', lot_size)
+            option_trade['pnl'] = (option_exit_price - entry_opt_price) * lot_size_opt
+            option_trade['pnl_percent'] = ((option_exit_price - entry_opt_price) / entry_opt_price) * 100
+        option_trade['status'] = 'closed'
+
+    trade['exit_time'] = exit_time
+    trade['exit_price'] = exit_price
+    trade['exit_type'] = exit_type
+    trade['pnl'] = pnl
+    trade['pnl_percent'] = pnl_percent
+    trade['option_exit_price'] = option_exit_price
+
+
 def run_mountain_signal_strategy_on_dataframe(
     df: 'pd.DataFrame',
     instrument_key: str,
@@ -786,51 +948,58 @@ def run_mountain_signal_strategy_on_dataframe(
     option_trade_sequence = 0
     active_option_trade = None
 
-    for i in range(1, len(df)):
-        current_candle = df.iloc[i]
-        previous_candle = df.iloc[i - 1]
-        current_ema = current_candle['ema']
-        previous_ema = previous_candle['ema']
-        previous_rsi = df.iloc[i - 1]['rsi14'] if 'rsi14' in df.columns else None
-
-        if previous_candle['low'] > previous_ema:
-            if previous_rsi is not None and previous_rsi > rsi_overbought_threshold:
-                if pe_signal_candle is not None:
-                    pe_signal_price_above_low = False
-                    if 'index' in pe_signal_candle:
-                        signal_candles_with_entry.discard(pe_signal_candle['index'])
-                pe_signal_candle = {
-                    'date': previous_candle['date'],
-                    'high': previous_candle['high'],
-                    'low': previous_candle['low'],
-                    'index': i - 1
-                }
-                ce_signal_candle = None
+    # Per-column lists and whole-frame signal masks, built once instead of
+    # df.iloc[i] / column checks per candle; a missing or None rsi14 never signals.
+    dates = df['date'].tolist()
+    highs = df['high'].tolist()
+    lows = df['low'].tolist()
+    closes = df['close'].tolist()
+    emas = df['ema'].tolist()
+    square_off_mask = _square_off_window_mask(df['date'])
+    if 'rsi14' in df.columns:
+        rsi_values = df['rsi14'].to_numpy(dtype=float)
+        pe_signal_mask = ((df['low'].to_numpy() > df['ema'].to_numpy()) & (rsi_values > rsi_overbought_threshold)).tolist()
+        ce_signal_mask = ((df['high'].to_numpy() < df['ema'].to_numpy()) & (rsi_values < 30)).tolist()
+    else:
+        pe_signal_mask = ce_signal_mask = [False] * len(df)
 
-        if previous_candle['high'] < previous_ema:
-            if previous_rsi is not None and previous_rsi < 30:
-                if ce_signal_candle is not None:
-                    ce_signal_price_below_high = False
-                    if 'index' in ce_signal_candle:
-                        signal_candles_with_entry.discard(ce_signal_candle['index'])
-                ce_signal_candle = {
-                    'date': previous_candle['date'],
-                    'high': previous_candle['high'],
-                    'low': previous_candle['low'],
-                    'index': i - 1
-                }
-                pe_signal_candle = None
+    for i in range(1, len(df)):
+        if pe_signal_mask[i - 1]:
+            if pe_signal_candle is not None:
+                pe_signal_price_above_low = False
+                if 'index' in pe_signal_candle:
+                    signal_candles_with_entry.discard(pe_signal_candle['index'])
+            pe_signal_candle = {
+                'date': dates[i - 1],
+                'high': highs[i - 1],
+                'low': lows[i - 1],
+                'index': i - 1
+            }
+            ce_signal_candle = None
+
+        if ce_signal_mask[i - 1]:
+            if ce_signal_candle is not None:
+                ce_signal_price_below_high = False
+                if 'index' in ce_signal_candle:
+                    signal_candles_with_entry.discard(ce_signal_candle['index'])
+            ce_signal_candle = {
+                'date': dates[i - 1],
+                'high': highs[i - 1],
+                'low': lows[i - 1],
+                'index': i - 1
+            }
+            pe_signal_candle = None
 
         if pe_signal_candle is not None and not trade_placed and not pe_signal_price_above_low:
-            if current_candle['high'] > pe_signal_candle['low']:
+            if highs[i] > pe_signal_candle['low']:
                 pe_signal_price_above_low = True
 
         if ce_signal_candle is not None and not trade_placed and not ce_signal_price_below_high:
-            if current_candle['low'] < ce_signal_candle['high']:
+            if lows[i] < ce_signal_candle['high']:
                 ce_signal_price_below_high = True
 
         if not trade_placed:
-            if pe_signal_candle is not None and current_candle['close'] < pe_signal_candle['low']:
+            if pe_signal_candle is not None and closes[i] < pe_signal_candle['low']:
                 signal_candle_index = pe_signal_candle['index']
                 is_first_entry = signal_candle_index not in signal_candles_with_entry
                 entry_allowed = is_first_entry or pe_signal_price_above_low
@@ -838,7 +1007,7 @@ def run_mountain_signal_strategy_on_dataframe(
                 if entry_allowed:
                     trade_placed = True
                     position = -1
-                    entry_price = current_candle['close']
+                    entry_price = closes[i]
                     signal_candles_with_entry.add(signal_candle_index)
                     pe_signal_price_above_low = False
                     active_trade_signal_candle = {
@@ -846,72 +1015,17 @@ def run_mountain_signal_strategy_on_dataframe(
                         'low': pe_signal_candle['low'],
                         'type': 'PE'
                     }
-                    trade_record = {
-                        'signal_time': pe_signal_candle['date'],
-                        'signal_type': 'PE',
-                        'signal_high': pe_signal_candle['high'],
-                        'signal_low': pe_signal_candle['low'],
-                        'entry_time': current_candle['date'],
-                        'entry_price': entry_price,
-                        'exit_time': None,
-                        'exit_price': None,
-                        'exit_type': None,
-                        'pnl': None,
-                        'pnl_percent': None,
-                        'date': current_candle['date'].date() if isinstance(current_candle['date'], datetime.datetime) else current_candle['date'],
-                        'lot_size': lot_size_value,
-                        'option_trade_id': None,
-                        'option_symbol': None,
-                        'option_entry_price': None,
-                        'stop_loss_price': None,
-                        'target_price': None,
-                        'option_exit_price': None
-                    }
+                    trade_record, active_option_trade = _open_mountain_signal_trade(
+                        'PE', pe_signal_candle, dates[i], entry_price, len(trades), option_trade_sequence,
+                        instrument_key, lot_size_value, strike_step, stop_loss_percent, target_percent,
+                    )
                     trades.append(trade_record)
+                    option_trades.append(active_option_trade)
+                    option_trade_sequence += 1
                     consecutive_candles_for_target = 0
                     last_candle_high_less_than_ema = False
 
-                    trade_index = len(trades) - 1
-                    trade_date_value = trades[trade_index]['date']
-                    atm_strike = round_to_atm_price(entry_price, strike_step)
-                    option_symbol = get_option_symbol_from_components(instrument_key, atm_strike, 'PE', current_candle['date'])
-                    option_entry_price = simulate_option_premium(entry_price, atm_strike, 'PE')
-                    stop_loss_price_abs = round(option_entry_price * (1 + stop_loss_percent), 2)
-                    target_price_abs = round(option_entry_price * (1 + target_percent), 2)
-
-                    option_trade = {
-                        'id': option_trade_sequence,
-                        'index_trade_index': trade_index,
-                        'signal_time': pe_signal_candle['date'],
-                        'signal_type': 'PE',
-                        'signal_high': float(pe_signal_candle['high']),
-                        'signal_low': float(pe_signal_candle['low']),
-                        'entry_time': current_candle['date'],
-                        'index_at_entry': float(entry_price),
-                        'atm_strike': float(atm_strike),
-                        'option_symbol': option_symbol,
-                        'option_entry_price': float(option_entry_price),
-                        'stop_loss_price': float(stop_loss_price_abs),
-                        'target_price': float(target_price_abs),
-                        'option_exit_price': None,
-                        'exit_time': None,
-                        'exit_type': None,
-                        'pnl': None,
-                        'pnl_percent': None,
-                        'status': 'open',
-                        'lot_size': lot_size_value,
-                        'date': trade_date_value
-                    }
-                    option_trades.append(option_trade)
-                    option_trade_sequence += 1
-                    trades[trade_index]['option_trade_id'] = option_trade['id']
-                    trades[trade_index]['option_symbol'] = option_symbol
-                    trades[trade_index]['option_entry_price'] = float(option_entry_price)
-                    trades[trade_index]['stop_loss_price'] = float(stop_loss_price_abs)
-                    trades[trade_index]['target_price'] = float(target_price_abs)
-                    active_option_trade = option_trade
-
-            elif ce_signal_candle is not None and current_candle['close'] > ce_signal_candle['high']:
+            elif ce_signal_candle is not None and closes[i] > ce_signal_candle['high']:
                 signal_candle_index = ce_signal_candle['index']
                 is_first_entry = signal_candle_index not in signal_candles_with_entry
                 entry_allowed = is_first_entry or ce_signal_price_below_high
@@ -919,7 +1033,7 @@ def run_mountain_signal_strategy_on_dataframe(
                 if entry_allowed:
                     trade_placed = True
                     position = 1
-                    entry_price = current_candle['close']
+                    entry_price = closes[i]
                     signal_candles_with_entry.add(signal_candle_index)
                     ce_signal_price_below_high = False
                     active_trade_signal_candle = {
@@ -927,126 +1041,65 @@ def run_mountain_signal_strategy_on_dataframe(
                         'low': ce_signal_candle['low'],
                         'type': 'CE'
                     }
-                    trade_record = {
-                        'signal_time': ce_signal_candle['date'],
-                        'signal_type': 'CE',
-                        'signal_high': ce_signal_candle['high'],
-                        'signal_low': ce_signal_candle['low'],
-                        'entry_time': current_candle['date'],
-                        'entry_price': entry_price,
-                        'exit_time': None,
-                        'exit_price': None,
-                        'exit_type': None,
-                        'pnl': None,
-                        'pnl_percent': None,
-                        'date': current_candle['date'].date() if isinstance(current_candle['date'], datetime.datetime) else current_candle['date'],
-                        'lot_size': lot_size_value,
-                        'option_trade_id': None,
-                        'option_symbol': None,
-                        'option_entry_price': None,
-                        'stop_loss_price': None,
-                        'target_price': None,
-                        'option_exit_price': None
-                    }
+                    trade_record, active_option_trade = _open_mountain_signal_trade(
+                        'CE', ce_signal_candle, dates[i], entry_price, len(trades), option_trade_sequence,
+                        instrument_key, lot_size_value, strike_step, stop_loss_percent, target_percent,
+                    )
                     trades.append(trade_record)
+                    option_trades.append(active_option_trade)
+                    option_trade_sequence += 1
                     consecutive_candles_for_target = 0
                     last_candle_low_greater_than_ema = False
 
-                    trade_index = len(trades) - 1
-                    trade_date_value = trades[trade_index]['date']
-                    atm_strike = round_to_atm_price(entry_price, strike_step)
-                    option_symbol = get_option_symbol_from_components(instrument_key, atm_strike, 'CE', current_candle['date'])
-                    option_entry_price = simulate_option_premium(entry_price, atm_strike, 'CE')
-                    stop_loss_price_abs = round(option_entry_price * (1 + stop_loss_percent), 2)
-                    target_price_abs = round(option_entry_price * (1 + target_percent), 2)
-
-                    option_trade = {
-                        'id': option_trade_sequence,
-                        'index_trade_index': trade_index,
-                        'signal_time': ce_signal_candle['date'],
-                        'signal_type': 'CE',
-                        'signal_high': float(ce_signal_candle['high']),
-                        'signal_low': float(ce_signal_candle['low']),
-                        'entry_time': current_candle['date'],
-                        'index_at_entry': float(entry_price),
-                        'atm_strike': float(atm_strike),
-                        'option_symbol': option_symbol,
-                        'option_entry_price': float(option_entry_price),
-                        'stop_loss_price': float(stop_loss_price_abs),
-                        'target_price': float(target_price_abs),
-                        'option_exit_price': None,
-                        'exit_time': None,
-                        'exit_type': None,
-                        'pnl': None,
-                        'pnl_percent': None,
-                        'status': 'open',
-                        'lot_size': lot_size_value,
-                        'date': trade_date_value
-                    }
-                    option_trades.append(option_trade)
-                    option_trade_sequence += 1
-                    trades[trade_index]['option_trade_id'] = option_trade['id']
-                    trades[trade_index]['option_symbol'] = option_symbol
-                    trades[trade_index]['option_entry_price'] = float(option_entry_price)
-                    trades[trade_index]['stop_loss_price'] = float(stop_loss_price_abs)
-                    trades[trade_index]['target_price'] = float(target_price_abs)
-                    active_option_trade = option_trade
-
         elif trade_placed:
-            candle_time_obj = current_candle['date']
-            if isinstance(candle_time_obj, datetime.datetime):
-                candle_time_check = candle_time_obj.time()
-            else:
-                candle_time_check = datetime.datetime.now().time()
-
             current_trade_index = len(trades) - 1
             current_trade = trades[current_trade_index] if current_trade_index >= 0 else None
 
             linked_option_trade = None
-            option_exit_price = None
-            option_exit_type = None
+            exit_type = None
             if active_option_trade and current_trade and current_trade.get('option_trade_id') == active_option_trade.get('id'):
                 linked_option_trade = active_option_trade
                 option_exit_price = simulate_option_premium(
-                    current_candle['close'],
+                    closes[i],
                     linked_option_trade['atm_strike'],
                     linked_option_trade['signal_type']
                 )
                 if option_exit_price <= linked_option_trade['stop_loss_price']:
-                    option_exit_type = 'OPTION_STOP_LOSS'
+                    exit_type = 'OPTION_STOP_LOSS'
                 elif option_exit_price >= linked_option_trade['target_price']:
-                    option_exit_type = 'OPTION_TARGET'
-
-            if option_exit_type and current_trade:
-                lot_size_for_trade = current_trade.get('lot_size', lot_size_value)
-                entry_price_value = current_trade['entry_price']
-                exit_price_value = current_candle['close']
-                if position == -1:
-                    pnl_val = (entry_price_value - exit_price_value) * lot_size_for_trade
-                    pnl_percent_val = ((entry_price_value - exit_price_value) / entry_price_value) * 100 if entry_price_value else 0
-                else:
-                    pnl_val = (exit_price_value - entry_price_value) * lot_size_for_trade
-                    pnl_percent_val = ((exit_price_value - entry_price_value) / entry_price_value) * 100 if entry_price_value else 0
-
-                current_trade['exit_time'] = current_candle['date']
-                current_trade['exit_price'] = exit_price_value
-                current_trade['exit_type'] = option_exit_type
-                current_trade['pnl'] = pnl_val
-                current_trade['pnl_percent'] = pnl_percent_val
-                current_trade['option_exit_price'] = option_exit_price
+                    exit_type = 'OPTION_TARGET'
+
+            # Exit priority: option SL/target, market-close square-off, then index stop/target
+            if exit_type is None:
+                if current_trade and square_off_mask[i]:
+                    exit_type = 'MKT_CLOSE'
+                elif position == -1 and active_trade_signal_candle is not None and active_trade_signal_candle['type'] == 'PE':
+                    if closes[i] > active_trade_signal_candle['high']:
+                        exit_type = 'INDEX_STOP'
+                    elif highs[i] < emas[i]:
+                        last_candle_high_less_than_ema = True
+                        consecutive_candles_for_target = 0
+                    elif last_candle_high_less_than_ema and closes[i] > emas[i]:
+                        consecutive_candles_for_target += 1
+                        if consecutive_candles_for_target >= 2:
+                            exit_type = 'INDEX_TARGET'
+                elif position == 1 and active_trade_signal_candle is not None and active_trade_signal_candle['type'] == 'CE':
+                    if closes[i] < active_trade_signal_candle['low']:
+                        exit_type = 'INDEX_STOP'
+                    elif lows[i] > emas[i]:
+                        last_candle_low_greater_than_ema = True
+                        consecutive_candles_for_target = 0
+                    elif last_candle_low_greater_than_ema and closes[i] < emas[i]:
+                        consecutive_candles_for_target += 1
+                        if consecutive_candles_for_target >= 2:
+                            exit_type = 'INDEX_TARGET'
 
+            if exit_type and current_trade:
+                _close_mountain_signal_trade(
+                    current_trade, linked_option_trade, position, dates[i], closes[i], exit_type, lot_size_value
+                )
                 if linked_option_trade:
-                    entry_opt_price = linked_option_trade.get('option_entry_price')
-                    lot_size_opt = linked_option_trade.get('lot_size', lot_size_for_trade)
-                    linked_option_trade['option_exit_price'] = option_exit_price
-                    linked_option_trade['exit_time'] = current_candle['date']
-                    linked_option_trade['exit_type'] = option_exit_type
-                    if entry_opt_price:
-                        linked_option_trade['pnl'] = (option_exit_price - entry_opt_price) * lot_size_opt
-                        linked_option_trade['pnl_percent'] = ((option_exit_price - entry_opt_price) / entry_opt_price) * 100 if entry_opt_price else None
-                    linked_option_trade['status'] = 'closed'
                     active_option_trade = None
-
                 trade_placed = False
                 position = 0
                 active_trade_signal_candle = None
@@ -1057,251 +1110,17 @@ def run_mountain_signal_strategy_on_dataframe(
                 else:
                     ce_signal_price_below_high = False
                     last_candle_low_greater_than_ema = False
-                continue
-
-            if current_trade:
-                market_close_square_off_time = datetime.time(15, 15)
-                if market_close_square_off_time <= candle_time_check < datetime.time(15, 30):
-                    lot_size_for_trade = current_trade.get('lot_size', lot_size_value)
-                    entry_price_value = current_trade['entry_price']
-                    exit_price_value = current_candle['close']
-                    if position == -1:
-                        pnl_val = (entry_price_value - exit_price_value) * lot_size_for_trade
-                        pnl_percent_val = ((entry_price_value - exit_price_value) / entry_price_value) * 100 if entry_price_value else 0
-                    else:
-                        pnl_val = (exit_price_value - entry_price_value) * lot_size_for_trade
-                        pnl_percent_val = ((exit_price_value - entry_price_value) / entry_price_value) * 100 if entry_price_value else 0
-
-                    option_exit_price_mc = None
-                    if linked_option_trade:
-                        option_exit_price_mc = simulate_option_premium(
-                            current_candle['close'],
-                            linked_option_trade['atm_strike'],
-                            linked_option_trade['signal_type']
-                        )
-                        entry_opt_price = linked_option_trade.get('option_entry_price')
-                        lot_size_opt = linked_option_trade.get('lot_size', lot_size_for_trade)
-                        linked_option_trade['option_exit_price'] = option_exit_price_mc
-                        linked_option_trade['exit_time'] = current_candle['date']
-                        linked_option_trade['exit_type'] = 'MARKET_CLOSE'
-                        if entry_opt_price:
-                            linked_option_trade['pnl'] = (option_exit_price_mc - entry_opt_price) * lot_size_opt
-                            linked_option_trade['pnl_percent'] = ((option_exit_price_mc - entry_opt_price) / entry_opt_price) * 100 if entry_opt_price else None
-                        linked_option_trade['status'] = 'closed'
-                        active_option_trade = None
-
-                    current_trade['exit_time'] = current_candle['date']
-                    current_trade['exit_price'] = exit_price_value
-                    current_trade['exit_type'] = 'MKT_CLOSE'
-                    current_trade['pnl'] = pnl_val
-                    current_trade['pnl_percent'] = pnl_percent_val
-                    current_trade['option_exit_price'] = option_exit_price_mc
-
-                    trade_placed = False
-                    position = 0
-                    active_trade_signal_candle = None
-                    consecutive_candles_for_target = 0
-                    if current_trade['signal_type'] == 'PE':
-                        pe_signal_price_above_low = False
-                        last_candle_high_less_than_ema = False
-                    else:
-                        ce_signal_price_below_high = False
-                        last_candle_low_greater_than_ema = False
-                    continue
-
-            if position == -1 and active_trade_signal_candle is not None and active_trade_signal_candle['type'] == 'PE':
-                lot_size_for_trade = current_trade.get('lot_size', lot_size_value) if current_trade else lot_size_value
-                entry_price_value = current_trade['entry_price'] if current_trade else 0
-
-                if current_candle['close'] > active_trade_signal_candle['high']:
-                    exit_price_value = current_candle['close']
-                    pnl_val = (entry_price_value - exit_price_value) * lot_size_for_trade
-                    pnl_percent_val = ((entry_price_value - exit_price_value) / entry_price_value) * 100 if entry_price_value else 0
-                    option_exit_price_idx = None
-                    if linked_option_trade:
-                        option_exit_price_idx = simulate_option_premium(
-                            current_candle['close'],
-                            linked_option_trade['atm_strike'],
-                            linked_option_trade['signal_type']
-                        )
-                        entry_opt_price = linked_option_trade.get('option_entry_price')
-                        lot_size_opt = linked_option_trade.get('lot_size', lot_size_for_trade)
-                        linked_option_trade['option_exit_price'] = option_exit_price_idx
-                        linked_option_trade['exit_time'] = current_candle['date']
-                        linked_option_trade['exit_type'] = 'INDEX_STOP'
-                        if entry_opt_price:
-                            linked_option_trade['pnl'] = (option_exit_price_idx - entry_opt_price) * lot_size_opt
-                            linked_option_trade['pnl_percent'] = ((option_exit_price_idx - entry_opt_price) / entry_opt_price) * 100 if entry_opt_price else None
-                        linked_option_trade['status'] = 'closed'
-                        active_option_trade = None
-
-                    current_trade['exit_time'] = current_candle['date']
-                    current_trade['exit_price'] = exit_price_value
-                    current_trade['exit_type'] = 'INDEX_STOP'
-                    current_trade['pnl'] = pnl_val
-                    current_trade['pnl_percent'] = pnl_percent_val
-                    current_trade['option_exit_price'] = option_exit_price_idx
-                    trade_placed = False
-                    position = 0
-                    active_trade_signal_candle = None
-                    pe_signal_price_above_low = False
-                    consecutive_candles_for_target = 0
-                    last_candle_high_less_than_ema = False
-                elif current_candle['high'] < current_ema:
-                    last_candle_high_less_than_ema = True
-                    consecutive_candles_for_target = 0
-                elif last_candle_high_less_than_ema and current_candle['close'] > current_ema:
-                    consecutive_candles_for_target += 1
-                    if consecutive_candles_for_target >= 2:
-                        exit_price_value = current_candle['close']
-                        pnl_val = (entry_price_value - exit_price_value) * lot_size_for_trade
-                        pnl_percent_val = ((entry_price_value - exit_price_value) / entry_price_value) * 100 if entry_price_value else 0
-                        option_exit_price_idx = None
-                        if linked_option_trade:
-                            option_exit_price_idx = simulate_option_premium(
-                                current_candle['close'],
-                                linked_option_trade['atm_strike'],
-                                linked_option_trade['signal_type']
-                            )
-                            entry_opt_price = linked_option_trade.get('option_entry_price')
-                            lot_size_opt = linked_option_trade.get('lot_size', lot_size_for_trade)
-                            linked_option_trade['option_exit_price'] = option_exit_price_idx
-                            linked_option_trade['exit_time'] = current_candle['date']
-                            linked_option_trade['exit_type'] = 'INDEX_TARGET'
-                            if entry_opt_price:
-                                linked_option_trade['pnl'] = (option_exit_price_idx - entry_opt_price) * lot_size_opt
-                                linked_option_trade['pnl_percent'] = ((option_exit_price_idx - entry_opt_price) / entry_opt_price) * 100 if entry_opt_price else None
-                            linked_option_trade['status'] = 'closed'
-                            active_option_trade = None
-
-                        current_trade['exit_time'] = current_candle['date']
-                        current_trade['exit_price'] = exit_price_value
-                        current_trade['exit_type'] = 'INDEX_TARGET'
-                        current_trade['pnl'] = pnl_val
-                        current_trade['pnl_percent'] = pnl_percent_val
-                        current_trade['option_exit_price'] = option_exit_price_idx
-                        trade_placed = False
-                        position = 0
-                        active_trade_signal_candle = None
-                        pe_signal_price_above_low = False
-                        consecutive_candles_for_target = 0
-                        last_candle_high_less_than_ema = False
-
-            elif position == 1 and active_trade_signal_candle is not None and active_trade_signal_candle['type'] == 'CE':
-                lot_size_for_trade = current_trade.get('lot_size', lot_size_value) if current_trade else lot_size_value
-                entry_price_value = current_trade['entry_price'] if current_trade else 0
-
-                if current_candle['close'] < active_trade_signal_candle['low']:
-                    exit_price_value = current_candle['close']
-                    pnl_val = (exit_price_value - entry_price_value) * lot_size_for_trade
-                    pnl_percent_val = ((exit_price_value - entry_price_value) / entry_price_value) * 100 if entry_price_value else 0
-                    option_exit_price_idx = None
-                    if linked_option_trade:
-                        option_exit_price_idx = simulate_option_premium(
-                            current_candle['close'],
-                            linked_option_trade['atm_strike'],
-                            linked_option_trade['signal_type']
-                        )
-                        entry_opt_price = linked_option_trade.get('option_entry_price')
-                        lot_size_opt = linked_option_trade.get('lot_size', lot_size_for_trade)
-                        linked_option_trade['option_exit_price'] = option_exit_price_idx
-                        linked_option_trade['exit_time'] = current_candle['date']
-                        linked_option_trade['exit_type'] = 'INDEX_STOP'
-                        if entry_opt_price:
-                            linked_option_trade['pnl'] = (option_exit_price_idx - entry_opt_price) * lot_size_opt
-                            linked_option_trade['pnl_percent'] = ((option_exit_price_idx - entry_opt_price) / entry_opt_price) * 100 if entry_opt_price else None
-                        linked_option_trade['status'] = 'closed'
-                        active_option_trade = None
-
-                    current_trade['exit_time'] = current_candle['date']
-                    current_trade['exit_price'] = exit_price_value
-                    current_trade['exit_type'] = 'INDEX_STOP'
-                    current_trade['pnl'] = pnl_val
-                    current_trade['pnl_percent'] = pnl_percent_val
-                    current_trade['option_exit_price'] = option_exit_price_idx
-                    trade_placed = False
-                    position = 0
-                    active_trade_signal_candle = None
-                    ce_signal_price_below_high = False
-                    consecutive_candles_for_target = 0
-                    last_candle_low_greater_than_ema = False
-                elif current_candle['low'] > current_ema:
-                    last_candle_low_greater_than_ema = True
-                    consecutive_candles_for_target = 0
-                elif last_candle_low_greater_than_ema and current_candle['close'] < current_ema:
-                    consecutive_candles_for_target += 1
-                    if consecutive_candles_for_target >= 2:
-                        exit_price_value = current_candle['close']
-                        pnl_val = (exit_price_value - entry_price_value) * lot_size_for_trade
-                        pnl_percent_val = ((exit_price_value - entry_price_value) / entry_price_value) * 100 if entry_price_value else 0
-                        option_exit_price_idx = None
-                        if linked_option_trade:
-                            option_exit_price_idx = simulate_option_premium(
-                                current_candle['close'],
-                                linked_option_trade['atm_strike'],
-                                linked_option_trade['signal_type']
-                            )
-                            entry_opt_price = linked_option_trade.get('option_entry_price')
-                            lot_size_opt = linked_option_trade.get('lot_size', lot_size_for_trade)
-                            linked_option_trade['option_exit_price'] = option_exit_price_idx
-                            linked_option_trade['exit_time'] = current_candle['date']
-                            linked_option_trade['exit_type'] = 'INDEX_TARGET'
-                            if entry_opt_price:
-                                linked_option_trade['pnl'] = (option_exit_price_idx - entry_opt_price) * lot_size_opt
-                                linked_option_trade['pnl_percent'] = ((option_exit_price_idx - entry_opt_price) / entry_opt_price) * 100 if entry_opt_price else None
-                            linked_option_trade['status'] = 'closed'
-                            active_option_trade = None
-
-                        current_trade['exit_time'] = current_candle['date']
-                        current_trade['exit_price'] = exit_price_value
-                        current_trade['exit_type'] = 'INDEX_TARGET'
-                        current_trade['pnl'] = pnl_val
-                        current_trade['pnl_percent'] = pnl_percent_val
-                        current_trade['option_exit_price'] = option_exit_price_idx
-                        trade_placed = False
-                        position = 0
-                        active_trade_signal_candle = None
-                        ce_signal_price_below_high = False
-                        consecutive_candles_for_target = 0
-                        last_candle_low_greater_than_ema = False
 
+    # Force-close any remaining open trade at the end of the dataset
     if trade_placed and trades:
         last_trade = trades[-1]
-        last_candle = df.iloc[-1]
-        exit_price_value = last_candle['close']
-        lot_size_for_trade = last_trade.get('lot_size', lot_size_value)
-        entry_price_value = last_trade['entry_price']
-        if position == -1:
-            pnl_val = (entry_price_value - exit_price_value) * lot_size_for_trade
-            pnl_percent_val = ((entry_price_value - exit_price_value) / entry_price_value) * 100 if entry_price_value else 0
-        else:
-            pnl_val = (exit_price_value - entry_price_value) * lot_size_for_trade
-            pnl_percent_val = ((exit_price_value - entry_price_value) / entry_price_value) * 100 if entry_price_value else 0
-
-        option_exit_price_forced = None
+        linked_option_trade = None
         if active_option_trade and last_trade.get('option_trade_id') == active_option_trade.get('id'):
-            option_exit_price_forced = simulate_option_premium(
-                exit_price_value,
-                active_option_trade['atm_strike'],
-                active_option_trade['signal_type']
-            )
-            entry_opt_price = active_option_trade.get('option_entry_price')
-            lot_size_opt = active_option_trade.get('lot_size', lot_size_for_trade)
-            active_option_trade['option_exit_price'] = option_exit_price_forced
-            active_option_trade['exit_time'] = last_candle['date']
-            active_option_trade['exit_type'] = 'FORCED_CLOSE'
-            if entry_opt_price:
-                active_option_trade['pnl'] = (option_exit_price_forced - entry_opt_price) * lot_size_opt
-                active_option_trade['pnl_percent'] = ((option_exit_price_forced - entry_opt_price) / entry_opt_price) * 100 if entry_opt_price else None
-            active_option_trade['status'] = 'closed'
+            linked_option_trade = active_option_trade
             active_option_trade = None
-
-        last_trade['exit_time'] = last_candle['date']
-        last_trade['exit_price'] = exit_price_value
-        last_trade['exit_type'] = 'FORCED_CLOSE'
-        last_trade['pnl'] = pnl_val
-        last_trade['pnl_percent'] = pnl_percent_val
-        last_trade['option_exit_price'] = option_exit_price_forced
+        _close_mountain_signal_trade(
+            last_trade, linked_option_trade, position, dates[-1], closes[-1], 'FORCED_CLOSE', lot_size_value
+        )
 
     if active_option_trade and active_option_trade.get('status') != 'closed':
         active_option_trade['status'] = 'open'
@@ -1309,11 +1128,20 @@ def run_mountain_signal_strategy_on_dataframe(
     return trades, option_trades
 
 
-def aggregate_trades_by_period(trades: List[Dict[str, Any]], period: str) -> List[Dict[str, Any]]:
-    if not trades:
-        return []
+_TRADE_PERIOD_LABEL_FORMATS = {
+    'weekly': '%G-W%V',
+    'monthly': '%Y-%m',
+    'yearly': '%Y',
+}
+
 
-    import pandas as pd  # Local import to avoid global dependency if not used elsewhere
+def aggregate_trades_by_periods(
+    trades: List[Dict[str, Any]], periods: Tuple[str, ...]
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Per-period trade stats for each of ``periods``, from one pass over ``trades``."""
+    for period in periods:
+        if period != 'daily' and period not in _TRADE_PERIOD_LABEL_FORMATS:
+            raise ValueError(f"Unsupported aggregation period: {period}")
 
     rows: List[Dict[str, Any]] = []
     for trade in trades:
@@ -1321,51 +1149,78 @@ def aggregate_trades_by_period(trades: List[Dict[str, Any]], period: str) -> Lis
         if pnl is None:
             continue
         trade_date_value = trade.get('date') or trade.get('entry_time') or trade.get('signal_time')
-        dt_obj = ensure_datetime(trade_date_value)
         rows.append({
-            'date': dt_obj,
+            'date': ensure_datetime(trade_date_value),
             'pnl': float(pnl),
-            'signal_type': trade.get('signal_type', ''),
         })
 
     if not rows:
-        return []
+        return {period: [] for period in periods}
 
     df = pd.DataFrame(rows)
+    pnls = df['pnl'].to_numpy()
+    is_win = pnls > 0
 
-    if period == 'daily':
-        df['label'] = df['date'].dt.date.astype(str)
-    elif period == 'weekly':
-        df['label'] = df['date'].dt.strftime('%G-W%V')
-    elif period == 'monthly':
-        df['label'] = df['date'].dt.strftime('%Y-%m')
-    elif period == 'yearly':
-        df['label'] = df['date'].dt.strftime('%Y')
-    else:
-        raise ValueError(f"Unsupported aggregation period: {period}")
-
-    results: List[Dict[str, Any]] = []
-    grouped = df.groupby('label')
-    for label, group in grouped:
-        trades_count = len(group)
-        wins = int((group['pnl'] > 0).sum())
-        losses = trades_count - wins
-        total_pnl = group['pnl'].sum()
-        avg_pnl = total_pnl / trades_count if trades_count > 0 else 0
-        win_rate = (wins / trades_count * 100) if trades_count > 0 else 0
-
-        results.append({
-            'label': label,
-            'trades': trades_count,
-            'wins': wins,
-            'losses': losses,
-            'winRate': round(win_rate, 2),
-            'pnl': round(total_pnl, 2),
-            'avgPnl': round(avg_pnl, 2),
-        })
+    stats_by_period: Dict[str, List[Dict[str, Any]]] = {}
+    for period in periods:
+        if period == 'daily':
+            labels = df['date'].dt.date.astype(str)
+        else:
+            labels = df['date'].dt.strftime(_TRADE_PERIOD_LABEL_FORMATS[period])
+        # Stable-sort trades by label so each group is a contiguous slice in trade
+        # order; summing the slice rounds exactly like a per-group Series.sum().
+        unique_labels, group_ids = np.unique(labels.to_numpy(), return_inverse=True)
+        order = np.argsort(group_ids, kind='stable')
+        group_starts = np.searchsorted(group_ids[order], np.arange(len(unique_labels)))
+        pnl_groups = np.split(pnls[order], group_starts[1:])
+        wins_by_label = np.bincount(group_ids[is_win], minlength=len(unique_labels)).tolist()
+
+        results: List[Dict[str, Any]] = []
+        for label, group_pnls, wins in zip(unique_labels.tolist(), pnl_groups, wins_by_label):
+            trades_count = len(group_pnls)
+            total_pnl = group_pnls.sum()
+            results.append({
+                'label': label,
+                'trades': trades_count,
+                'wins': wins,
+                'losses': trades_count - wins,
+                'winRate': round(wins / trades_count * 100, 2),
+                'pnl': round(total_pnl, 2),
+                'avgPnl': round(total_pnl / trades_count, 2),
+            })
+        stats_by_period[period] = results
+    return stats_by_period
+
+
+def aggregate_trades_by_period(trades: List[Dict[str, Any]], period: str) -> List[Dict[str, Any]]:
+    return aggregate_trades_by_periods(trades, (period,))[period]
 
-    results.sort(key=lambda item: item['label'])
-    return results
+
+def _split_closed_and_open_trades(trades: List[Dict[str, Any]]) -> Tuple[List[Dict[str, Any]], int]:
+    """Trades with an exit and a P&L, plus the number still open (no exit), in one pass."""
+    closed: List[Dict[str, Any]] = []
+    open_count = 0
+    for trade in trades:
+        if trade.get('exit_time') is None:
+            open_count += 1
+        elif trade.get('pnl') is not None:
+            closed.append(trade)
+    return closed, open_count
+
+
+def _best_and_worst_by_pnl(
+    stats: List[Dict[str, Any]]
+) -> Tuple[Optional[Dict[str, Any]], Optional[Dict[str, Any]]]:
+    """First entry with the highest and first with the lowest ``pnl``, in one pass."""
+    if not stats:
+        return None, None
+    best = worst = stats[0]
+    for item in stats[1:]:
+        if item['pnl'] > best['pnl']:
+            best = item
+        elif item['pnl'] < worst['pnl']:
+            worst = item
+    return best, worst
 
 
 # Configure logging: console with timestamp, level from env (default INFO; use DEBUG for more detail)
@@ -1443,6 +1298,12 @@ if ASYNC_MODE == 'eventlet':
 
 app = Flask(__name__)
 app.secret_key = config.SECRET_KEY
+if config.SESSION_BACKEND == 'memory':
+    check_single_worker()
+    app.session_interface = InMemorySessionInterface()
+# jsonify() sorts keys by default; the listing endpoints return hundreds of
+# row dicts, and sorting every one of them is ~40% of json.dumps time there.
+app.json.sort_keys = False
 
 # Behind Docker Nginx / host reverse proxy: trust X-Forwarded-* for Host, scheme (OAuth, cookies)
 if os.getenv('TRUST_PROXY', '').lower() in ('1', 'true', 'yes'):
@@ -1457,6 +1318,20 @@ SERVER_STARTUP_TIME = int(time.time())
 app.config['SERVER_STARTUP_TIME'] = SERVER_STARTUP_TIME
 logging.info(f"Server started at timestamp: {SERVER_STARTUP_TIME} - old sessions will be invalidated")
 
+
+def _start_user_session(user_id: int) -> None:
+    """Log ``user_id`` in on a fresh session.
+
+    Pre-login data is dropped and the server-side session id is rotated, so a
+    session id planted in the browser before login cannot be reused afterwards.
+    """
+    session.clear()
+    regenerate = getattr(session, 'regenerate', None)
+    if regenerate is not None:
+        regenerate()
+    session['user_id'] = user_id
+    session['server_startup_time'] = SERVER_STARTUP_TIME
+
 # Configure CORS
 CORS(app, 
      origins=config.CORS_ORIGINS,
@@ -1662,6 +1537,26 @@ def _get_frontend_url(default: str = 'http://localhost:5175') -> str:
     # Fallback to default
     return default
 
+def get_request_db() -> sqlite3.Connection:
+    """Pooled connection shared by the current request; released in teardown, do not close it."""
+    if 'db' not in g:
+        g.db = get_db_connection()
+    return g.db
+
+
+@app.teardown_appcontext
+def _release_request_db(exc: Optional[BaseException]) -> None:
+    conn = g.pop('db', None)
+    if conn is not None:
+        conn.close()
+
+
+def _fetch_dicts(cursor: sqlite3.Cursor) -> List[Dict[str, Any]]:
+    """All remaining rows as dicts; zip over cursor.description is ~5x cheaper than dict(sqlite3.Row)."""
+    columns = [column[0] for column in cursor.description]
+    return [dict(zip(columns, row)) for row in cursor.fetchall()]
+
+
 def _get_user_record(user_id: int) -> Optional[sqlite3.Row]:
     conn = get_db_connection()
     try:
@@ -1669,6 +1564,65 @@ def _get_user_record(user_id: int) -> Optional[sqlite3.Row]:
     finally:
         conn.close()
 
+
+# Short-lived per-process cache of user rows for the session-authorised routes
+# (dashboard, Zerodha login/callback, /api/user-data). Every write to the users
+# table in this module calls invalidate_cached_user(); the TTL bounds staleness
+# for writes made elsewhere (e.g. subscription_manager).
+USER_CACHE_TTL_SECONDS = 60
+_user_cache: Dict[int, Tuple[float, Dict[str, Any]]] = {}
+_user_cache_lock = Lock()
+
+
+def get_cached_user(user_id: int) -> Optional[Dict[str, Any]]:
+    """Return the users row for user_id as a dict (treat as read-only)."""
+    now = time.monotonic()
+    with _user_cache_lock:
+        cached = _user_cache.get(user_id)
+    if cached and cached[0] > now:
+        return cached[1]
+    row = _get_user_record(user_id)
+    if row is None:
+        invalidate_cached_user(user_id)
+        return None
+    user = dict(row)
+    with _user_cache_lock:
+        _user_cache[user_id] = (now + USER_CACHE_TTL_SECONDS, user)
+    return user
+
+
+def invalidate_cached_user(user_id: Optional[int]) -> None:
+    if user_id is None:
+        return
+    with _user_cache_lock:
+        _user_cache.pop(user_id, None)
+
+
+def _missing_kite_credentials_redirect(user: Optional[Dict[str, Any]]):
+    """Redirect to the welcome page when the user has no Kite app key/secret, else None."""
+    if user and user['app_key'] and user['app_secret']:
+        return None
+    frontend_url = _get_frontend_url()
+    if not user:
+        return redirect(f"{frontend_url}/welcome?credentials=missing&error=user_not_found")
+    return redirect(f"{frontend_url}/welcome?credentials=missing&error=api_key_missing")
+
+
+def kite_credentials_required(view: Callable) -> Callable:
+    """Require a logged-in user with Kite credentials; exposes the cached row as g.kite_user."""
+    @wraps(view)
+    def wrapper(*args, **kwargs):
+        if 'user_id' not in session:
+            return redirect(f"{_get_frontend_url()}/")
+        user = get_cached_user(session['user_id'])
+        missing = _missing_kite_credentials_redirect(user)
+        if missing is not None:
+            return missing
+        kite.api_key = user['app_key']
+        g.kite_user = user
+        return view(*args, **kwargs)
+    return wrapper
+
 def _is_admin(user_id: Optional[int] = None, email: Optional[str] = None) -> bool:
     """
     Check if a user is an admin.
@@ -1710,8 +1664,17 @@ def _require_admin():
     if 'user_id' not in session:
         return False
     
-    # Get user email from session or database
+    # One lookup per request, however many times a handler checks
     user_id = session.get('user_id')
+    cached = g.get('_admin_check')
+    if cached is not None and cached[0] == user_id:
+        return cached[1]
+    is_admin = _query_admin_flag(user_id)
+    g._admin_check = (user_id, is_admin)
+    return is_admin
+
+
+def _query_admin_flag(user_id: int) -> bool:
     conn = get_db_connection()
     try:
         user = conn.execute('SELECT email, is_admin FROM users WHERE id = ?', (user_id,)).fetchone()
@@ -1762,6 +1725,27 @@ def _update_user_access_token(user_id: int, token: Optional[str]) -> None:
         conn.commit()
     finally:
         conn.close()
+    invalidate_cached_user(user_id)
+
+
+def _clear_user_access_token_if_current(user_id: int, token: str) -> bool:
+    """Clear the stored token only if it is still ``token``; True if a row changed.
+
+    A single conditional UPDATE, so a fresh token saved by a login in the
+    meantime is never wiped.
+    """
+    conn = get_db_connection()
+    try:
+        cleared = conn.execute(
+            'UPDATE users SET zerodha_access_token = NULL, zerodha_token_created_at = NULL '
+            'WHERE id = ? AND zerodha_access_token = ?',
+            (user_id, token)
+        ).rowcount > 0
+        conn.commit()
+    finally:
+        conn.close()
+    invalidate_cached_user(user_id)
+    return cleared
 
 
 def _get_user_name_from_zerodha(user_id: int) -> Optional[str]:
@@ -1793,6 +1777,7 @@ def _get_user_name_from_zerodha(user_id: int) -> Optional[str]:
                     (user_name, user_id)
                 )
                 conn.commit()
+                invalidate_cached_user(user_id)
                 logging.info(f"Fetched and stored user name '{user_name}' for user {user_id}")
             
             return user_name
@@ -1803,20 +1788,128 @@ def _get_user_name_from_zerodha(user_id: int) -> Optional[str]:
         conn.close()
 
 
-def _validate_kite_token(app_key: str, token: str) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+# Validation results keyed by sha256(app_key:token). /api/user-data and the
+# auto-auth checks validate the same token many times a minute; a revoked token
+# is noticed within KITE_TOKEN_VALID_TTL_SECONDS.
+KITE_TOKEN_VALID_TTL_SECONDS = 45
+KITE_TOKEN_INVALID_TTL_SECONDS = 10
+KITE_TOKEN_CACHE_MAXSIZE = 10_000
+_kite_token_cache: Dict[bytes, Tuple[float, Any]] = {}
+_kite_token_cache_lock = Lock()
+
+
+@dataclass(frozen=True, slots=True)
+class _RejectedKiteToken:
+    """Cached TokenException details; a fresh exception is raised per caller so
+    threads never share (and re-raise) one exception object and its traceback."""
+    message: str
+    code: int
+
+
+# Tokens recently validated on behalf of a user request, re-validated in the
+# background every KITE_TOKEN_REFRESH_INTERVAL_SECONDS so those requests keep
+# hitting a warm cache. Dropped after KITE_TOKEN_REFRESH_IDLE_SECONDS unused.
+KITE_TOKEN_REFRESH_INTERVAL_SECONDS = KITE_TOKEN_VALID_TTL_SECONDS // 2
+KITE_TOKEN_REFRESH_IDLE_SECONDS = 300
+_kite_token_refresh_targets: Dict[bytes, Tuple[str, str, int, float]] = {}
+# user_id -> token that last validated for /api/user-data, tried first next time.
+_last_good_kite_tokens: Dict[int, str] = {}
+
+
+def _kite_token_cache_key(app_key: str, token: str) -> bytes:
+    return hashlib.sha256(f"{app_key}:{token}".encode()).digest()
+
+
+def _remember_kite_token_result(key: bytes, ttl: float, result: Any) -> None:
+    with _kite_token_cache_lock:
+        _kite_token_cache.pop(key, None)
+        if len(_kite_token_cache) >= KITE_TOKEN_CACHE_MAXSIZE:
+            # dicts keep insertion order, so this drops the oldest entry
+            del _kite_token_cache[next(iter(_kite_token_cache))]
+        _kite_token_cache[key] = (time.monotonic() + ttl, result)
+
+
+def _forget_kite_token(app_key: str, token: str) -> None:
+    key = _kite_token_cache_key(app_key, token)
+    with _kite_token_cache_lock:
+        _kite_token_cache.pop(key, None)
+        _kite_token_refresh_targets.pop(key, None)
+
+
+def _remember_good_kite_token(user_id: int, token: Optional[str]) -> None:
+    with _kite_token_cache_lock:
+        _last_good_kite_tokens.pop(user_id, None)
+        if not token:
+            return
+        if len(_last_good_kite_tokens) >= KITE_TOKEN_CACHE_MAXSIZE:
+            del _last_good_kite_tokens[next(iter(_last_good_kite_tokens))]
+        _last_good_kite_tokens[user_id] = token
+
+
+def _validate_kite_token(
+    app_key: str, token: str, user_id: Optional[int] = None
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Validate a token via profile + margins, cached; pass user_id to keep it warm."""
+    key = _kite_token_cache_key(app_key, token)
+    with _kite_token_cache_lock:
+        cached = _kite_token_cache.get(key)
+    if cached and cached[0] > time.monotonic():
+        if isinstance(cached[1], _RejectedKiteToken):
+            raise kite_exceptions.TokenException(cached[1].message, code=cached[1].code)
+        result = cached[1]
+    else:
+        result = _fetch_kite_token_validation(app_key, token, key)
+    if user_id is not None:
+        with _kite_token_cache_lock:
+            _kite_token_refresh_targets[key] = (app_key, token, user_id, time.monotonic())
+    return result
+
+
+def _fetch_kite_token_validation(
+    app_key: str, token: str, key: bytes
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
     kite_client = KiteConnect(api_key=app_key)
     kite_client.set_access_token(token)
-    profile = execute_with_retries(
-        "validating Zerodha access token",
-        lambda: kite_client.profile()
-    )
-    margins = execute_with_retries(
-        "fetching Zerodha margins during validation",
-        lambda: kite_client.margins()
-    )
+    try:
+        profile = execute_with_retries(
+            "validating Zerodha access token",
+            lambda: kite_client.profile()
+        )
+        margins = execute_with_retries(
+            "fetching Zerodha margins during validation",
+            lambda: kite_client.margins()
+        )
+    except kite_exceptions.TokenException as exc:
+        _remember_kite_token_result(
+            key, KITE_TOKEN_INVALID_TTL_SECONDS, _RejectedKiteToken(str(exc), exc.code)
+        )
+        raise
+    _remember_kite_token_result(key, KITE_TOKEN_VALID_TTL_SECONDS, (profile, margins))
     return profile, margins
 
 
+def _refresh_active_kite_tokens() -> None:
+    """Scheduler job: re-validate tokens users are actively polling before they expire."""
+    now = time.monotonic()
+    with _kite_token_cache_lock:
+        for key in [k for k, target in _kite_token_refresh_targets.items()
+                    if now - target[3] > KITE_TOKEN_REFRESH_IDLE_SECONDS]:
+            del _kite_token_refresh_targets[key]
+        targets = list(_kite_token_refresh_targets.items())
+
+    for key, (app_key, token, user_id, _) in targets:
+        try:
+            _fetch_kite_token_validation(app_key, token, key)
+        except kite_exceptions.TokenException:
+            with _kite_token_cache_lock:
+                _kite_token_refresh_targets.pop(key, None)
+            if _clear_user_access_token_if_current(user_id, token):
+                logging.info("Stored Zerodha token for user %s expired; cleared it", user_id)
+        except Exception as exc:
+            # Transient Kite/network failure: keep the last good result and retry next round.
+            logging.debug("Background token refresh failed for user %s: %s", user_id, exc)
+
+
 def _debug_session_log(
     location: str,
     message: str,
@@ -1862,6 +1955,7 @@ def _store_user_name(user_id: int, user_name: Optional[str], source: str) -> Non
         if not existing or not existing['user_name'] or existing['user_name'] != user_name:
             conn.execute('UPDATE users SET user_name = ? WHERE id = ?', (user_name, user_id))
             conn.commit()
+            invalidate_cached_user(user_id)
             logging.info("Stored user name '%s' for user %s (%s)", user_name, user_id, source)
     except Exception as exc:
         logging.warning("Could not store user name for user %s: %s", user_id, exc)
@@ -1991,6 +2085,7 @@ def _update_user_auto_auth_details(
         conn.commit()
     finally:
         conn.close()
+    invalidate_cached_user(user_id)
 
 
 def _resolve_auto_auth_job(user_id: int) -> Optional[AuthJobInput]:
@@ -2206,10 +2301,9 @@ def _with_valid_kite_client(
                 session_token = None
             continue
         except Exception as exc:
-            message = str(exc)
-            if "Invalid `api_key` or `access_token`" in message or "Incorrect `api_key` or `access_token`" in message:
+            if _is_invalid_kite_credentials_error(exc):
                 logging.warning("%s encountered invalid access token for user %s: %s", description, user_id, exc)
-                last_error = kite_exceptions.TokenException(message)
+                last_error = kite_exceptions.TokenException(str(exc))
                 if token == session_token:
                     if has_request_context():
                         try:
@@ -2326,42 +2420,112 @@ def _serialize_live_deployment(deployment: Optional[Dict[str, Any]]) -> Optional
     }
 
 
+_ORDER_SNAPSHOT_FIELDS = (
+    'order_id', 'status', 'tradingsymbol', 'transaction_type', 'quantity',
+    'filled_quantity', 'pending_quantity', 'price', 'trigger_price',
+    'average_price', 'exchange', 'product', 'order_type', 'variety',
+    'order_timestamp', 'exchange_timestamp',
+)
+
+_POSITION_SNAPSHOT_FIELDS = (
+    'tradingsymbol', 'instrument_token', 'exchange', 'product', 'quantity',
+    'buy_quantity', 'sell_quantity', 'gross_quantity', 'buy_price', 'sell_price',
+    'average_price', 'last_price', 'pnl', 'm2m',
+)
+
+
+@dataclass(slots=True)
+class OrderSnapshot:
+    """Subset of a Kite order that is exposed to the frontend / deployment state."""
+    order_id: Any = None
+    status: Any = None
+    tradingsymbol: Any = None
+    transaction_type: Any = None
+    quantity: Any = None
+    filled_quantity: Any = None
+    pending_quantity: Any = None
+    price: Any = None
+    trigger_price: Any = None
+    average_price: Any = None
+    exchange: Any = None
+    product: Any = None
+    order_type: Any = None
+    variety: Any = None
+    order_timestamp: Any = None
+    exchange_timestamp: Any = None
+    # Keys Kite actually sent; to_dict() leaves the others out, as the REST
+    # payload always has.
+    present_fields: Tuple[str, ...] = field(default=(), repr=False)
+
+    @classmethod
+    def from_kite(cls, order: Dict[str, Any]) -> 'OrderSnapshot':
+        return cls(
+            *(order.get(key) for key in _ORDER_SNAPSHOT_FIELDS),
+            present_fields=tuple(key for key in _ORDER_SNAPSHOT_FIELDS if key in order),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in self.present_fields}
+
+
+@dataclass(slots=True)
+class PositionSnapshot:
+    """Subset of a Kite net position that is exposed to the frontend / deployment state."""
+    tradingsymbol: Any = None
+    instrument_token: Any = None
+    exchange: Any = None
+    product: Any = None
+    quantity: Any = None
+    buy_quantity: Any = None
+    sell_quantity: Any = None
+    gross_quantity: Any = None
+    buy_price: Any = None
+    sell_price: Any = None
+    average_price: Any = None
+    last_price: Any = None
+    pnl: Any = None
+    m2m: Any = None
+
+    @classmethod
+    def from_kite(cls, pos: Dict[str, Any]) -> 'PositionSnapshot':
+        quantity = pos.get('quantity')
+        return cls(
+            tradingsymbol=pos.get('tradingsymbol'),
+            instrument_token=pos.get('instrument_token'),
+            exchange=pos.get('exchange'),
+            product=pos.get('product'),
+            quantity=quantity,
+            buy_quantity=pos.get('buy_quantity'),
+            sell_quantity=pos.get('sell_quantity'),
+            gross_quantity=quantity,
+            buy_price=pos.get('buy_price'),
+            sell_price=pos.get('sell_price'),
+            average_price=pos.get('average_price'),
+            last_price=pos.get('last_price'),
+            pnl=pos.get('pnl'),
+            m2m=pos.get('m2m'),
+        )
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {key: getattr(self, key) for key in _POSITION_SNAPSHOT_FIELDS}
+
+
+def _build_order_snapshots(raw_orders: List[Dict[str, Any]]) -> List[OrderSnapshot]:
+    return [OrderSnapshot.from_kite(order) for order in raw_orders or []]
+
+
+def _build_position_snapshots(raw_positions: Dict[str, Any]) -> List[PositionSnapshot]:
+    if not raw_positions:
+        return []
+    return [PositionSnapshot.from_kite(pos) for pos in raw_positions.get('net', [])]
+
+
 def _sanitize_orders(raw_orders: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
-    fields = [
-        'order_id', 'status', 'tradingsymbol', 'transaction_type', 'quantity',
-        'filled_quantity', 'pending_quantity', 'price', 'trigger_price',
-        'average_price', 'exchange', 'product', 'order_type', 'variety',
-        'order_timestamp', 'exchange_timestamp'
-    ]
-    sanitized: List[Dict[str, Any]] = []
-    for order in raw_orders:
-        entry = {key: order.get(key) for key in fields if key in order}
-        sanitized.append(entry)
-    return sanitized
+    return [snapshot.to_dict() for snapshot in _build_order_snapshots(raw_orders)]
 
 
 def _sanitize_positions(raw_positions: Dict[str, Any]) -> List[Dict[str, Any]]:
-    positions: List[Dict[str, Any]] = []
-    if not raw_positions:
-        return positions
-    for pos in raw_positions.get('net', []):
-        positions.append({
-            'tradingsymbol': pos.get('tradingsymbol'),
-            'instrument_token': pos.get('instrument_token'),
-            'exchange': pos.get('exchange'),
-            'product': pos.get('product'),
-            'quantity': pos.get('quantity'),
-            'buy_quantity': pos.get('buy_quantity'),
-            'sell_quantity': pos.get('sell_quantity'),
-            'gross_quantity': pos.get('quantity'),
-            'buy_price': pos.get('buy_price'),
-            'sell_price': pos.get('sell_price'),
-            'average_price': pos.get('average_price'),
-            'last_price': pos.get('last_price'),
-            'pnl': pos.get('pnl'),
-            'm2m': pos.get('m2m'),
-        })
-    return positions
+    return [snapshot.to_dict() for snapshot in _build_position_snapshots(raw_positions)]
 
 
 def _sanitize_holdings(raw_holdings: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
@@ -2450,6 +2614,12 @@ def _last_thursday(year: int, month: int) -> datetime.date:
 def get_next_monthly_expiry(reference_date: Optional[datetime.date] = None) -> datetime.date:
     if reference_date is None:
         reference_date = datetime.date.today()
+    return _next_monthly_expiry_on(reference_date)
+
+
+# Pure function of the calendar date; backtests call it once per candle that trades.
+@lru_cache(maxsize=1024)
+def _next_monthly_expiry_on(reference_date: datetime.date) -> datetime.date:
     year = reference_date.year
     month = reference_date.month
     expiry = _last_thursday(year, month)
@@ -2615,6 +2785,9 @@ def place_preview_order(kite_client: KiteConnect, preview: Dict[str, Any], order
     }
 
 
+LIVE_HISTORY_LIMIT = 200
+
+
 def _process_single_live_trade_deployment(deployment: Dict[str, Any], now: datetime.datetime) -> None:
     deployment_id = deployment['id']
     user_id = deployment['user_id']
@@ -2624,7 +2797,9 @@ def _process_single_live_trade_deployment(deployment: Dict[str, Any], now: datet
     state = deployment.get('state') or {}
     state.setdefault('history', [])
 
-    history_entries = list(state.get('history') or [])
+    # Bounded buffer: old entries fall off as new ones are appended, so the
+    # history never needs re-slicing before it is persisted.
+    history_entries: Deque[Dict[str, Any]] = deque(state.get('history') or [], maxlen=LIVE_HISTORY_LIMIT)
 
     def append_history_entry(
         message: str,
@@ -2767,9 +2942,9 @@ def _process_single_live_trade_deployment(deployment: Dict[str, Any], now: datet
         )
         return
 
-    sanitized_orders = _sanitize_orders(orders if isinstance(orders, list) else [])
-    sanitized_positions = _sanitize_positions(positions if isinstance(positions, dict) else {})
-    open_positions = [pos for pos in sanitized_positions if pos.get('quantity')]
+    order_snapshots = _build_order_snapshots(orders if isinstance(orders, list) else [])
+    position_snapshots = _build_position_snapshots(positions if isinstance(positions, dict) else {})
+    open_positions_count = sum(1 for pos in position_snapshots if pos.quantity)
 
     strategy_obj = None
     strategy_id = deployment.get('strategy_id')
@@ -2778,8 +2953,9 @@ def _process_single_live_trade_deployment(deployment: Dict[str, Any], now: datet
             strategy_obj = info.get('strategy')
             break
     if strategy_obj is None and strategy_id is not None:
-        for info in list(running_strategies.values()):
-            if info.get('db_id') == strategy_id and info.get('user_id') == user_id and not info.get('paper_trade'):
+        for run_id in running_strategies.run_ids_for(strategy_id):
+            info = running_strategies.get(run_id)
+            if info and info.get('user_id') == user_id and not info.get('paper_trade'):
                 strategy_obj = info.get('strategy')
                 break
     if strategy_obj is None and strategy_id:
@@ -2834,7 +3010,6 @@ def _process_single_live_trade_deployment(deployment: Dict[str, Any], now: datet
             }
         # Add signals from market open to history (only once, when initialized)
         if strategy_status.get('historical_data_initialized') and not state.get('signals_from_market_open_added'):
-            import pandas as pd  # Local import for timestamp conversion
             signals_from_open = strategy_status.get('signals_from_market_open', [])
             ignored_from_open = strategy_status.get('ignored_signals_from_market_open', [])
             
@@ -3055,7 +3230,7 @@ def _process_single_live_trade_deployment(deployment: Dict[str, Any], now: datet
 
     phase = 'monitoring'
     message = 'Monitoring market conditions for entry signals.'
-    if open_positions:
+    if open_positions_count:
         phase = 'position_open'
         message = 'Active position detected. Tracking live P&L.'
 
@@ -3079,44 +3254,40 @@ def _process_single_live_trade_deployment(deployment: Dict[str, Any], now: datet
         available_cash = None
 
     total_pnl = 0.0
-    for pos in sanitized_positions:
+    for pos in position_snapshots:
+        if pos.pnl is None:
+            continue
         try:
-            pnl = pos.get('pnl')
-            if pnl is not None:
-                total_pnl += float(pnl)
+            total_pnl += float(pos.pnl)
         except (TypeError, ValueError):
             continue
 
     evaluation_seconds = state.get('config', {}).get('evaluationSecondsBeforeClose', 20)
     candle_interval = state.get('config', {}).get('candleIntervalMinutes', 5)
-    ist_now = now.astimezone(IST)
-    remainder_minutes = ist_now.minute % candle_interval
-    close_minute_delta = (candle_interval - remainder_minutes) % candle_interval
-    candle_close_time_ist = (
-        ist_now.replace(second=0, microsecond=0) +
-        datetime.timedelta(minutes=close_minute_delta, seconds=-ist_now.second)
-    )
-    if close_minute_delta == 0 and ist_now.second >= (60 - evaluation_seconds):
-        candle_close_time_ist = ist_now.replace(second=0, microsecond=0)
-    evaluation_target_ist = candle_close_time_ist - datetime.timedelta(seconds=evaluation_seconds)
+    # Next candle close on the IST clock, in epoch seconds; converted to a
+    # datetime only for the state payload.
+    candle_seconds = max(int(candle_interval), 1) * 60
+    now_ts = int(now.timestamp())
+    candle_close_ts = now_ts - ((now_ts + IST_OFFSET_SECONDS) % candle_seconds) + candle_seconds
+    evaluation_target_ts = candle_close_ts - int(evaluation_seconds)
 
     state.update({
         'phase': phase,
         'message': message,
         'lastCheck': now.isoformat(),
-        'orders': sanitized_orders,
-        'positions': sanitized_positions,
+        'orders': [order.to_dict() for order in order_snapshots],
+        'positions': [pos.to_dict() for pos in position_snapshots],
         'margin': {
             'availableCash': available_cash,
             'snapshot': margins if isinstance(margins, dict) else None,
         },
         'livePnl': total_pnl,
-        'openOrdersCount': len(sanitized_orders),
-        'openPositionsCount': len(open_positions),
-        'lastEvaluationTarget': evaluation_target_ist.isoformat(),
+        'openOrdersCount': len(order_snapshots),
+        'openPositionsCount': open_positions_count,
+        'lastEvaluationTarget': datetime.datetime.fromtimestamp(evaluation_target_ts, IST).isoformat(),
     })
 
-    state['history'] = history_entries[-200:]
+    state['history'] = list(history_entries)
 
     live_update_deployment(
         deployment_id,
@@ -3178,31 +3349,57 @@ scheduler = BackgroundScheduler()
 scheduler.add_job(func=start_data_collection, trigger="cron", day_of_week='mon-fri', hour=9, minute=15)
 scheduler.add_job(func=stop_data_collection, trigger="cron", day_of_week='mon-fri', hour=15, minute=30)
 scheduler.add_job(func=process_live_trade_deployments, trigger="interval", seconds=30, max_instances=1)
+scheduler.add_job(func=_refresh_active_kite_tokens, trigger="interval",
+                  seconds=KITE_TOKEN_REFRESH_INTERVAL_SECONDS, max_instances=1, coalesce=True)
 scheduler.start()
 
 @app.before_request
-def make_session_permanent():
-    session.permanent = False
+def answer_cors_preflight():
+    """Short-circuit CORS preflights; add_cors_headers supplies the Access-Control-* headers.
 
-@app.before_request
-def log_request():
+    Only preflights for a registered route that allows the requested method are
+    answered here. Unknown paths fall through to Flask's 404/405, and a method
+    the route does not accept gets a 405.
+    """
+    if request.method != 'OPTIONS' or request.url_rule is None:
+        return None
+    requested_method = request.headers.get('Access-Control-Request-Method', '').upper()
+    if requested_method and requested_method not in request.url_rule.methods:
+        raise MethodNotAllowed(valid_methods=sorted(request.url_rule.methods))
+    return '', 204
+
+@app.before_request
+def make_session_permanent():
+    # Assigning marks the session modified, which would re-save it on every request.
+    if session.permanent:
+        session.permanent = False
+
+@app.before_request
+def log_request():
     """Log incoming requests for debugging"""
-    if request.path.startswith('/api/rl'):
-        logging.info(f"[RL] Incoming request: {request.method} {request.path}")
+    if request.path.startswith('/api/rl') and _root.isEnabledFor(logging.INFO):
+        logging.info("[RL] Incoming request: %s %s", request.method, request.path)
+
+_CORS_ORIGIN_LIST = list(config.CORS_ORIGINS) if isinstance(config.CORS_ORIGINS, (list, tuple)) else [config.CORS_ORIGINS]
+_ALLOWED_ORIGIN_SET = frozenset(_CORS_ORIGIN_LIST)
+_DEFAULT_ORIGIN = _CORS_ORIGIN_LIST[0] if _CORS_ORIGIN_LIST else None
+_STATIC_CORS_HEADERS = {
+    'Access-Control-Allow-Credentials': 'true',
+    'Access-Control-Allow-Headers': 'Content-Type, Authorization',
+    'Access-Control-Allow-Methods': 'GET, POST, PUT, DELETE, OPTIONS',
+}
+
 
 @app.after_request
 def add_cors_headers(response):
     """Ensure CORS headers include the request origin when credentials are used."""
     try:
-        allowed_origins = config.CORS_ORIGINS if isinstance(config.CORS_ORIGINS, (list, tuple)) else [config.CORS_ORIGINS]
         origin = request.headers.get('Origin')
-        if origin and origin in allowed_origins:
+        if origin and origin in _ALLOWED_ORIGIN_SET:
             response.headers['Access-Control-Allow-Origin'] = origin
-        elif allowed_origins:
-            response.headers['Access-Control-Allow-Origin'] = allowed_origins[0]
-        response.headers['Access-Control-Allow-Credentials'] = 'true'
-        response.headers['Access-Control-Allow-Headers'] = 'Content-Type, Authorization'
-        response.headers['Access-Control-Allow-Methods'] = 'GET, POST, PUT, DELETE, OPTIONS'
+        elif _DEFAULT_ORIGIN:
+            response.headers['Access-Control-Allow-Origin'] = _DEFAULT_ORIGIN
+        response.headers.update(_STATIC_CORS_HEADERS)
     except Exception as cors_err:
         logging.debug(f"CORS header injection failed: {cors_err}")
     return response
@@ -3226,8 +3423,8 @@ def not_found(error):
 # Initialize KiteConnect
 kite = KiteConnect(api_key="default_api_key") # The API key will be set dynamically
 
-# In-memory storage for running strategies
-running_strategies = {}
+# In-memory storage for running strategies (run_id -> info, indexed by db_id)
+running_strategies = RunningStrategies()
 paper_trade_strategies = {}  # Store paper trade strategy instances
 
 # Mountain Signal Live auto-trade sessions (key: user_id, runs on backend when user enables)
@@ -3311,6 +3508,7 @@ def init_paper_trade_tables():
         
         # Create index for faster queries
         cursor.execute("CREATE INDEX IF NOT EXISTS idx_session_timestamp ON paper_trade_audit_trail(session_id, timestamp)")
+        cursor.execute("CREATE INDEX IF NOT EXISTS idx_session_status ON paper_trade_sessions(status)")
         
         conn.commit()
         conn.close()
@@ -3421,6 +3619,26 @@ def send_email(to_email, otp):
         server.login(sender_email, password)
         server.sendmail(sender_email, receiver_email, message.as_string())
 
+# OTP mails are sent off the request thread: an SMTP handshake takes hundreds
+# of ms and would otherwise hold a worker for every signup/login.
+_email_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="otp-email")
+
+
+def _send_email_logged(to_email: str, otp: str) -> None:
+    try:
+        send_email(to_email, otp)
+    except Exception:
+        logging.exception("Failed to send OTP email to %s", to_email)
+
+
+def queue_otp_email(to_email: str, otp: str) -> None:
+    """Send the OTP mail in the background (synchronously when EMAIL_SYNC is set)."""
+    if config.EMAIL_SYNC:
+        send_email(to_email, otp)
+        return
+    _email_executor.submit(_send_email_logged, to_email, otp)
+
+
 def send_support_email(name: str, email: str, mobile: str, inquiry: str):
     port = 465
     smtp_server = config.SMTP_SERVER
@@ -3478,6 +3696,52 @@ def send_support_email(name: str, email: str, mobile: str, inquiry: str):
 def favicon():
     return '', 204
 
+# Smoothing coefficients for the chart indicators, folded once at import.
+_EMA_MULT = {period: 2 / (period + 1) for period in (5, 20)}
+# Wilder smoothing: avg = avg * (period - 1) / period + value / period
+_WILDER_COEFFS = {period: ((period - 1) / period, 1 / period) for period in (14,)}
+
+
+def _chart_ema(values: List[float], period: int) -> List[float]:
+    if not values:
+        return []
+    mult = _EMA_MULT.get(period)
+    if mult is None:
+        mult = 2 / (period + 1)
+    ema_curr = float(values[0])
+    ema_vals = [ema_curr]
+    for val in values[1:]:
+        ema_curr = (val - ema_curr) * mult + ema_curr
+        ema_vals.append(ema_curr)
+    return ema_vals
+
+
+def _chart_rsi(values: List[float], period: int = 14) -> List[Optional[float]]:
+    """RSI using Wilder's smoothing."""
+    if len(values) < period + 1:
+        return [None] * len(values)
+    decay, weight = _WILDER_COEFFS.get(period) or ((period - 1) / period, 1 / period)
+    gains = []
+    losses = []
+    for i in range(1, period + 1):
+        change = values[i] - values[i - 1]
+        gains.append(max(change, 0))
+        losses.append(abs(min(change, 0)))
+    avg_gain = sum(gains) / period
+    avg_loss = sum(losses) / period
+    rsi_series: List[Optional[float]] = [None] * period
+    for i in range(period, len(values)):
+        if i > period:
+            change = values[i] - values[i - 1]
+            gain = max(change, 0)
+            loss = abs(min(change, 0))
+            avg_gain = avg_gain * decay + gain * weight
+            avg_loss = avg_loss * decay + loss * weight
+        rs = (avg_gain / avg_loss) if avg_loss != 0 else float('inf')
+        rsi_series.append(100 - (100 / (1 + rs)))
+    return rsi_series
+
+
 @app.route('/api/chart_data')
 def api_chart_data():
     if 'user_id' not in session:
@@ -3610,46 +3874,10 @@ def api_chart_data():
             candles.append({'x': ts_str, 'o': o, 'h': h, 'l': l, 'c': c})
             closes.append(c)
 
-        # EMA helper
-        def compute_ema(values, period):
-            if not values:
-                return []
-            mult = 2 / (period + 1)
-            ema_vals = []
-            ema_curr = float(values[0])
-            for i, val in enumerate(values):
-                ema_curr = (val - ema_curr) * mult + ema_curr if i > 0 else ema_curr
-                ema_vals.append(ema_curr)
-            return ema_vals
-
-        # RSI(14) simple Wilder's method
-        def compute_rsi(values, period=14):
-            if len(values) < period + 1:
-                return [None] * len(values)
-            gains = []
-            losses = []
-            for i in range(1, period + 1):
-                change = values[i] - values[i - 1]
-                gains.append(max(change, 0))
-                losses.append(abs(min(change, 0)))
-            avg_gain = sum(gains) / period
-            avg_loss = sum(losses) / period
-            rsi_series = [None] * period
-            for i in range(period, len(values)):
-                if i > period:
-                    change = values[i] - values[i - 1]
-                    gain = max(change, 0)
-                    loss = abs(min(change, 0))
-                    avg_gain = (avg_gain * (period - 1) + gain) / period
-                    avg_loss = (avg_loss * (period - 1) + loss) / period
-                rs = (avg_gain / avg_loss) if avg_loss != 0 else float('inf')
-                rsi_series.append(100 - (100 / (1 + rs)))
-            return rsi_series
-
         if closes:
-            ema5_vals = compute_ema(closes, 5)
-            ema20_vals = compute_ema(closes, 20)
-            rsi_vals = compute_rsi(closes, 14)
+            ema5_vals = _chart_ema(closes, 5)
+            ema20_vals = _chart_ema(closes, 20)
+            rsi_vals = _chart_rsi(closes, 14)
             
             # Separate today's candles from previous day's warm-up data
             # Only return today's candles and indicators
@@ -4101,10 +4329,6 @@ def api_backtest_run():
 
     raw.sort(key=lambda x: x['date'])
 
-    import pandas as pd
-    import numpy as np
-    from utils.indicators import calculate_ema, calculate_rsi
-
     rows = [{
         'date': r['date'],
         'open': float(r.get('open', 0) or 0),
@@ -4125,11 +4349,18 @@ def api_backtest_run():
     entry_price = 0.0
     cumulative_pnl = 0.0
 
+    # Column lists for the loops below; a Series .iloc[i] / iterrows() row per
+    # candle costs far more than indexing a list.
+    dates = df['date'].tolist()
+    closes = df['close'].tolist()
+    ema_fast_values = df['ema_fast'].tolist()
+    ema_slow_values = df['ema_slow'].tolist()
+
     for i in range(1, len(df)):
-        fast_prev = df['ema_fast'].iloc[i - 1]
-        slow_prev = df['ema_slow'].iloc[i - 1]
-        fast_cur = df['ema_fast'].iloc[i]
-        slow_cur = df['ema_slow'].iloc[i]
+        fast_prev = ema_fast_values[i - 1]
+        slow_prev = ema_slow_values[i - 1]
+        fast_cur = ema_fast_values[i]
+        slow_cur = ema_slow_values[i]
 
         if pd.isna(fast_prev) or pd.isna(slow_prev) or pd.isna(fast_cur) or pd.isna(slow_cur):
             equity.append(cumulative_pnl)
@@ -4137,20 +4368,20 @@ def api_backtest_run():
 
         if position is None and fast_prev <= slow_prev and fast_cur > slow_cur:
             position = 'long'
-            entry_price = float(df['close'].iloc[i])
+            entry_price = closes[i]
             entry_idx = i
 
         elif position is None and fast_prev >= slow_prev and fast_cur < slow_cur:
             position = 'short'
-            entry_price = float(df['close'].iloc[i])
+            entry_price = closes[i]
             entry_idx = i
 
         elif position == 'long' and fast_cur < slow_cur:
-            exit_price = float(df['close'].iloc[i])
+            exit_price = closes[i]
             pnl = exit_price - entry_price
             cumulative_pnl += pnl
-            ts_entry = df['date'].iloc[entry_idx]
-            ts_exit = df['date'].iloc[i]
+            ts_entry = dates[entry_idx]
+            ts_exit = dates[i]
             trades.append({
                 'entry_time': ts_entry.isoformat() if hasattr(ts_entry, 'isoformat') else str(ts_entry),
                 'entry_price': entry_price,
@@ -4162,11 +4393,11 @@ def api_backtest_run():
             position = None
 
         elif position == 'short' and fast_cur > slow_cur:
-            exit_price = float(df['close'].iloc[i])
+            exit_price = closes[i]
             pnl = entry_price - exit_price
             cumulative_pnl += pnl
-            ts_entry = df['date'].iloc[entry_idx]
-            ts_exit = df['date'].iloc[i]
+            ts_entry = dates[entry_idx]
+            ts_exit = dates[i]
             trades.append({
                 'entry_time': ts_entry.isoformat() if hasattr(ts_entry, 'isoformat') else str(ts_entry),
                 'entry_price': entry_price,
@@ -4180,20 +4411,21 @@ def api_backtest_run():
         equity.append(cumulative_pnl)
 
     candles_out = []
-    for _, r in df.iterrows():
-        ts = r['date']
+    for ts, open_, high, low, close, volume in zip(
+        dates, df['open'].tolist(), df['high'].tolist(), df['low'].tolist(), closes, df['volume'].tolist()
+    ):
         candles_out.append({
             'timestamp': ts.isoformat() if hasattr(ts, 'isoformat') else str(ts),
-            'open': float(r['open']),
-            'high': float(r['high']),
-            'low': float(r['low']),
-            'close': float(r['close']),
-            'volume': int(r['volume']),
+            'open': float(open_),
+            'high': float(high),
+            'low': float(low),
+            'close': float(close),
+            'volume': int(volume),
         })
 
     equity_out = []
     for idx, val in enumerate(equity):
-        ts = df['date'].iloc[idx] if idx < len(df) else df['date'].iloc[-1]
+        ts = dates[idx] if idx < len(dates) else dates[-1]
         equity_out.append({
             'timestamp': ts.isoformat() if hasattr(ts, 'isoformat') else str(ts),
             'value': round(val, 2),
@@ -4504,6 +4736,16 @@ def index():
         return redirect(f"{config.FRONTEND_URL}/dashboard")
     return render_template("login.html")
 
+# Statements on the signup/login/verify path, named once so the routes below
+# share a single spelling of each query.
+SQL_USER_EXISTS_BY_EMAIL = 'SELECT 1 FROM users WHERE email = ? LIMIT 1'
+SQL_USER_VERIFY_BY_EMAIL = 'SELECT id, email_verified FROM users WHERE email = ?'
+SQL_USER_VERIFY_BY_LOWER_EMAIL = 'SELECT id, email_verified FROM users WHERE LOWER(email) = ?'
+SQL_USER_ID_BY_EMAIL = 'SELECT id FROM users WHERE email = ?'
+SQL_USER_ID_BY_LOWER_EMAIL = 'SELECT id FROM users WHERE LOWER(email) = ?'
+SQL_SET_USER_EMAIL = 'UPDATE users SET email = ? WHERE id = ?'
+SQL_MARK_EMAIL_VERIFIED = 'UPDATE users SET email_verified = 1 WHERE email = ?'
+
 @app.route('/signup', methods=['GET', 'POST'])
 def signup():
     if request.method == 'POST':
@@ -4513,21 +4755,19 @@ def signup():
         app_secret = request.form['app_secret']
 
         conn = get_db_connection()
-        user = conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
-
-        if user:
+        if conn.execute(SQL_USER_EXISTS_BY_EMAIL, (email,)).fetchone():
+            conn.close()
             flash('Email already exists!', 'error')
             return redirect('/signup')
 
-        otp = secrets.token_hex(3).upper()
-        otp_expiry = datetime.datetime.now() + datetime.timedelta(minutes=10)
-
-        conn.execute('INSERT INTO users (mobile, email, app_key, app_secret, otp, otp_expiry) VALUES (?, ?, ?, ?, ?, ?)',
-                     (mobile, email, app_key, app_secret, otp, otp_expiry))
+        conn.execute('INSERT INTO users (mobile, email, app_key, app_secret) VALUES (?, ?, ?, ?)',
+                     (mobile, email, app_key, app_secret))
         conn.commit()
         conn.close()
 
-        send_email(email, otp)
+        otp = new_otp()
+        store_otp(email, otp)
+        queue_otp_email(email, otp)
 
         return redirect(f'/verify_otp?email={email}')
     return render_template('signup.html')
@@ -4552,20 +4792,15 @@ def api_signup():
             return jsonify({'status': 'error', 'message': 'Mobile and email are required'}), 400
 
         conn = get_db_connection()
-        user = conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
-
-        if user:
+        if conn.execute(SQL_USER_EXISTS_BY_EMAIL, (email,)).fetchone():
             conn.close()
             return jsonify({
                 'status': 'error',
                 'message': 'Email already exists!'
             }), 400
 
-        otp = secrets.token_hex(3).upper()
-        otp_expiry = datetime.datetime.now() + datetime.timedelta(minutes=10)
-
-        cursor = conn.execute('INSERT INTO users (mobile, email, otp, otp_expiry) VALUES (?, ?, ?, ?)',
-                     (mobile, email, otp, otp_expiry))
+        cursor = conn.execute('INSERT INTO users (mobile, email) VALUES (?, ?)',
+                     (mobile, email))
         user_id = cursor.lastrowid
         
         # Commit and close connection BEFORE creating subscription to avoid database locks
@@ -4576,12 +4811,14 @@ def api_signup():
         try:
             from subscription_manager import create_subscription
             create_subscription(user_id, 'freemium', trial_days=7)
-            logging.info(f"Created freemium subscription for new user {user_id}")
+            logging.info("Created freemium subscription for new user %s", user_id)
         except Exception as sub_error:
-            logging.warning(f"Failed to create freemium subscription for user {user_id}: {sub_error}")
+            logging.warning("Failed to create freemium subscription for user %s: %s", user_id, sub_error)
             # Don't fail signup if subscription creation fails
 
-        send_email(email, otp)
+        otp = new_otp()
+        store_otp(email, otp)
+        queue_otp_email(email, otp)
         
         return jsonify({
             'status': 'success',
@@ -4589,7 +4826,7 @@ def api_signup():
             'redirect': '/verify-otp'
         })
     except Exception as e:
-        logging.error(f"Error in api_signup: {e}")
+        logging.error("Error in api_signup: %s", e)
         return jsonify({
             'status': 'error',
             'message': 'An error occurred. Please try again.'
@@ -4605,33 +4842,29 @@ def verify_otp():
         email = request.form['email'].strip().lower()  # Normalize email to lowercase
 
         conn = get_db_connection()
-        user = conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
+        user = conn.execute(SQL_USER_VERIFY_BY_EMAIL, (email,)).fetchone()
 
-        if user and user['otp'] == otp_entered and user['otp_expiry'] > datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S'):
+        if user and consume_otp(email, otp_entered):
             if not user['email_verified']:
-                conn.execute('UPDATE users SET email_verified = 1 WHERE email = ?', (email,))
+                conn.execute(SQL_MARK_EMAIL_VERIFIED, (email,))
                 conn.commit()
                 conn.close()
+                invalidate_cached_user(user['id'])
                 flash('Registration successful! Please log in.', 'success')
                 return redirect('/login')
             else:
                 conn.close()
-                session['user_id'] = user['id']
-                session['server_startup_time'] = SERVER_STARTUP_TIME
+                _start_user_session(user['id'])
                 return redirect('/welcome')
         else:
             return render_template('verify_otp.html', email=email, error='Invalid OTP or OTP expired!')
 
     return render_template('verify_otp.html', email=email)
 
-@app.route('/api/verify_otp', methods=['GET', 'POST', 'OPTIONS'])
-@app.route('/api/verify-otp', methods=['GET', 'POST', 'OPTIONS'])
+@app.route('/api/verify_otp', methods=['GET', 'POST'])
+@app.route('/api/verify-otp', methods=['GET', 'POST'])
 def api_verify_otp():
     """API endpoint for OTP verification that accepts JSON"""
-    if request.method == 'OPTIONS':
-        # Handle CORS preflight
-        return '', 200
-    
     if request.method == 'GET':
         # GET request - return endpoint information
         return jsonify({
@@ -4643,20 +4876,20 @@ def api_verify_otp():
     
     try:
         # Log request details for debugging
-        logging.info(f"Verify OTP request - Content-Type: {request.content_type}, Method: {request.method}")
+        logging.info("Verify OTP request - Content-Type: %s, Method: %s", request.content_type, request.method)
         
         # Try to get JSON data
         data = None
         if request.is_json:
             data = request.get_json(silent=True)
-            logging.info(f"Verify OTP request - Parsed JSON: {data}")
+            logging.info("Verify OTP request - Parsed JSON: %s", data)
         elif request.content_type and 'application/json' in request.content_type:
             try:
                 data = request.get_json(force=True)
-                logging.info(f"Verify OTP request - Force parsed JSON: {data}")
+                logging.info("Verify OTP request - Force parsed JSON: %s", data)
             except Exception as e:
-                logging.error(f"Verify OTP request - Failed to parse JSON: {e}")
-                logging.info(f"Verify OTP request - Raw data: {request.data}")
+                logging.error("Verify OTP request - Failed to parse JSON: %s", e)
+                logging.info("Verify OTP request - Raw data: %s", request.data)
         
         if data:
             otp_entered = data.get('otp')
@@ -4665,7 +4898,9 @@ def api_verify_otp():
             # Fallback to form data
             otp_entered = request.form.get('otp')
             email = request.form.get('email')
-            logging.info(f"Verify OTP request - Using form data, email: {email}, otp: {'*' * len(otp_entered) if otp_entered else 'None'}")
+            if _root.isEnabledFor(logging.INFO):
+                logging.info("Verify OTP request - Using form data, email: %s, otp: %s",
+                             email, '*' * len(otp_entered) if otp_entered else 'None')
         
         # Normalize and trim OTP (remove whitespace)
         if otp_entered:
@@ -4689,14 +4924,15 @@ def api_verify_otp():
 
         conn = get_db_connection()
         # First try exact match (case-sensitive)
-        user = conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
+        user = conn.execute(SQL_USER_VERIFY_BY_EMAIL, (email,)).fetchone()
         # If not found, try case-insensitive lookup for existing users with capitalized emails
         if not user:
-            user = conn.execute('SELECT * FROM users WHERE LOWER(email) = ?', (email,)).fetchone()
+            user = conn.execute(SQL_USER_VERIFY_BY_LOWER_EMAIL, (email,)).fetchone()
             # If found with case-insensitive lookup, update email to lowercase for consistency
             if user:
-                conn.execute('UPDATE users SET email = ? WHERE id = ?', (email, user['id']))
+                conn.execute(SQL_SET_USER_EMAIL, (email, user['id']))
                 conn.commit()
+                invalidate_cached_user(user['id'])
 
         if not user:
             conn.close()
@@ -4706,16 +4942,16 @@ def api_verify_otp():
             }), 404
 
         # Check if OTP is valid and not expired
-        current_time = datetime.datetime.now().strftime('%Y-%m-%d %H:%M:%S')
-        if user['otp'] == otp_entered and user['otp_expiry'] > current_time:
+        if consume_otp(email, otp_entered):
             if not user['email_verified']:
                 # First time verification - new registration
-                conn.execute('UPDATE users SET email_verified = 1 WHERE email = ?', (email,))
+                conn.execute(SQL_MARK_EMAIL_VERIFIED, (email,))
                 user_id = user['id']
                 
                 # Commit and close connection BEFORE creating subscription to avoid database locks
                 conn.commit()
                 conn.close()
+                invalidate_cached_user(user_id)
                 
                 # Create freemium subscription for new user if they don't have one (uses its own connection)
                 try:
@@ -4723,9 +4959,9 @@ def api_verify_otp():
                     existing_subscription = get_user_subscription(user_id)
                     if not existing_subscription:
                         create_subscription(user_id, 'freemium', trial_days=7)
-                        logging.info(f"Created freemium subscription for new user {user_id}")
+                        logging.info("Created freemium subscription for new user %s", user_id)
                 except Exception as sub_error:
-                    logging.warning(f"Failed to create freemium subscription for user {user_id}: {sub_error}")
+                    logging.warning("Failed to create freemium subscription for user %s: %s", user_id, sub_error)
                     # Don't fail verification if subscription creation fails
                 return jsonify({
                     'status': 'success',
@@ -4745,12 +4981,11 @@ def api_verify_otp():
                     existing_subscription = get_user_subscription(user_id)
                     if not existing_subscription:
                         create_subscription(user_id, 'freemium', trial_days=7)
-                        logging.info(f"Created freemium subscription for existing user {user_id}")
+                        logging.info("Created freemium subscription for existing user %s", user_id)
                 except Exception as sub_error:
-                    logging.warning(f"Failed to create freemium subscription for user {user_id}: {sub_error}")
+                    logging.warning("Failed to create freemium subscription for user %s: %s", user_id, sub_error)
                     # Don't fail login if subscription creation fails
-                session['user_id'] = user_id
-                session['server_startup_time'] = SERVER_STARTUP_TIME
+                _start_user_session(user_id)
                 return jsonify({
                     'status': 'success',
                     'message': 'OTP verified successfully!',
@@ -4763,7 +4998,7 @@ def api_verify_otp():
                 'message': 'Invalid OTP or OTP expired!'
             }), 400
     except Exception as e:
-        logging.error(f"Error in api_verify_otp: {e}")
+        logging.error("Error in api_verify_otp: %s", e)
         return jsonify({
             'status': 'error',
             'message': 'An error occurred. Please try again.'
@@ -4791,6 +5026,7 @@ def zerodha_setup():
                      (app_key, app_secret, session['user_id']))
         conn.commit()
         conn.close()
+        invalidate_cached_user(session['user_id'])
 
         return redirect('/dashboard')
 
@@ -4801,20 +5037,13 @@ def login():
     if request.method == 'POST':
         email = request.form['email'].strip().lower()  # Normalize email to lowercase
         conn = get_db_connection()
-        user = conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
+        user = conn.execute(SQL_USER_ID_BY_EMAIL, (email,)).fetchone()
         conn.close()
 
         if user:
-            otp = secrets.token_hex(3).upper()
-            otp_expiry = datetime.datetime.now() + datetime.timedelta(minutes=10)
-
-            conn = get_db_connection()
-            conn.execute('UPDATE users SET otp = ?, otp_expiry = ? WHERE id = ?',
-                         (otp, otp_expiry.strftime('%Y-%m-%d %H:%M:%S'), user['id']))
-            conn.commit()
-            conn.close()
-
-            send_email(email, otp)
+            otp = new_otp()
+            store_otp(email, otp)
+            queue_otp_email(email, otp)
             return redirect(f'{config.FRONTEND_URL}/verify-otp?email={email}')
         else:
             flash('User not found. Please sign up.', 'error')
@@ -4822,13 +5051,9 @@ def login():
 
     return render_template("login.html")
 
-@app.route("/api/login", methods=['GET', 'POST', 'OPTIONS'])
+@app.route("/api/login", methods=['GET', 'POST'])
 def api_login():
     """API endpoint for login that accepts JSON"""
-    if request.method == 'OPTIONS':
-        # Handle CORS preflight
-        return '', 200
-    
     if request.method == 'GET':
         # GET request - return endpoint information
         return jsonify({
@@ -4840,28 +5065,28 @@ def api_login():
     
     try:
         # Log request details for debugging
-        logging.info(f"Login request - Content-Type: {request.content_type}, Method: {request.method}")
-        logging.info(f"Login request - Headers: {dict(request.headers)}")
+        logging.info("Login request - Content-Type: %s, Method: %s", request.content_type, request.method)
+        logging.info("Login request - Headers: %s", request.headers)
         
         # Try to get JSON data
         data = None
         if request.is_json:
             data = request.get_json(silent=True)
-            logging.info(f"Login request - Parsed JSON: {data}")
+            logging.info("Login request - Parsed JSON: %s", data)
         elif request.content_type and 'application/json' in request.content_type:
             try:
                 data = request.get_json(force=True)
-                logging.info(f"Login request - Force parsed JSON: {data}")
+                logging.info("Login request - Force parsed JSON: %s", data)
             except Exception as e:
-                logging.error(f"Login request - Failed to parse JSON: {e}")
-                logging.info(f"Login request - Raw data: {request.data}")
+                logging.error("Login request - Failed to parse JSON: %s", e)
+                logging.info("Login request - Raw data: %s", request.data)
         
         if data:
             email = data.get('email')
         else:
             # Fallback to form data
             email = request.form.get('email')
-            logging.info(f"Login request - Using form data, email: {email}")
+            logging.info("Login request - Using form data, email: %s", email)
         
         # Normalize email to lowercase for case-insensitive lookup
         if email:
@@ -4875,7 +5100,7 @@ def api_login():
                 'debug': {
                     'content_type': request.content_type,
                     'has_json': request.is_json,
-                    'form_data': dict(request.form) if request.form else None
+                    'form_data': dict(request.form) if app.debug and request.form else None
                 }
             })
             response.headers['Content-Type'] = 'application/json'
@@ -4886,19 +5111,20 @@ def api_login():
             conn = get_db_connection()
             try:
                 # First try exact match (case-sensitive)
-                user = conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
+                user = conn.execute(SQL_USER_ID_BY_EMAIL, (email,)).fetchone()
                 # If not found, try case-insensitive lookup for existing users with capitalized emails
                 if not user:
-                    user = conn.execute('SELECT * FROM users WHERE LOWER(email) = ?', (email,)).fetchone()
+                    user = conn.execute(SQL_USER_ID_BY_LOWER_EMAIL, (email,)).fetchone()
                     # If found with case-insensitive lookup, update email to lowercase for consistency
                     if user:
-                        conn.execute('UPDATE users SET email = ? WHERE id = ?', (email, user['id']))
+                        conn.execute(SQL_SET_USER_EMAIL, (email, user['id']))
                         conn.commit()
+                        invalidate_cached_user(user['id'])
             finally:
                 conn.close()
         except SqliteOperationalError as db_err:
             if 'locked' in str(db_err).lower():
-                logging.error(f"Database locked in api_login (SELECT): {db_err}")
+                logging.error("Database locked in api_login (SELECT): %s", db_err)
                 return jsonify({
                     'status': 'error',
                     'message': 'Database is temporarily busy. Please try again in a moment.'
@@ -4906,28 +5132,9 @@ def api_login():
             raise
 
         if user:
-            otp = secrets.token_hex(3).upper()
-            otp_expiry = datetime.datetime.now() + datetime.timedelta(minutes=10)
-
-            # Use try-finally to ensure connection is always closed
-            try:
-                conn = get_db_connection()
-                try:
-                    conn.execute('UPDATE users SET otp = ?, otp_expiry = ? WHERE id = ?',
-                                 (otp, otp_expiry.strftime('%Y-%m-%d %H:%M:%S'), user['id']))
-                    conn.commit()
-                finally:
-                    conn.close()
-            except SqliteOperationalError as db_err:
-                if 'locked' in str(db_err).lower():
-                    logging.error(f"Database locked in api_login (UPDATE): {db_err}")
-                    return jsonify({
-                        'status': 'error',
-                        'message': 'Database is temporarily busy. Please try again in a moment.'
-                    }), 503  # Service Unavailable
-                raise
-
-            send_email(email, otp)
+            otp = new_otp()
+            store_otp(email, otp)
+            queue_otp_email(email, otp)
             return jsonify({
                 'status': 'success',
                 'message': 'OTP sent successfully! Please check your email.',
@@ -4943,7 +5150,7 @@ def api_login():
             response.headers['Content-Type'] = 'application/json'
             return response, 200
     except Exception as e:
-        logging.error(f"Error in api_login: {e}")
+        logging.error("Error in api_login: %s", e)
         response = jsonify({
             'status': 'error',
             'message': 'An error occurred. Please try again.'
@@ -4954,27 +5161,9 @@ def api_login():
 
 @app.route("/zerodha_login")
 @app.route("/api/zerodha_login")  # API alias for consistency
+@kite_credentials_required
 def zerodha_login():
-    if 'user_id' not in session:
-        # Use helper function that works in both local and production
-        frontend_url = _get_frontend_url()
-        return redirect(f"{frontend_url}/")
-
-    conn = get_db_connection()
-    user = conn.execute('SELECT * FROM users WHERE id = ?', (session['user_id'],)).fetchone()
-    conn.close()
-
-    if not user or not user['app_key'] or not user['app_secret']:
-        # Use helper function that works in both local and production
-        frontend_url = _get_frontend_url()
-        if not user:
-            return redirect(f"{frontend_url}/welcome?credentials=missing&error=user_not_found")
-        elif not user['app_key'] or not user['app_secret']:
-            return redirect(f"{frontend_url}/welcome?credentials=missing&error=api_key_missing")
-        return redirect(f"{frontend_url}/welcome?credentials=missing")
-
-    kite.api_key = user['app_key']
-    
+    user = g.kite_user
     backend_url = _get_zerodha_callback_base_url()
     redirect_uri = f"{backend_url}/callback"
     
@@ -5014,13 +5203,9 @@ def callback():
     if not request_token:
         return "Request token not found", 400
 
-    conn = get_db_connection()
-    user = conn.execute('SELECT * FROM users WHERE id = ?', (session['user_id'],)).fetchone()
-    conn.close()
-
-    if not user or not user['app_key'] or not user['app_secret']:
-        frontend_url = _get_frontend_url()
-        return redirect(f"{frontend_url}/welcome?credentials=missing&error=api_key_missing")
+    missing = _missing_kite_credentials_redirect(get_cached_user(session['user_id']))
+    if missing is not None:
+        return missing
 
     try:
         _exchange_request_token_for_user(
@@ -5029,6 +5214,7 @@ def callback():
             source="manual_callback",
             update_session=True,
         )
+        invalidate_kite_cache(session['user_id'])
         
         # Use helper function that works in both local and production
         frontend_url = _get_frontend_url()
@@ -5043,16 +5229,169 @@ def callback():
         else:
             return redirect(f"{frontend_url}/welcome?credentials=error&error=session_failed")
 
+# Independent Kite REST calls made on behalf of one request are fanned out here
+# so the handler waits for the slowest call instead of the sum of all of them.
+_kite_rpc_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="kite-rpc")
+# Backtest history fetches are kept separate from the RPC pool. Concurrency is
+# not a rate limit: every historical_data call (retries included) also takes a
+# token from _kite_history_rate_limiter, which holds all threads together to
+# Kite's 3 requests/second historical-data limit. Capacity 1 spaces calls evenly
+# instead of allowing bursts, and the 10% headroom absorbs timing/network jitter
+# so Kite never sees a fourth request inside one second.
+KITE_HISTORY_REQUESTS_PER_SECOND = 3
+_kite_history_executor = ThreadPoolExecutor(max_workers=3, thread_name_prefix="kite-history")
+_kite_history_rate_limiter = TokenBucket(rate=KITE_HISTORY_REQUESTS_PER_SECOND * 0.9, capacity=1)
+# Longest date range Kite serves in one historical_data call, per interval.
+# Intervals not listed here are fetched one day per call.
+KITE_HISTORY_MAX_DAYS_PER_CALL = {
+    'minute': 60,
+    '3minute': 100,
+    '5minute': 100,
+    '10minute': 100,
+    '15minute': 200,
+    '30minute': 200,
+    '60minute': 400,
+    'day': 2000,
+}
+
+
+def _fetch_historical_candles(
+    kite_client: KiteConnect,
+    token: int,
+    from_date: datetime.date,
+    to_date: datetime.date,
+    kite_interval: str,
+) -> List[Dict[str, Any]]:
+    """Fetch 09:15-15:30 candles for the date range, concurrently, in date order.
+
+    Completed days already in the candle cache (candle_cache.py) are served from
+    it. The remaining weekdays are split into the widest windows Kite allows for
+    ``kite_interval`` (KITE_HISTORY_MAX_DAYS_PER_CALL), so a month of 5-minute
+    candles is one call rather than one per weekday. TokenException propagates;
+    any other failed window is logged and skipped.
+    """
+    window_days = KITE_HISTORY_MAX_DAYS_PER_CALL.get(kite_interval, 1)
+    today = datetime.datetime.now(IST).date()
+
+    try:
+        cached_days = load_cached_candles(token, kite_interval, from_date, to_date)
+    except sqlite3.Error as e:
+        logging.warning(f"Historical candle cache unavailable for token {token}: {e}")
+        cached_days = {}
+
+    def fetch_window(window_start: datetime.date, window_end: datetime.date):
+        start_dt = datetime.datetime.combine(window_start, datetime.time(9, 15))
+        end_dt = datetime.datetime.combine(window_end, datetime.time(15, 30))
+
+        def request_window():
+            _kite_history_rate_limiter.acquire()
+            return kite_client.historical_data(token, start_dt, end_dt, kite_interval)
+
+        return execute_with_retries(
+            f"fetching {kite_interval} historical data for token {token} from {window_start} to {window_end}",
+            request_window
+        )
+
+    # A window grows over uncached weekdays (and the weekends between them) until
+    # it hits a cached day or Kite's per-call limit.
+    windows: List[List[datetime.date]] = []
+    day = from_date
+    while day <= to_date:
+        if day.weekday() < 5 and day not in cached_days:
+            if windows and (day - windows[-1][0]).days < window_days and all(
+                (windows[-1][1] + datetime.timedelta(days=offset)).weekday() >= 5
+                for offset in range(1, (day - windows[-1][1]).days)
+            ):
+                windows[-1][1] = day
+            else:
+                windows.append([day, day])
+        day += datetime.timedelta(days=1)
+
+    futures = [(window, _kite_history_executor.submit(fetch_window, *window)) for window in windows]
+    candles_by_day: Dict[datetime.date, List[Dict[str, Any]]] = dict(cached_days)
+    completed_days: Dict[datetime.date, List[Dict[str, Any]]] = {}
+    for (window_start, window_end), future in futures:
+        try:
+            hist = future.result()
+        except kite_exceptions.TokenException:
+            for _, pending in futures:
+                pending.cancel()
+            raise
+        except Exception as e:
+            logging.error(f"Error fetching historical data for {window_start} to {window_end}: {e}")
+            continue
+        window_candles: Dict[datetime.date, List[Dict[str, Any]]] = {}
+        for candle in hist or []:
+            # Kite returns dateutil tzoffset datetimes; cached days come back with
+            # IST, and mixing the two tzinfo types makes pandas fall back to an
+            # object-dtype date column.
+            if candle['date'].tzinfo is not None:
+                candle['date'] = candle['date'].astimezone(IST)
+            window_candles.setdefault(candle['date'].date(), []).append(candle)
+        candles_by_day.update(window_candles)
+        # Weekdays Kite returned nothing for (including every day of an entirely
+        # empty window) are usually holidays; they are cached as empty (with a
+        # short TTL, see candle_cache.py) so they are not requested on every run.
+        day = window_start
+        while day <= window_end and day < today:
+            if day.weekday() < 5 or day in window_candles:
+                completed_days[day] = window_candles.get(day, [])
+            day += datetime.timedelta(days=1)
+
+    if completed_days:
+        try:
+            store_cached_candles(token, kite_interval, completed_days)
+        except sqlite3.Error as e:
+            logging.warning(f"Could not cache historical candles for token {token}: {e}")
+
+    all_candles: List[Dict[str, Any]] = []
+    for day in sorted(candles_by_day):
+        all_candles.extend(candles_by_day[day])
+    return all_candles
+
+# Only the columns the dashboard.html strategies table renders.
+DASHBOARD_STRATEGIES_SQL = (
+    'SELECT id, strategy_name, instrument, expiry_type, total_lot, status '
+    'FROM strategies WHERE user_id = ?'
+)
+
+# Per-user Kite responses for the dashboard: the profile is effectively static
+# for a session, the balance only needs to be sub-minute fresh.
+KITE_PROFILE_TTL_SECONDS = 300
+KITE_MARGINS_TTL_SECONDS = 15
+_kite_response_cache: Dict[Tuple[str, int], Tuple[float, Any]] = {}
+_kite_response_cache_lock = Lock()
+
+
+def _cached_kite_call(kind: str, user_id: int, ttl: float, description: str, func: Callable[[], Any]) -> Any:
+    key = (kind, user_id)
+    now = time.monotonic()
+    with _kite_response_cache_lock:
+        cached = _kite_response_cache.get(key)
+    if cached and cached[0] > now:
+        return cached[1]
+    value = execute_with_retries(description, func)
+    with _kite_response_cache_lock:
+        _kite_response_cache[key] = (time.monotonic() + ttl, value)
+    return value
+
+
+def invalidate_kite_cache(user_id: Optional[int]) -> None:
+    if user_id is None:
+        return
+    with _kite_response_cache_lock:
+        for key in [k for k in _kite_response_cache if k[1] == user_id]:
+            del _kite_response_cache[key]
+
 @app.route("/dashboard")
 def dashboard():
     if 'user_id' not in session:
         return redirect("/")
 
-    conn = get_db_connection()
-    user = conn.execute('SELECT * FROM users WHERE id = ?', (session['user_id'],)).fetchone()
-    
-    strategies = conn.execute('SELECT * FROM strategies WHERE user_id = ?', (session['user_id'],)).fetchall()
-    conn.close()
+    user = get_cached_user(session['user_id'])
+    if not user:
+        session.clear()
+        return redirect("/")
 
     if not user['email_verified']:
         return redirect(f"/verify_otp?email={user['email']}")
@@ -5061,21 +5400,37 @@ def dashboard():
         if 'access_token' not in session:
             return redirect('/welcome')
 
+        conn = get_db_connection()
+        try:
+            strategies = conn.execute(DASHBOARD_STRATEGIES_SQL, (session['user_id'],)).fetchall()
+        finally:
+            conn.close()
+
         kite.set_access_token(session['access_token'])
-        profile = execute_with_retries("fetching Kite profile for dashboard", lambda: kite.profile())
-        margins = execute_with_retries("fetching Kite margins for dashboard", lambda: kite.margins())
+        user_id = session['user_id']
+        profile_future = _kite_rpc_executor.submit(
+            _cached_kite_call, "profile", user_id, KITE_PROFILE_TTL_SECONDS,
+            "fetching Kite profile for dashboard", kite.profile,
+        )
+        margins_future = _kite_rpc_executor.submit(
+            _cached_kite_call, "margins", user_id, KITE_MARGINS_TTL_SECONDS,
+            "fetching Kite margins for dashboard", kite.margins,
+        )
+        profile = profile_future.result()
+        margins = margins_future.result()
         user_name = profile.get("user_name")
         balance = margins.get("equity", {}).get("available", {}).get("live_balance")
         return render_template("dashboard.html", user_name=user_name, balance=balance, access_token=session.get('access_token'), strategies=strategies)
     except kite_exceptions.TokenException as e:
         logging.error(f"Error fetching data for dashboard: {e}")
+        invalidate_kite_cache(session.get('user_id'))
         session.pop('access_token', None)
         flash('Your Zerodha session is invalid or expired. Please log in again.', 'error')
         return redirect('/welcome')
     except Exception as e:
         logging.error(f"Error fetching data for dashboard: {e}")
         # If the access token is invalid, redirect to the login page
-        if "Invalid `api_key` or `access_token`" in str(e):
+        if _is_invalid_kite_credentials_error(e):
             session.pop('access_token', None)
             flash('Your Zerodha session is invalid or expired. Please log in again.', 'error')
             return redirect('/welcome')
@@ -5088,8 +5443,8 @@ def logout():
     user_id = session.get('user_id')
     if user_id:
         _get_auto_auth_orchestrator().reset_terminal_state(user_id)
-    session.pop('access_token', None)
-    session.pop('user_id', None)
+        invalidate_kite_cache(user_id)
+    session.clear()
     return redirect("/")
 
 @app.route("/api/logout", methods=['POST'])
@@ -5097,8 +5452,8 @@ def api_logout():
     user_id = session.get('user_id')
     if user_id:
         _get_auto_auth_orchestrator().reset_terminal_state(user_id)
-    session.pop('access_token', None)
-    session.pop('user_id', None)
+        invalidate_kite_cache(user_id)
+    session.clear()
     return jsonify({'status': 'success', 'message': 'Logged out successfully'})
 
 @app.route("/api/auth/google", methods=['GET'])
@@ -5241,14 +5596,14 @@ def api_google_callback():
             if user:
                 user_dict = dict(user)
                 # Existing user - log them in
-                session['user_id'] = user['id']
-                session['server_startup_time'] = SERVER_STARTUP_TIME
+                _start_user_session(user['id'])
                 # Update user name if available and different
                 current_name = user_dict.get('user_name') or ''
                 if google_name and google_name != current_name:
                     try:
                         conn.execute('UPDATE users SET user_name = ? WHERE id = ?', (google_name, user['id']))
                         conn.commit()
+                        invalidate_cached_user(user['id'])
                     except SqliteOperationalError as db_err:
                         if 'locked' in str(db_err).lower():
                             logging.warning(f"Database locked when updating user name, continuing anyway: {db_err}")
@@ -5333,8 +5688,7 @@ def api_google_callback():
                         except Exception as sub_error:
                             logging.warning(f"Failed to create freemium subscription for Google user {user_id}: {sub_error}")
                         
-                        session['user_id'] = user_id
-                        session['server_startup_time'] = SERVER_STARTUP_TIME
+                        _start_user_session(user_id)
                         
                         # New users don't have Zerodha credentials, redirect to welcome page
                         frontend_url = _get_frontend_url()
@@ -5412,7 +5766,12 @@ def api_admin_check():
         return jsonify({'is_admin': False}), 200
     
     is_admin = _require_admin()
-    return jsonify({'is_admin': is_admin}), 200
+    response = jsonify({'is_admin': is_admin})
+    # Polled on SPA navigation; the flag rarely changes. Vary on the session
+    # cookie so a different login in the same browser is not served this copy.
+    response.headers['Cache-Control'] = 'private, max-age=60'
+    response.headers['Vary'] = 'Cookie'
+    return response, 200
 
 @app.route("/api/admin/subscriptions", methods=['GET'])
 def api_admin_get_subscriptions():
@@ -5739,38 +6098,54 @@ def api_admin_get_users():
     if not _require_admin():
         return jsonify({'status': 'error', 'message': 'Admin access required'}), 403
     
+    # No limit by default (LIMIT -1) so the admin panel keeps getting every user.
+    try:
+        limit = int(request.args.get('limit', -1))
+        offset = int(request.args.get('offset', 0))
+    except ValueError:
+        return jsonify({'status': 'error', 'message': 'limit and offset must be integers'}), 400
+
     try:
         conn = get_db_connection()
         try:
-            users = conn.execute('''
-                SELECT id, email, mobile, email_verified, app_key, app_secret, 
+            total = conn.execute('SELECT COUNT(*) FROM users').fetchone()[0]
+            rows = conn.execute('''
+                SELECT id, email, mobile, email_verified, app_key, app_secret,
                        is_admin, zerodha_access_token, zerodha_token_created_at,
                        kite_developer_plan, kite_user_id
                 FROM users
                 ORDER BY id DESC
-            ''').fetchall()
-            
-            from kite_client_resolver import compute_token_status
-            users_list = []
-            for user in users:
-                user_dict = dict(user)
-                users_list.append({
-                    'id': user_dict['id'],
-                    'email': user_dict['email'],
-                    'mobile': user_dict['mobile'],
-                    'email_verified': bool(user_dict['email_verified']),
-                    'app_key': user_dict['app_key'] if user_dict['app_key'] else '',
-                    'app_secret': user_dict['app_secret'] if user_dict['app_secret'] else '',
-                    'is_admin': bool(user_dict['is_admin']) if user_dict['is_admin'] is not None else False,
-                    'has_token': bool(user_dict['zerodha_access_token']),
-                    'token_status': compute_token_status(user_dict, validate=True),
-                    'token_created_at': user_dict['zerodha_token_created_at'],
-                    'kite_developer_plan': user_dict.get('kite_developer_plan') or '',
-                    'kite_user_id': user_dict.get('kite_user_id') or '',
-                })
-            return jsonify({'status': 'success', 'users': users_list}), 200
+                LIMIT ? OFFSET ?
+            ''', (limit, offset)).fetchall()
         finally:
+            # Released before the per-user Kite token checks below.
             conn.close()
+
+        from kite_client_resolver import compute_token_status
+        users_list = []
+        for (user_id, email, mobile, email_verified, app_key, app_secret,
+             is_admin, access_token, token_created_at, plan, kite_user_id) in rows:
+            token_fields = {
+                'id': user_id,
+                'app_key': app_key,
+                'app_secret': app_secret,
+                'zerodha_access_token': access_token,
+            }
+            users_list.append({
+                'id': user_id,
+                'email': email,
+                'mobile': mobile,
+                'email_verified': bool(email_verified),
+                'app_key': app_key or '',
+                'app_secret': app_secret or '',
+                'is_admin': bool(is_admin),
+                'has_token': bool(access_token),
+                'token_status': compute_token_status(token_fields, validate=True),
+                'token_created_at': token_created_at,
+                'kite_developer_plan': plan or '',
+                'kite_user_id': kite_user_id or '',
+            })
+        return jsonify({'status': 'success', 'users': users_list, 'total': total}), 200
     except Exception as e:
         logging.error(f"Error fetching users: {e}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
@@ -5840,32 +6215,26 @@ def api_admin_get_legacy_kite_account(account_id: int):
         logging.error("Error fetching legacy kite account detail: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': str(exc)}), 500
 
-@app.route("/api/admin/users/<int:user_id>", methods=['PUT', 'DELETE', 'OPTIONS'])
+@app.route("/api/admin/users/<int:user_id>", methods=['PUT', 'DELETE'])
 def api_admin_manage_user(user_id):
     """Update or delete a user (admin only)"""
-    if request.method == 'OPTIONS':
-        # Handle CORS preflight
-        return '', 200
-    
     if not _require_admin():
         return jsonify({'status': 'error', 'message': 'Admin access required'}), 403
     
     if request.method == 'DELETE':
         # Delete user
+        # Prevent deleting yourself
+        if user_id == session.get('user_id'):
+            return jsonify({'status': 'error', 'message': 'Cannot delete your own account'}), 400
+
         try:
             conn = get_db_connection()
             try:
-                # Check if user exists
-                user = conn.execute('SELECT id FROM users WHERE id = ?', (user_id,)).fetchone()
-                if not user:
-                    return jsonify({'status': 'error', 'message': 'User not found'}), 404
-                
-                # Prevent deleting yourself
-                if user_id == session.get('user_id'):
-                    return jsonify({'status': 'error', 'message': 'Cannot delete your own account'}), 400
-                
-                conn.execute('DELETE FROM users WHERE id = ?', (user_id,))
+                cursor = conn.execute('DELETE FROM users WHERE id = ?', (user_id,))
                 conn.commit()
+                if cursor.rowcount == 0:
+                    return jsonify({'status': 'error', 'message': 'User not found'}), 404
+                invalidate_cached_user(user_id)
                 return jsonify({'status': 'success', 'message': 'User deleted successfully'}), 200
             finally:
                 conn.close()
@@ -5882,11 +6251,6 @@ def api_admin_manage_user(user_id):
             
             conn = get_db_connection()
             try:
-                # Check if user exists
-                user = conn.execute('SELECT id FROM users WHERE id = ?', (user_id,)).fetchone()
-                if not user:
-                    return jsonify({'status': 'error', 'message': 'User not found'}), 404
-                
                 updates = []
                 values = []
                 credentials_updated = False
@@ -5946,8 +6310,11 @@ def api_admin_manage_user(user_id):
                 
                 values.append(user_id)
                 query = f"UPDATE users SET {', '.join(updates)} WHERE id = ?"
-                conn.execute(query, values)
+                cursor = conn.execute(query, values)
                 conn.commit()
+                if cursor.rowcount == 0:
+                    return jsonify({'status': 'error', 'message': 'User not found'}), 404
+                invalidate_cached_user(user_id)
 
                 message = 'User updated successfully'
                 if credentials_updated:
@@ -5998,6 +6365,9 @@ def api_admin_disable_zerodha_token(user_id: int):
             conn.commit()
         finally:
             conn.close()
+        invalidate_cached_user(user_id)
+        if had_token and user['app_key']:
+            _forget_kite_token(user['app_key'], user['zerodha_access_token'])
 
         # If admin is disabling their own token, clear current session token immediately.
         if session.get('user_id') == user_id:
@@ -6067,8 +6437,11 @@ def api_admin_approve_strategy(strategy_id):
     try:
         conn = get_db_connection()
         try:
+            # Take the write lock before reading the status so the check and the
+            # UPDATE see the same row; early returns roll back on close().
+            conn.execute('BEGIN IMMEDIATE')
             strategy = conn.execute(
-                'SELECT id, approval_status FROM strategies WHERE id = ?', 
+                'SELECT id, user_id, approval_status FROM strategies WHERE id = ?', 
                 (strategy_id,)
             ).fetchone()
             
@@ -6089,6 +6462,7 @@ def api_admin_approve_strategy(strategy_id):
                 (admin_id, strategy_id)
             )
             conn.commit()
+            invalidate_running_strategies_json(strategy['user_id'])
             return jsonify({'status': 'success', 'message': 'Strategy approved successfully'}), 200
         finally:
             conn.close()
@@ -6108,8 +6482,11 @@ def api_admin_reject_strategy(strategy_id):
         
         conn = get_db_connection()
         try:
+            # Take the write lock before reading the status so the check and the
+            # UPDATE see the same row; early returns roll back on close().
+            conn.execute('BEGIN IMMEDIATE')
             strategy = conn.execute(
-                'SELECT id, approval_status FROM strategies WHERE id = ?', 
+                'SELECT id, user_id, approval_status FROM strategies WHERE id = ?', 
                 (strategy_id,)
             ).fetchone()
             
@@ -6130,6 +6507,7 @@ def api_admin_reject_strategy(strategy_id):
                 (admin_id, rejection_reason if rejection_reason else None, strategy_id)
             )
             conn.commit()
+            invalidate_running_strategies_json(strategy['user_id'])
             return jsonify({'status': 'success', 'message': 'Strategy rejected successfully'}), 200
         finally:
             conn.close()
@@ -6137,6 +6515,15 @@ def api_admin_reject_strategy(strategy_id):
         logging.error(f"Error rejecting strategy: {e}")
         return jsonify({'status': 'error', 'message': str(e)}), 500
 
+def _revalidated_json(payload: Dict[str, Any]):
+    """JSON response with a body ETag; answers 304 when If-None-Match still matches."""
+    response = jsonify(payload)
+    response.headers['Cache-Control'] = 'private, no-cache'
+    response.headers['Vary'] = 'Cookie'
+    response.add_etag()
+    return response.make_conditional(request)
+
+
 @app.route("/api/user-data")
 def api_user_data():
     # Check if session is from before server restart
@@ -6160,8 +6547,8 @@ def api_user_data():
     
     try:
         user_id = session['user_id']
-        user_row = _get_user_record(user_id)
-        if not user_row:
+        user = get_cached_user(user_id)
+        if not user:
             return jsonify({
                 'status': 'error',
                 'authenticated': False,
@@ -6169,7 +6556,6 @@ def api_user_data():
                 'message': 'User record not found'
             }), 400
 
-        user = dict(user_row)
         app_key = user.get('app_key')
         stored_token = user.get('zerodha_access_token')
         session_token = session.get('access_token')
@@ -6198,101 +6584,106 @@ def api_user_data():
         except Exception as exc:
             logging.debug("Kite context unavailable: %s", exc)
 
-        tokens_to_try: List[str] = []
-        if session_token:
-            tokens_to_try.append(session_token)
-        if stored_token and stored_token not in tokens_to_try:
-            tokens_to_try.append(stored_token)
+        if not app_key:
+            default_response['message'] = 'Zerodha credentials not configured'
+            return _revalidated_json(default_response)
 
-        if app_key:
-            for token in tokens_to_try:
-                if not token:
-                    continue
-                try:
-                    profile, margins = _validate_kite_token(app_key, token)
-                    session['access_token'] = token
-                    if stored_token != token:
-                        _update_user_access_token(user_id, token)
-                        stored_token = token
+        # Last known-good token first (only if it is still one of ours), then
+        # session, then stored; filter() drops blanks, dict.fromkeys() de-duplicates in order.
+        last_good = _last_good_kite_tokens.get(user_id)
+        if last_good not in (session_token, stored_token):
+            last_good = None
+        tokens_to_try = list(dict.fromkeys(filter(None, (last_good, session_token, stored_token))))
 
-                    user_name = profile.get("user_name", "Guest")
-                    balance = margins.get("equity", {}).get("available", {}).get("live_balance", 0)
-                    
-                    # Get Zerodha Kite Client ID (user_id from profile, e.g., "RD2033")
-                    kite_client_id = profile.get("user_id") or profile.get("client_id") or None
-                    
-                    _store_user_name(user_id, user_name, "api_user_data")
-                    _get_auto_auth_orchestrator().reset_terminal_state(user_id)
-                    
-                    default_response.update({
-                        'user_name': user_name,
-                        'balance': balance,
-                        'access_token_present': True,
-                        'token_valid': True,
-                        'kite_client_id': kite_client_id,
-                        'message': 'Zerodha session active'
-                    })
-                    # #region agent log
-                    try:
-                        from debug_agent_log import agent_log
-                        agent_log(
-                            "app.py:api_user_data",
-                            "user-data valid token",
-                            {
-                                "branch": "token_valid",
-                                "session_token_present": bool(session_token),
-                                "stored_token_present": bool(stored_token),
-                                "auto_auth_status": auto_auth_state.get("status"),
-                            },
-                            "H2,H3",
-                            "post-fix",
-                        )
-                    except Exception:
-                        pass
-                    # #endregion
-                    return jsonify(default_response)
-                except kite_exceptions.TokenException as exc:
-                    logging.warning("Zerodha token invalid for user %s: %s", user_id, exc)
-                    # #region agent log
-                    try:
-                        from debug_agent_log import agent_log
-                        agent_log(
-                            "app.py:api_user_data:token_exception",
-                            "Token validation failed",
-                            {
-                                "user_id": user_id,
-                                "error_msg": str(exc)[:200],
-                                "session_token_present": bool(session_token),
-                                "stored_token_present": bool(stored_token),
-                            },
-                            "B",
-                        )
-                    except Exception:
-                        pass
-                    # #endregion
+        for token in tokens_to_try:
+            try:
+                profile, margins = _validate_kite_token(app_key, token, user_id)
+                _remember_good_kite_token(user_id, token)
+                session['access_token'] = token
+                if stored_token != token:
+                    _update_user_access_token(user_id, token)
+                    stored_token = token
+
+                user_name = profile.get("user_name", "Guest")
+                balance = margins.get("equity", {}).get("available", {}).get("live_balance", 0)
+                
+                # Get Zerodha Kite Client ID (user_id from profile, e.g., "RD2033")
+                kite_client_id = profile.get("user_id") or profile.get("client_id") or None
+                
+                _store_user_name(user_id, user_name, "api_user_data")
+                _get_auto_auth_orchestrator().reset_terminal_state(user_id)
+                
+                default_response.update({
+                    'user_name': user_name,
+                    'balance': balance,
+                    'access_token_present': True,
+                    'token_valid': True,
+                    'kite_client_id': kite_client_id,
+                    'message': 'Zerodha session active'
+                })
+                # #region agent log
+                try:
+                    from debug_agent_log import agent_log
+                    agent_log(
+                        "app.py:api_user_data",
+                        "user-data valid token",
+                        {
+                            "branch": "token_valid",
+                            "session_token_present": bool(session_token),
+                            "stored_token_present": bool(stored_token),
+                            "auto_auth_status": auto_auth_state.get("status"),
+                        },
+                        "H2,H3",
+                        "post-fix",
+                    )
+                except Exception:
+                    pass
+                # #endregion
+                return _revalidated_json(default_response)
+            except kite_exceptions.TokenException as exc:
+                logging.warning("Zerodha token invalid for user %s: %s", user_id, exc)
+                if token == last_good:
+                    _remember_good_kite_token(user_id, None)
+                # #region agent log
+                try:
+                    from debug_agent_log import agent_log
+                    agent_log(
+                        "app.py:api_user_data:token_exception",
+                        "Token validation failed",
+                        {
+                            "user_id": user_id,
+                            "error_msg": str(exc)[:200],
+                            "session_token_present": bool(session_token),
+                            "stored_token_present": bool(stored_token),
+                        },
+                        "B",
+                    )
+                except Exception:
+                    pass
+                # #endregion
+                if token == session_token:
+                    session.pop('access_token', None)
+                    session_token = None
+                continue
+            except Exception as exc:
+                logging.error("Error validating Zerodha token for user %s: %s", user_id, exc)
+                # Only profile()/margins() ran, so an InputException can only mean a bad api_key.
+                if isinstance(exc, kite_exceptions.InputException) or _is_invalid_kite_credentials_error(exc):
+                    if token == last_good:
+                        _remember_good_kite_token(user_id, None)
                     if token == session_token:
                         session.pop('access_token', None)
                         session_token = None
                     continue
-                except Exception as exc:
-                    logging.error("Error validating Zerodha token for user %s: %s", user_id, exc)
-                    if "Invalid `api_key` or `access_token`" in str(exc) or "Incorrect `api_key` or `access_token`" in str(exc):
-                        if token == session_token:
-                            session.pop('access_token', None)
-                            session_token = None
-                        continue
-                    if _is_transient_kite_network_error(exc):
-                        default_response.update({
-                            'access_token_present': bool(session_token or stored_token),
-                            'token_valid': False,
-                            'message': 'Zerodha API temporarily unreachable. Your login is still valid; market data may resume when connectivity returns.',
-                        })
-                        return jsonify(default_response)
-                    default_response['message'] = 'Error validating Zerodha session'
-                    return jsonify(default_response), 500
-        else:
-            default_response['message'] = 'Zerodha credentials not configured'
-            return jsonify(default_response)
+                if _is_transient_kite_network_error(exc):
+                    default_response.update({
+                        'access_token_present': bool(session_token or stored_token),
+                        'token_valid': False,
+                        'message': 'Zerodha API temporarily unreachable. Your login is still valid; market data may resume when connectivity returns.',
+                    })
+                    return _revalidated_json(default_response)
+                default_response['message'] = 'Error validating Zerodha session'
+                return jsonify(default_response), 500
 
         orchestrator = _get_auto_auth_orchestrator()
         if orchestrator.get_state(user_id).get("status") in {"succeeded", "failed", "needs_manual"}:
@@ -6318,7 +6709,7 @@ def api_user_data():
         except Exception:
             pass
         # #endregion
-        return jsonify(default_response)
+        return _revalidated_json(default_response)
     except Exception as e:
         logging.error(f"Error fetching user data: {e}")
         return jsonify({
@@ -6362,7 +6753,7 @@ def api_zerodha_sync_session():
             'message': 'No Zerodha token stored yet.',
         })
     try:
-        _validate_kite_token(app_key, stored_token)
+        _validate_kite_token(app_key, stored_token, user_id)
         session['access_token'] = stored_token
         # #region agent log
         try:
@@ -6441,14 +6832,14 @@ def api_zerodha_auto_auth_schedule_activity():
         logging.error("Failed to fetch auto-auth schedule activity: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': 'Unable to fetch schedule activity'}), 500
 
-def _insert_contact_message(name: str, email: str, mobile: str, message: str, user_id: Optional[int] = None) -> None:
-    conn = get_db_connection()
+def _insert_contact_message(conn: sqlite3.Connection, name: str, email: str, mobile: str, message: str) -> None:
+    """Store a contact message, linking it to the account with that email if one exists."""
     conn.execute(
-        'INSERT INTO user_contact_messages (user_id, name, email, mobile, message) VALUES (?, ?, ?, ?, ?)',
-        (user_id, name, email, mobile, message)
+        'INSERT INTO user_contact_messages (user_id, name, email, mobile, message) '
+        'VALUES ((SELECT id FROM users WHERE email = ?), ?, ?, ?, ?)',
+        (email, name, email, mobile, message)
     )
     conn.commit()
-    conn.close()
 
 
 @app.route("/api/contact", methods=['POST'])
@@ -6464,16 +6855,15 @@ def api_contact():
 
     try:
         conn = get_db_connection()
-        user = conn.execute('SELECT * FROM users WHERE email = ?', (email,)).fetchone()
-        user_id = user['id'] if user else None
-        _insert_contact_message(name, email, mobile, message, user_id)
+        try:
+            _insert_contact_message(conn, name, email, mobile, message)
+        finally:
+            conn.close()
         send_support_email(name, email, mobile, message)
         return jsonify({'status': 'success', 'message': 'Thank you! Our team will get back to you soon.'})
     except Exception as exc:
         logging.error("Failed to process contact message: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': 'Unable to send message at the moment. Please try again later.'}), 500
-    finally:
-        conn.close()
 
 
 @app.route("/api/user/profile", methods=['GET'])
@@ -6515,7 +6905,7 @@ def api_user_credentials():
         return jsonify({'status': 'error', 'message': 'User not logged in'}), 401
 
     user_id = session['user_id']
-    conn = get_db_connection()
+    conn = get_request_db()
 
     if request.method == 'GET':
         try:
@@ -6523,7 +6913,6 @@ def api_user_credentials():
                 'SELECT app_key, app_secret, kite_user_id, kite_password, kite_totp_secret, auto_auth_configured_at, kite_developer_plan FROM users WHERE id = ?',
                 (user_id,)
             ).fetchone()
-            conn.close()
             has_credentials = bool(row and row['app_key'] and row['app_secret'])
             has_auto_auth_details = bool(
                 row and row['kite_user_id'] and row['kite_password'] and row['kite_totp_secret']
@@ -6553,7 +6942,6 @@ def api_user_credentials():
                 'kite_developer_plan': row['kite_developer_plan'] if row else None,
             })
         except Exception as exc:
-            conn.close()
             logging.error("Failed to fetch user credentials state: %s", exc, exc_info=True)
             return jsonify({'status': 'error', 'message': 'Unable to fetch credentials state'}), 500
 
@@ -6567,7 +6955,6 @@ def api_user_credentials():
 
         kite_developer_plan = (payload.get('kite_developer_plan') or '').strip().lower()
         if kite_developer_plan and kite_developer_plan not in ('connect', 'personal'):
-            conn.close()
             return jsonify({'status': 'error', 'message': 'kite_developer_plan must be connect or personal'}), 400
 
         row = conn.execute(
@@ -6596,7 +6983,6 @@ def api_user_credentials():
         if not final_plan and app_key and app_secret:
             missing_fields.append('kite_developer_plan')
         if missing_fields:
-            conn.close()
             return jsonify({
                 'status': 'error',
                 'message': 'Please provide all required API and auto-auth details.',
@@ -6617,7 +7003,7 @@ def api_user_credentials():
             )
         )
         conn.commit()
-        conn.close()
+        invalidate_cached_user(user_id)
         return jsonify({
             'status': 'success',
             'message': 'Zerodha and auto-auth details saved successfully.',
@@ -6628,12 +7014,10 @@ def api_user_credentials():
         })
     except sqlite3.IntegrityError as db_err:
         conn.rollback()
-        conn.close()
         logging.error("Database error while saving credentials: %s", db_err, exc_info=True)
         return jsonify({'status': 'error', 'message': 'Failed to save credentials. Please try again.'}), 500
     except Exception as exc:
         conn.rollback()
-        conn.close()
         logging.error("Unexpected error while saving credentials: %s", exc, exc_info=True)
         return jsonify({'status': 'error', 'message': 'Unexpected error occurred.'}), 500
 
@@ -6663,11 +7047,47 @@ def api_user_credentials_plan():
             (plan, user_id),
         )
         conn.commit()
+        invalidate_cached_user(user_id)
         return jsonify({'status': 'success', 'kite_developer_plan': plan})
     finally:
         conn.close()
 
 
+# Strategy columns whose change sends an edited strategy back to draft, in the
+# order save_strategy() assembles the submitted values.
+_STRATEGY_CONTENT_COLUMNS = (
+    'strategy_name', 'strategy_type', 'instrument', 'candle_time', 'start_time',
+    'end_time', 'stop_loss', 'target_profit', 'total_lot', 'trailing_stop_loss', 'segment',
+    'trade_type', 'strike_price', 'expiry_type', 'ema_period', 'indicators',
+    'entry_rules', 'exit_rules', 'blueprint',
+)
+_INSERT_STRATEGY_SQL = (
+    'INSERT INTO strategies (user_id, visibility, approval_status, '
+    + ', '.join(_STRATEGY_CONTENT_COLUMNS)
+    + ") VALUES (:user_id, :visibility, 'draft', "
+    + ', '.join(f':{column}' for column in _STRATEGY_CONTENT_COLUMNS)
+    + ')'
+)
+# Any content edit sends the strategy back to draft.
+_UPDATE_STRATEGY_SQL = (
+    'UPDATE strategies SET '
+    + ', '.join(f'{column} = :{column}' for column in _STRATEGY_CONTENT_COLUMNS)
+    + ", visibility = :visibility, approval_status = 'draft', updated_at = CURRENT_TIMESTAMP"
+    + ' WHERE id = :id AND user_id = :user_id'
+)
+
+
+def _norm_strategy_value(val):
+    return val.strip() if isinstance(val, str) else val
+
+
+# Only what the no-op / visibility-only comparison reads, not the whole row.
+_SELECT_STRATEGY_FOR_SAVE_SQL = (
+    'SELECT visibility, ' + ', '.join(_STRATEGY_CONTENT_COLUMNS)
+    + ' FROM strategies WHERE id = ? AND user_id = ?'
+)
+
+
 @app.route("/strategy/save", methods=['POST'])
 @app.route("/api/strategy/save", methods=['POST'])
 def save_strategy():
@@ -6705,11 +7125,9 @@ def save_strategy():
         visibility = data.get('visibility')
         blueprint = data.get('blueprint')
         # Enhanced strategy data (stored as JSON strings)
-        indicators = data.get('indicators', [])
-        entry_rules = data.get('entry_rules', [])
-        exit_rules = data.get('exit_rules', [])
-        
-        import json
+        indicators = data.get('indicators')
+        entry_rules = data.get('entry_rules')
+        exit_rules = data.get('exit_rules')
         indicators_json = json.dumps(indicators) if indicators else None
         entry_rules_json = json.dumps(entry_rules) if entry_rules else None
         exit_rules_json = json.dumps(exit_rules) if exit_rules else None
@@ -6732,34 +7150,21 @@ def save_strategy():
         ema_period = request.form.get('ema-period')
         visibility = request.form.get('visibility')
         blueprint = request.form.get('blueprint')
+        # Form posts carry these already serialised; store them as-is once they parse
+        indicators_json = request.form.get('indicators') or None
+        entry_rules_json = request.form.get('entry_rules') or None
+        exit_rules_json = request.form.get('exit_rules') or None
+        for field, raw in (('indicators', indicators_json), ('entry_rules', entry_rules_json),
+                           ('exit_rules', exit_rules_json)):
+            if raw is None:
+                continue
+            try:
+                json.loads(raw)
+            except ValueError:
+                return jsonify({'status': 'error', 'message': f'{field} must be valid JSON'}), 400
 
-    conn = get_db_connection()
+    conn = get_request_db()
     try:
-        import json
-        
-        # Prepare JSON data
-        indicators_json = None
-        entry_rules_json = None
-        exit_rules_json = None
-        
-        if request.is_json:
-            indicators = data.get('indicators', [])
-            entry_rules = data.get('entry_rules', [])
-            exit_rules = data.get('exit_rules', [])
-            indicators_json = json.dumps(indicators) if indicators else None
-            entry_rules_json = json.dumps(entry_rules) if entry_rules else None
-            exit_rules_json = json.dumps(exit_rules) if exit_rules else None
-        else:
-            indicators_raw = request.form.get('indicators')
-            entry_rules_raw = request.form.get('entry_rules')
-            exit_rules_raw = request.form.get('exit_rules')
-            if indicators_raw:
-                indicators_json = indicators_raw
-            if entry_rules_raw:
-                entry_rules_json = entry_rules_raw
-            if exit_rules_raw:
-                exit_rules_json = exit_rules_raw
-
         visibility_value = (visibility or 'private').strip().lower()
         if visibility_value not in ('private', 'public'):
             visibility_value = 'private'
@@ -6772,7 +7177,6 @@ def save_strategy():
         
         # Validate required fields
         if not strategy_name_input or not strategy_name_input.strip():
-            conn.close()
             return jsonify({'status': 'error', 'message': 'Strategy name is required'}), 400
         
         if not strategy_type:
@@ -6783,104 +7187,108 @@ def save_strategy():
         
         if not segment:
             segment = 'Option'
+
+        params = {
+            'user_id': user_id,
+            'visibility': visibility_value,
+            'strategy_name': strategy_name_input,
+            'strategy_type': strategy_type,
+            'instrument': instrument,
+            'candle_time': candle_time,
+            'start_time': execution_start,
+            'end_time': execution_end,
+            'stop_loss': stop_loss,
+            'target_profit': target_profit,
+            'total_lot': total_lot,
+            'trailing_stop_loss': trailing_stop_loss,
+            'segment': segment,
+            'trade_type': trade_type,
+            'strike_price': strike_price,
+            'expiry_type': expiry_type,
+            'ema_period': ema_period,
+            'indicators': indicators_json,
+            'entry_rules': entry_rules_json,
+            'exit_rules': exit_rules_json,
+            'blueprint': blueprint_text,
+        }
         
         if strategy_id:
             # Check if strategy exists and belongs to user
             try:
-                existing = conn.execute('SELECT * FROM strategies WHERE id = ? AND user_id = ?', 
-                                       (strategy_id, user_id)).fetchone()
+                existing = conn.execute(_SELECT_STRATEGY_FOR_SAVE_SQL, (strategy_id, user_id)).fetchone()
                 if not existing:
-                    conn.close()
                     logging.error(f"Strategy {strategy_id} not found for user {user_id}")
                     return jsonify({'status': 'error', 'message': 'Strategy not found or access denied'}), 404
             except Exception as e:
-                conn.close()
                 logging.error(f"Error checking strategy {strategy_id}: {e}")
                 return jsonify({'status': 'error', 'message': f'Error validating strategy: {str(e)}'}), 500
             
             # Allow editing for any status, but reset approval status to draft when edited
             # Convert Row to dict for safe access
             existing_dict = dict(existing) if existing else {}
-            current_status = existing_dict.get('approval_status') or 'draft'
             # Determine if only visibility has changed (keep approval status if approved)
-            def _norm(val):
-                if val is None:
-                    return None
-                return str(val).strip() if isinstance(val, str) else val
             only_visibility_change = (
-                _norm(existing_dict.get('strategy_name')) == _norm(strategy_name_input) and
-                _norm(existing_dict.get('strategy_type')) == _norm(strategy_type) and
-                _norm(existing_dict.get('instrument')) == _norm(instrument) and
-                _norm(existing_dict.get('candle_time')) == _norm(candle_time) and
-                _norm(existing_dict.get('start_time')) == _norm(execution_start) and
-                _norm(existing_dict.get('end_time')) == _norm(execution_end) and
-                _norm(existing_dict.get('stop_loss')) == _norm(stop_loss) and
-                _norm(existing_dict.get('target_profit')) == _norm(target_profit) and
-                _norm(existing_dict.get('total_lot')) == _norm(total_lot) and
-                _norm(existing_dict.get('trailing_stop_loss')) == _norm(trailing_stop_loss) and
-                _norm(existing_dict.get('segment')) == _norm(segment) and
-                _norm(existing_dict.get('trade_type')) == _norm(trade_type) and
-                _norm(existing_dict.get('strike_price')) == _norm(strike_price) and
-                _norm(existing_dict.get('expiry_type')) == _norm(expiry_type) and
-                _norm(existing_dict.get('ema_period')) == _norm(ema_period) and
-                _norm(existing_dict.get('indicators')) == _norm(indicators_json) and
-                _norm(existing_dict.get('entry_rules')) == _norm(entry_rules_json) and
-                _norm(existing_dict.get('exit_rules')) == _norm(exit_rules_json) and
-                _norm(existing_dict.get('blueprint')) == _norm(blueprint_text)
-            )
-            # When a strategy is edited, reset to draft unless only visibility changed on an approved strategy
-            new_status = current_status
-            if not only_visibility_change:
-                new_status = 'draft'
-            conn.execute(
-                '''UPDATE strategies SET strategy_name = ?, strategy_type = ?, instrument = ?, candle_time = ?, 
-                   start_time = ?, end_time = ?, stop_loss = ?, target_profit = ?, total_lot = ?, 
-                   trailing_stop_loss = ?, segment = ?, trade_type = ?, strike_price = ?, expiry_type = ?, 
-                   ema_period = ?, visibility = ?, indicators = ?, entry_rules = ?, exit_rules = ?, blueprint = ?, 
-                   approval_status = ?, updated_at = CURRENT_TIMESTAMP 
-                   WHERE id = ? AND user_id = ?''',
-                (strategy_name_input, strategy_type, instrument, candle_time, execution_start, execution_end, 
-                 stop_loss, target_profit, total_lot, trailing_stop_loss, segment, trade_type, strike_price, 
-                 expiry_type, ema_period, visibility_value, indicators_json, entry_rules_json, exit_rules_json, 
-                 blueprint_text, new_status, strategy_id, user_id)
+                tuple(map(_norm_strategy_value, map(existing_dict.get, _STRATEGY_CONTENT_COLUMNS)))
+                == tuple(map(_norm_strategy_value, map(params.__getitem__, _STRATEGY_CONTENT_COLUMNS)))
             )
+            if only_visibility_change:
+                # Autosave resubmits unchanged forms; skip the write (and the WAL
+                # fsync) for true no-ops and touch one column for visibility flips.
+                if _norm_strategy_value(existing_dict.get('visibility')) == visibility_value:
+                    return jsonify({'status': 'success', 'message': 'No changes'})
+                conn.execute(
+                    'UPDATE strategies SET visibility = ?, updated_at = CURRENT_TIMESTAMP WHERE id = ? AND user_id = ?',
+                    (visibility_value, strategy_id, user_id),
+                )
+                conn.commit()
+                invalidate_running_strategies_json(user_id)
+                return jsonify({'status': 'success', 'message': 'Strategy updated successfully!'})
+            conn.execute(_UPDATE_STRATEGY_SQL, {**params, 'id': strategy_id})
             message = 'Strategy updated successfully!'
         else:
             # Insert new strategy
-            conn.execute(
-                '''INSERT INTO strategies (user_id, strategy_name, strategy_type, instrument, candle_time, start_time, 
-                   end_time, stop_loss, target_profit, total_lot, trailing_stop_loss, segment, trade_type, 
-                   strike_price, expiry_type, ema_period, visibility, indicators, entry_rules, exit_rules, blueprint, approval_status) 
-                   VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, 'draft')''',
-                (user_id, strategy_name_input, strategy_type, instrument, candle_time, execution_start, 
-                 execution_end, stop_loss, target_profit, total_lot, trailing_stop_loss, segment, trade_type, 
-                 strike_price, expiry_type, ema_period, visibility_value, indicators_json, entry_rules_json, 
-                 exit_rules_json, blueprint_text)
-            )
+            conn.execute(_INSERT_STRATEGY_SQL, params)
             message = 'Strategy saved successfully!'
         conn.commit()
+        invalidate_running_strategies_json(user_id)
         return jsonify({'status': 'success', 'message': message})
     except Exception as e:
         conn.rollback()
         logging.error(f"Error saving strategy: {e}", exc_info=True)
         return jsonify({'status': 'error', 'message': f'Error saving strategy: {str(e)}'}), 500
-    finally:
-        conn.close()
 
 @app.route("/strategy/edit/<int:strategy_id>", methods=['GET'])
 def edit_strategy(strategy_id):
     if 'user_id' not in session:
         return jsonify({'status': 'error', 'message': 'User not logged in'}), 401
 
-    conn = get_db_connection()
+    conn = get_request_db()
     strategy = conn.execute('SELECT * FROM strategies WHERE id = ? AND user_id = ?', (strategy_id, session['user_id'])).fetchone()
-    conn.close()
 
     if strategy:
         return jsonify({'status': 'success', 'strategy': dict(strategy)})
     else:
         return jsonify({'status': 'error', 'message': 'Strategy not found'}), 404
 
+def _strategy_guard_miss(conn: sqlite3.Connection, strategy_id: int, user_id: int, status_message: str):
+    """Explain why a guarded strategy UPDATE/DELETE matched no row: 404, 403 or 400.
+
+    status_message is formatted with the current approval status.
+    """
+    strategy = conn.execute(
+        'SELECT approval_status, user_id FROM strategies WHERE id = ?',
+        (strategy_id,)
+    ).fetchone()
+    if not strategy:
+        return jsonify({'status': 'error', 'message': 'Strategy not found'}), 404
+    if strategy['user_id'] != user_id:
+        return jsonify({'status': 'error', 'message': 'Access denied'}), 403
+    return jsonify({
+        'status': 'error',
+        'message': status_message.format(status=strategy['approval_status'] or 'draft')
+    }), 400
+
+
 @app.route("/api/strategy/<int:strategy_id>/submit-for-approval", methods=['POST'])
 def submit_strategy_for_approval(strategy_id):
     """Submit strategy for admin approval"""
@@ -6888,77 +7296,47 @@ def submit_strategy_for_approval(strategy_id):
         return jsonify({'status': 'error', 'message': 'User not logged in'}), 401
     
     user_id = session['user_id']
-    conn = get_db_connection()
-    try:
-        strategy = conn.execute(
-            'SELECT id, approval_status, user_id FROM strategies WHERE id = ?', 
-            (strategy_id,)
-        ).fetchone()
-        
-        if not strategy:
-            return jsonify({'status': 'error', 'message': 'Strategy not found'}), 404
-        
-        if strategy['user_id'] != user_id:
-            return jsonify({'status': 'error', 'message': 'Access denied'}), 403
-        
-        current_status = strategy['approval_status'] or 'draft'
-        if current_status != 'draft':
-            return jsonify({
-                'status': 'error', 
-                'message': f'Strategy must be in draft status. Current status: {current_status}'
-            }), 400
-        
-        conn.execute(
-            '''UPDATE strategies SET approval_status = 'pending', 
-               submitted_for_approval_at = CURRENT_TIMESTAMP 
-               WHERE id = ?''',
-            (strategy_id,)
+    conn = get_request_db()
+    cursor = conn.execute(
+        '''UPDATE strategies SET approval_status = 'pending', 
+           submitted_for_approval_at = CURRENT_TIMESTAMP 
+           WHERE COALESCE(approval_status, 'draft') = 'draft' AND id = ? AND user_id = ?''',
+        (strategy_id, user_id)
+    )
+    conn.commit()
+    if cursor.rowcount == 0:
+        return _strategy_guard_miss(
+            conn, strategy_id, user_id,
+            'Strategy must be in draft status. Current status: {status}',
         )
-        conn.commit()
-        return jsonify({'status': 'success', 'message': 'Strategy submitted for approval'}), 200
-    finally:
-        conn.close()
+    invalidate_running_strategies_json(user_id)
+    return jsonify({'status': 'success', 'message': 'Strategy submitted for approval'}), 200
 
 @app.route("/api/strategy/<int:strategy_id>/revoke-approval", methods=['POST'])
 def revoke_strategy_approval(strategy_id):
-    """Revoke strategy from approval (back to draft) - works for both pending and approved"""
-    if 'user_id' not in session:
-        return jsonify({'status': 'error', 'message': 'User not logged in'}), 401
-    
-    user_id = session['user_id']
-    conn = get_db_connection()
-    try:
-        strategy = conn.execute(
-            'SELECT id, approval_status, user_id FROM strategies WHERE id = ?', 
-            (strategy_id,)
-        ).fetchone()
-        
-        if not strategy:
-            return jsonify({'status': 'error', 'message': 'Strategy not found'}), 404
-        
-        if strategy['user_id'] != user_id:
-            return jsonify({'status': 'error', 'message': 'Access denied'}), 403
-        
-        current_status = strategy['approval_status'] or 'draft'
-        if current_status not in ('pending', 'approved'):
-            return jsonify({
-                'status': 'error', 
-                'message': f'Can only revoke pending or approved strategies. Current status: {current_status}'
-            }), 400
-        
-        # Reset to draft and clear approval-related fields
-        conn.execute(
-            '''UPDATE strategies SET approval_status = 'draft', 
-               submitted_for_approval_at = NULL,
-               approved_at = NULL, approved_by = NULL,
-               rejected_at = NULL, rejected_by = NULL, rejection_reason = NULL
-               WHERE id = ?''',
-            (strategy_id,)
+    """Revoke strategy from approval (back to draft) - works for both pending and approved"""
+    if 'user_id' not in session:
+        return jsonify({'status': 'error', 'message': 'User not logged in'}), 401
+    
+    user_id = session['user_id']
+    conn = get_request_db()
+    # Reset to draft and clear approval-related fields
+    cursor = conn.execute(
+        '''UPDATE strategies SET approval_status = 'draft', 
+           submitted_for_approval_at = NULL,
+           approved_at = NULL, approved_by = NULL,
+           rejected_at = NULL, rejected_by = NULL, rejection_reason = NULL
+           WHERE id = ? AND user_id = ? AND approval_status IN ('pending', 'approved')''',
+        (strategy_id, user_id)
+    )
+    conn.commit()
+    if cursor.rowcount == 0:
+        return _strategy_guard_miss(
+            conn, strategy_id, user_id,
+            'Can only revoke pending or approved strategies. Current status: {status}',
         )
-        conn.commit()
-        return jsonify({'status': 'success', 'message': 'Strategy approval revoked and reset to draft'}), 200
-    finally:
-        conn.close()
+    invalidate_running_strategies_json(user_id)
+    return jsonify({'status': 'success', 'message': 'Strategy approval revoked and reset to draft'}), 200
 
 @app.route("/api/strategy/<int:strategy_id>/resubmit", methods=['POST'])
 def resubmit_strategy(strategy_id):
@@ -6967,37 +7345,22 @@ def resubmit_strategy(strategy_id):
         return jsonify({'status': 'error', 'message': 'User not logged in'}), 401
     
     user_id = session['user_id']
-    conn = get_db_connection()
-    try:
-        strategy = conn.execute(
-            'SELECT id, approval_status, user_id FROM strategies WHERE id = ?', 
-            (strategy_id,)
-        ).fetchone()
-        
-        if not strategy:
-            return jsonify({'status': 'error', 'message': 'Strategy not found'}), 404
-        
-        if strategy['user_id'] != user_id:
-            return jsonify({'status': 'error', 'message': 'Access denied'}), 403
-        
-        current_status = strategy['approval_status'] or 'draft'
-        if current_status != 'rejected':
-            return jsonify({
-                'status': 'error', 
-                'message': f'Can only resubmit rejected strategies. Current status: {current_status}'
-            }), 400
-        
-        conn.execute(
-            '''UPDATE strategies SET approval_status = 'pending', 
-               submitted_for_approval_at = CURRENT_TIMESTAMP,
-               rejected_at = NULL, rejected_by = NULL, rejection_reason = NULL
-               WHERE id = ?''',
-            (strategy_id,)
+    conn = get_request_db()
+    cursor = conn.execute(
+        '''UPDATE strategies SET approval_status = 'pending', 
+           submitted_for_approval_at = CURRENT_TIMESTAMP,
+           rejected_at = NULL, rejected_by = NULL, rejection_reason = NULL
+           WHERE approval_status = 'rejected' AND id = ? AND user_id = ?''',
+        (strategy_id, user_id)
+    )
+    conn.commit()
+    if cursor.rowcount == 0:
+        return _strategy_guard_miss(
+            conn, strategy_id, user_id,
+            'Can only resubmit rejected strategies. Current status: {status}',
         )
-        conn.commit()
-        return jsonify({'status': 'success', 'message': 'Strategy resubmitted for approval'}), 200
-    finally:
-        conn.close()
+    invalidate_running_strategies_json(user_id)
+    return jsonify({'status': 'success', 'message': 'Strategy resubmitted for approval'}), 200
 
 @app.route("/strategy/delete/<int:strategy_id>", methods=['POST'])
 @app.route("/api/strategy/delete/<int:strategy_id>", methods=['POST'])
@@ -7006,46 +7369,31 @@ def delete_strategy(strategy_id):
         return jsonify({'status': 'error', 'message': 'User not logged in'}), 401
 
     # If strategy is running, stop it first
-    unique_run_id_to_del = None
-    for unique_run_id, running_strat_info in running_strategies.items():
-        if running_strat_info.get('db_id') == strategy_id:
-            unique_run_id_to_del = unique_run_id
-            break
-    
+    unique_run_id_to_del = running_strategies.run_id_for(strategy_id)
     if unique_run_id_to_del:
-        del running_strategies[unique_run_id_to_del]
+        running_strategies.pop(unique_run_id_to_del, None)
 
-    conn = get_db_connection()
+    user_id = session['user_id']
+    conn = get_request_db()
     try:
-        # Check strategy exists and belongs to user
-        strategy = conn.execute(
-            'SELECT id, approval_status, user_id FROM strategies WHERE id = ?', 
-            (strategy_id,)
-        ).fetchone()
-        
-        if not strategy:
-            return jsonify({'status': 'error', 'message': 'Strategy not found'}), 404
-        
-        if strategy['user_id'] != session['user_id']:
-            return jsonify({'status': 'error', 'message': 'Access denied'}), 403
-        
         # Only allow deletion if status is draft or rejected
-        approval_status = strategy['approval_status'] or 'draft'
-        if approval_status not in ('draft', 'rejected'):
-            return jsonify({
-                'status': 'error', 
-                'message': f'Cannot delete strategy with status: {approval_status}. Please revoke approval first.'
-            }), 400
-        
-        conn.execute('DELETE FROM strategies WHERE id = ? AND user_id = ?', (strategy_id, session['user_id']))
+        cursor = conn.execute(
+            '''DELETE FROM strategies WHERE id = ? AND user_id = ?
+               AND COALESCE(approval_status, 'draft') IN ('draft', 'rejected')''',
+            (strategy_id, user_id)
+        )
         conn.commit()
+        if cursor.rowcount == 0:
+            return _strategy_guard_miss(
+                conn, strategy_id, user_id,
+                'Cannot delete strategy with status: {status}. Please revoke approval first.',
+            )
+        invalidate_running_strategies_json(user_id)
         return jsonify({'status': 'success', 'message': 'Strategy deleted successfully!'})
     except Exception as e:
         conn.rollback()
         logging.error(f"Error deleting strategy: {e}", exc_info=True)
         return jsonify({'status': 'error', 'message': f'Error deleting strategy: {e}'}), 500
-    finally:
-        conn.close()
 
 @app.route("/api/subscription/status", methods=['GET'])
 def api_subscription_status():
@@ -7104,13 +7452,42 @@ def api_check_deployment_access():
         logging.error(f"Error checking deployment access: {e}", exc_info=True)
         return jsonify({'status': 'error', 'message': 'Failed to check subscription status'}), 500
 
-@app.route("/strategy/deploy/<int:strategy_id>", methods=['POST', 'OPTIONS'])
-@app.route("/api/strategy/deploy/<int:strategy_id>", methods=['POST', 'OPTIONS'])
+# Fields deploy_strategy() reads: the status guards plus the strategy_class(...) arguments.
+STRATEGY_DEPLOY_COLS = (
+    'approval_status', 'status', 'strategy_type', 'strategy_name', 'instrument', 'candle_time',
+    'start_time', 'end_time', 'stop_loss', 'target_profit', 'total_lot', 'trailing_stop_loss',
+    'segment', 'trade_type', 'strike_price', 'expiry_type',
+)
+_SELECT_STRATEGY_FOR_DEPLOY_SQL = (
+    'SELECT ' + ', '.join(STRATEGY_DEPLOY_COLS) + ' FROM strategies WHERE id = ? AND user_id = ?'
+)
+
+
+# A failed deploy marks the strategy 'error' off the request thread so the
+# error response is not held behind a SQLite write (which may itself be what
+# failed); one worker keeps these writes ordered.
+_strategy_status_executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="strategy-status")
+
+
+def _mark_strategy_error(strategy_id: int, user_id: int, expected_status: str) -> None:
+    """Set status 'error' unless the row moved on from ``expected_status`` (e.g. a redeploy)."""
+    conn = get_db_connection()
+    try:
+        conn.execute(
+            'UPDATE strategies SET status = ? WHERE id = ? AND status = ?',
+            ('error', strategy_id, expected_status),
+        )
+        conn.commit()
+    except Exception:
+        logging.exception("Failed to mark strategy %s as error", strategy_id)
+    finally:
+        conn.close()
+    invalidate_running_strategies_json(user_id)
+
+
+@app.route("/strategy/deploy/<int:strategy_id>", methods=['POST'])
+@app.route("/api/strategy/deploy/<int:strategy_id>", methods=['POST'])
 def deploy_strategy(strategy_id):
-    # Handle CORS preflight
-    if request.method == 'OPTIONS':
-        return jsonify({'status': 'ok'}), 200
-    
     if 'user_id' not in session:
         return jsonify({'status': 'error', 'message': 'User not logged in'}), 401
     
@@ -7133,15 +7510,14 @@ def deploy_strategy(strategy_id):
         logging.error(f"Error checking subscription for deployment: {e}", exc_info=True)
         # Don't block deployment if subscription check fails, but log it
 
-    conn = get_db_connection()
-    strategy_data = conn.execute('SELECT * FROM strategies WHERE id = ? AND user_id = ?', (strategy_id, session['user_id'])).fetchone()
-    conn.close()
+    conn = get_request_db()
+    strategy_data = conn.execute(_SELECT_STRATEGY_FOR_DEPLOY_SQL, (strategy_id, session['user_id'])).fetchone()
 
     if not strategy_data:
         return jsonify({'status': 'error', 'message': 'Strategy not found'}), 404
     
     # Check if strategy is approved
-    approval_status = strategy_data.get('approval_status') if strategy_data else None
+    approval_status = strategy_data['approval_status']
     if approval_status != 'approved':
         return jsonify({
             'status': 'error', 
@@ -7164,13 +7540,14 @@ def deploy_strategy(strategy_id):
 
     # Check if strategy is already running
     # Remove from running_strategies if it exists but is not actually running
-    for unique_run_id, running_strat_info in list(running_strategies.items()):
-        if running_strat_info['db_id'] == strategy_id:
+    for unique_run_id in running_strategies.run_ids_for(strategy_id):
+        running_strat_info = running_strategies.get(unique_run_id)
+        if running_strat_info is not None:
             if running_strat_info['status'] == 'running' and strategy_data['status'] not in ['sq_off', 'paused']:
                 return jsonify({'status': 'error', 'message': 'Strategy is already running'}), 400
             else:
                 # Remove stale entries (paused, error, etc.) to allow redeployment
-                del running_strategies[unique_run_id]
+                running_strategies.pop(unique_run_id, None)
                 logging.info(f"Removed stale strategy entry {unique_run_id} for strategy {strategy_id} before redeployment")
 
     # Access sqlite3.Row fields directly (they support dict-like access)
@@ -7195,6 +7572,9 @@ def deploy_strategy(strategy_id):
         logging.error(f"Strategy {strategy_id} has no strategy_type")
         return jsonify({'status': 'error', 'message': 'Strategy type not found. Please edit and save the strategy first.'}), 400
 
+    # Status the row holds while this deploy runs; a failure only marks the
+    # strategy errored if no other request has changed it since.
+    deploy_status = current_status
     try:
         strategy_class = None
         if strategy_type == 'orb':
@@ -7238,21 +7618,16 @@ def deploy_strategy(strategy_id):
         }
 
         # Update status in DB
-        conn = get_db_connection()
+        conn = get_request_db()
         conn.execute('UPDATE strategies SET status = ? WHERE id = ?', ('running', strategy_id))
         conn.commit()
-        conn.close()
+        deploy_status = 'running'
+        invalidate_running_strategies_json(session['user_id'])
 
         return jsonify({'status': 'success', 'message': 'Strategy deployed successfully!'})
     except Exception as e:
         logging.error(f"Error deploying strategy {strategy_id}: {e}", exc_info=True)
-        try:
-            conn = get_db_connection()
-            conn.execute('UPDATE strategies SET status = ? WHERE id = ?', ('error', strategy_id))
-            conn.commit()
-            conn.close()
-        except:
-            pass
+        _strategy_status_executor.submit(_mark_strategy_error, strategy_id, session['user_id'], deploy_status)
         return jsonify({'status': 'error', 'message': f'Error deploying strategy: {str(e)}'}), 500
 
 @app.route("/strategy/pause/<int:strategy_id>", methods=['POST'])
@@ -7263,8 +7638,9 @@ def pause_strategy(strategy_id):
 
     # Find the running strategy by its db_id
     strategy_found_in_memory = False
-    for unique_run_id, running_strat_info in running_strategies.items():
-        if running_strat_info['db_id'] == strategy_id:
+    for unique_run_id in running_strategies.run_ids_for(strategy_id):
+        running_strat_info = running_strategies.get(unique_run_id)
+        if running_strat_info is not None:
             strategy_found_in_memory = True
             # Here you would implement logic to actually pause the strategy
             # For now, we just change its in-memory status
@@ -7272,7 +7648,7 @@ def pause_strategy(strategy_id):
             break
     
     # Update status in DB regardless of whether it's in memory or not
-    conn = get_db_connection()
+    conn = get_request_db()
     try:
         # Check if strategy exists and belongs to user
         strategy_row = conn.execute(
@@ -7281,14 +7657,12 @@ def pause_strategy(strategy_id):
         ).fetchone()
         
         if strategy_row is None:
-            conn.close()
             return jsonify({'status': 'error', 'message': 'Strategy not found'}), 404
         
         current_status = strategy_row['status']
         
         # Only allow pause if strategy is currently running
         if current_status != 'running':
-            conn.close()
             return jsonify({
                 'status': 'error', 
                 'message': f'Strategy is not running. Current status: {current_status}'
@@ -7297,10 +7671,10 @@ def pause_strategy(strategy_id):
         # Update status in DB to paused
         conn.execute('UPDATE strategies SET status = ? WHERE id = ?', ('paused', strategy_id))
         conn.commit()
-        conn.close()
+        invalidate_running_strategies_json(session['user_id'])
         return jsonify({'status': 'success', 'message': 'Strategy paused successfully!'})
     except Exception as e:
-        conn.close()
+        conn.rollback()
         logging.error(f"Error pausing strategy {strategy_id}: {e}", exc_info=True)
         return jsonify({'status': 'error', 'message': f'Error pausing strategy: {str(e)}'}), 500
 
@@ -7311,20 +7685,15 @@ def squareoff_strategy(strategy_id):
         return jsonify({'status': 'error', 'message': 'User not logged in'}), 401
 
     # Find the running strategy by its db_id in the in-memory dict and remove it
-    unique_run_id_to_del = None
-    for unique_run_id, running_strat_info in running_strategies.items():
-        if running_strat_info['db_id'] == strategy_id:
-            unique_run_id_to_del = unique_run_id
-            break
-    
+    unique_run_id_to_del = running_strategies.run_id_for(strategy_id)
     if unique_run_id_to_del:
-        del running_strategies[unique_run_id_to_del]
+        running_strategies.pop(unique_run_id_to_del, None)
 
     # Update status in DB
-    conn = get_db_connection()
+    conn = get_request_db()
     conn.execute('UPDATE strategies SET status = ? WHERE id = ?', ('sq_off', strategy_id))
     conn.commit()
-    conn.close()
+    invalidate_running_strategies_json(session['user_id'])
     return jsonify({'status': 'success', 'message': 'Strategy squared off successfully!'})
 
 @app.route("/strategies")
@@ -7339,46 +7708,49 @@ def get_strategies():
         }
     return jsonify(strategies)
 
+
+_LIST_STRATEGIES_SELECT = '''
+    SELECT 
+        s.*,
+        CASE WHEN s.user_id = ? THEN 1 ELSE 0 END AS can_edit
+    FROM strategies s
+    WHERE (s.user_id = ? OR s.visibility = 'public')
+'''
+_LIST_STRATEGIES_ORDER = " ORDER BY can_edit DESC, datetime(s.updated_at) DESC"
+_LIST_STRATEGIES_SQL = _LIST_STRATEGIES_SELECT + _LIST_STRATEGIES_ORDER
+_LIST_APPROVED_STRATEGIES_SQL = (
+    _LIST_STRATEGIES_SELECT
+    + " AND (s.approval_status = 'approved' OR s.approval_status IS NULL)"
+    + _LIST_STRATEGIES_ORDER
+)
+_LIST_STRATEGIES_BY_APPROVAL_SQL = (
+    _LIST_STRATEGIES_SELECT + " AND s.approval_status = ?" + _LIST_STRATEGIES_ORDER
+)
+
+
 @app.route("/api/strategies")
 def api_get_strategies():
     if 'user_id' not in session:
         return jsonify({'status': 'error', 'message': 'User not logged in'}), 401
 
-    conn = get_db_connection()
+    conn = get_request_db()
     user_id = session['user_id']
     
     # Get filter parameter
     approval_filter = request.args.get('approval_status')
     only_approved = request.args.get('only_approved', 'false').lower() == 'true'
     
-    # Build query
-    query = '''
-        SELECT 
-            s.*,
-            CASE WHEN s.user_id = ? THEN 1 ELSE 0 END AS can_edit
-        FROM strategies s
-        WHERE (s.user_id = ? OR s.visibility = 'public')
-    '''
-    params = [user_id, user_id]
-    
-    # Add approval status filter
+    # Pick one of the fixed query texts so each stays in sqlite3's statement cache
     if only_approved:
-        query += " AND (s.approval_status = 'approved' OR s.approval_status IS NULL)"
+        cursor = conn.execute(_LIST_APPROVED_STRATEGIES_SQL, (user_id, user_id))
     elif approval_filter:
-        query += " AND s.approval_status = ?"
-        params.append(approval_filter)
-    
-    query += " ORDER BY can_edit DESC, datetime(s.updated_at) DESC"
-    
-    strategies = conn.execute(query, params).fetchall()
-    conn.close()
+        cursor = conn.execute(_LIST_STRATEGIES_BY_APPROVAL_SQL, (user_id, user_id, approval_filter))
+    else:
+        cursor = conn.execute(_LIST_STRATEGIES_SQL, (user_id, user_id))
 
-    # Convert Row objects to dictionaries for JSON serialization
-    strategies_list = []
-    for row in strategies:
-        strategy_dict = dict(row)
-        strategy_dict['can_edit'] = bool(strategy_dict.get('can_edit', 0))
-        strategies_list.append(strategy_dict)
+    strategies_list = _fetch_dicts(cursor)
+    for strategy_dict in strategies_list:
+        strategy_dict['can_edit'] = bool(strategy_dict['can_edit'])
 
     return jsonify({'status': 'success', 'strategies': strategies_list})
 
@@ -7451,36 +7823,186 @@ def api_ai_strategy_chat_save():
     })
 
 
+# Serialized /api/running-strategies bodies per user. Every route that writes a
+# user's strategies rows (save, delete, deploy, pause, square-off, approval
+# changes) or starts/stops their paper or live trading invalidates that user's
+# entry; the TTL only bounds staleness for writes made outside these routes.
+RUNNING_STRATEGIES_JSON_TTL_SECONDS = 10
+_running_strategies_json: Dict[int, Tuple[float, bytes]] = {}
+_running_strategies_json_lock = Lock()
+
+
+def invalidate_running_strategies_json(user_id: Optional[int]) -> None:
+    with _running_strategies_json_lock:
+        _running_strategies_json.pop(user_id, None)
+
+
 @app.route("/api/running-strategies")
 def api_get_running_strategies():
     """Get currently running strategies"""
     if 'user_id' not in session:
         return jsonify({'status': 'error', 'message': 'User not logged in'}), 401
 
+    user_id = session['user_id']
+    now = time.monotonic()
+    with _running_strategies_json_lock:
+        cached = _running_strategies_json.get(user_id)
+    if cached and cached[0] > now:
+        return Response(cached[1], mimetype='application/json')
+
     # Get running strategies from database
-    conn = get_db_connection()
-    running_strategies = conn.execute(
+    strategies_list = _fetch_dicts(get_request_db().execute(
         'SELECT * FROM strategies WHERE user_id = ? AND status = ?', 
-        (session['user_id'], 'running')
-    ).fetchall()
-    conn.close()
-
-    # Convert to list of dictionaries
-    strategies_list = [dict(s) for s in running_strategies]
-    return jsonify({'status': 'success', 'strategies': strategies_list})
+        (user_id, 'running')
+    ))
+    response = jsonify({'status': 'success', 'strategies': strategies_list})
+    with _running_strategies_json_lock:
+        _running_strategies_json[user_id] = (now + RUNNING_STRATEGIES_JSON_TTL_SECONDS, response.get_data())
+    return response
 
 @app.route("/strategy/cancel/<strategy_id>")
 def cancel_strategy(strategy_id):
     if strategy_id in running_strategies:
         del running_strategies[strategy_id]
+    invalidate_running_strategies_json(session.get('user_id'))
     return redirect("/dashboard")
 
+def _best_and_worst_pnl_days(
+    closed_trades: List[Dict[str, Any]], default_date: str
+) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """Day with the largest total gain and the day with the largest total loss.
+
+    Either side stays ``{'date': default_date, 'pnl': 0}`` when no day made a
+    gain (or a loss). Trades are summed per raw ``date`` value; only the two
+    reported days are turned into strings.
+    """
+    daily_pnl: Dict[Any, float] = {}
+    for trade in closed_trades:
+        pnl = trade.get('pnl')
+        if pnl is None:
+            continue
+        trade_date = trade.get('date')
+        daily_pnl[trade_date] = daily_pnl.get(trade_date, 0) + pnl
+
+    best_date = worst_date = None
+    best_pnl = worst_pnl = 0
+    for trade_date, pnl in daily_pnl.items():
+        if pnl > best_pnl:
+            best_date, best_pnl = trade_date, pnl
+        if pnl < worst_pnl:
+            worst_date, worst_pnl = trade_date, pnl
+
+    def _day(trade_date: Any, pnl: float) -> Dict[str, Any]:
+        if pnl == 0:
+            return {'date': default_date, 'pnl': 0}
+        date_key = trade_date.isoformat() if isinstance(trade_date, datetime.date) else str(trade_date)
+        return {'date': date_key, 'pnl': pnl}
+
+    return _day(best_date, best_pnl), _day(worst_date, worst_pnl)
+
+
+# A backtest loads the range's candles (cached days from the SQLite candle
+# cache, the rest from Kite in KITE_HISTORY_MAX_DAYS_PER_CALL windows, each call
+# waiting on the shared history rate limiter) and then replays every candle. An
+# uncached range or a busy rate limiter can still take several seconds, so
+# clients that post "async": true get a job id back immediately and poll the
+# status route instead of holding one of the few request threads. Finished jobs
+# are kept for BACKTEST_JOB_TTL_SECONDS after they finish or until their result
+# is collected.
+BACKTEST_JOB_TTL_SECONDS = 600
+_backtest_executor = ThreadPoolExecutor(max_workers=2, thread_name_prefix="backtest")
+# Marks a session key the job removed (as opposed to set to None).
+_SESSION_KEY_REMOVED = object()
+
+
+@dataclass
+class _BacktestJob:
+    user_id: int
+    future: Future
+    finished_at: Optional[float] = None
+
+
+_backtest_jobs: Dict[str, _BacktestJob] = {}
+_backtest_jobs_lock = Lock()
+
+
+def _prune_backtest_jobs_locked(now: float) -> None:
+    expired = [
+        job_id for job_id, job in _backtest_jobs.items()
+        if job.finished_at is not None and now - job.finished_at > BACKTEST_JOB_TTL_SECONDS
+    ]
+    for job_id in expired:
+        del _backtest_jobs[job_id]
+
+
+def _run_backtest_job() -> Tuple[Any, Dict[str, Any]]:
+    """Run the backtest in a copied request context.
+
+    The originating request has already saved its session, so session changes
+    made here (e.g. dropping an expired access_token) are returned alongside
+    the response and applied by the status request that collects it.
+    """
+    before = dict(session)
+    response = _run_backtest_mountain_signal()
+    after = dict(session)
+    session_changes = {
+        key: after.get(key, _SESSION_KEY_REMOVED)
+        for key in before.keys() | after.keys()
+        if before.get(key, _SESSION_KEY_REMOVED) != after.get(key, _SESSION_KEY_REMOVED)
+    }
+    return response, session_changes
+
+
 @app.route("/api/backtest_mountain_signal", methods=['POST'])
 def api_backtest_mountain_signal():
     """Backtest Mountain Signal strategy for a date range"""
     if 'user_id' not in session:
         return jsonify({'status': 'error', 'message': 'User not logged in'}), 401
 
+    # Parse the body now: the worker reuses the cached JSON after this request ends.
+    data = request.get_json(silent=True) or {}
+    if not data.get('async'):
+        return _run_backtest_mountain_signal()
+
+    job_id = uuid.uuid4().hex
+    job = _BacktestJob(session['user_id'], _backtest_executor.submit(copy_current_request_context(_run_backtest_job)))
+
+    def _mark_finished(_: Future) -> None:
+        with _backtest_jobs_lock:
+            job.finished_at = time.monotonic()
+
+    with _backtest_jobs_lock:
+        _prune_backtest_jobs_locked(time.monotonic())
+        _backtest_jobs[job_id] = job
+    job.future.add_done_callback(_mark_finished)
+    return jsonify({'status': 'accepted', 'job_id': job_id}), 202
+
+
+@app.route("/api/backtest_mountain_signal/status/<job_id>")
+def api_backtest_mountain_signal_status(job_id):
+    """Poll an async Mountain Signal backtest; returns the backtest response once finished."""
+    if 'user_id' not in session:
+        return jsonify({'status': 'error', 'message': 'User not logged in'}), 401
+
+    with _backtest_jobs_lock:
+        _prune_backtest_jobs_locked(time.monotonic())
+        job = _backtest_jobs.get(job_id)
+        if job is None or job.user_id != session['user_id']:
+            return jsonify({'status': 'error', 'message': 'Backtest job not found'}), 404
+        if not job.future.done():
+            return jsonify({'status': 'pending', 'job_id': job_id})
+        del _backtest_jobs[job_id]
+
+    response, session_changes = job.future.result()
+    for key, value in session_changes.items():
+        if value is _SESSION_KEY_REMOVED:
+            session.pop(key, None)
+        else:
+            session[key] = value
+    return response
+
+
+def _run_backtest_mountain_signal():
     try:
         data = request.get_json()
         from_date_str = data.get('from_date')
@@ -7563,32 +8085,9 @@ def api_backtest_mountain_signal():
         user_id = session['user_id']
         
         def _fetch_historical_data(kite_client):
-            all_candles = []
-            current_date = from_date
-            kite_interval = f"{candle_time}minute"
-
-            while current_date <= to_date:
-                # Skip weekends
-                if current_date.weekday() < 5:  # Monday=0, Friday=4
-                    start_dt = datetime.datetime.combine(current_date, datetime.time(9, 15))
-                    end_dt = datetime.datetime.combine(current_date, datetime.time(15, 30))
-                
-                    try:
-                        # Capture loop variables for lambda using default parameters
-                        hist = execute_with_retries(
-                            f"fetching {kite_interval} historical data for token {token} on {current_date}",
-                            lambda t=token, sd=start_dt, ed=end_dt, ki=kite_interval: kite_client.historical_data(t, sd, ed, ki)
-                        )
-                        if hist:
-                            all_candles.extend(hist)
-                    except kite_exceptions.TokenException:
-                        raise
-                    except Exception as e:
-                        logging.error(f"Error fetching historical data for {current_date}: {e}")
-                
-                current_date += datetime.timedelta(days=1)
-            
-            return all_candles
+            return _fetch_historical_candles(
+                kite_client, token, from_date, to_date, f"{candle_time}minute"
+            )
         
         try:
             all_candles = _with_valid_kite_client(
@@ -7612,26 +8111,10 @@ def api_backtest_mountain_signal():
         if not all_candles:
             return jsonify({'status': 'error', 'message': 'No historical data found for the selected date range'}), 404
 
-        # Sort candles by date
-        all_candles.sort(key=lambda x: x['date'])
-
-        # Run Mountain Signal strategy logic on historical data
-        from utils.indicators import calculate_rsi
-        import pandas as pd
-        import numpy as np
-
-        # Convert to DataFrame
-        df_data = []
-        for candle in all_candles:
-            df_data.append({
-                'date': candle['date'],
-                'open': candle['open'],
-                'high': candle['high'],
-                'low': candle['low'],
-                'close': candle['close']
-            })
-        
-        df = pd.DataFrame(df_data)
+        # Run Mountain Signal strategy logic on historical data.
+        # Convert to DataFrame (projecting the OHLC columns) and sort by date
+        df = pd.DataFrame.from_records(all_candles, columns=['date', 'open', 'high', 'low', 'close'])
+        df.sort_values('date', inplace=True, kind='stable', ignore_index=True)
         df['ema'] = df['close'].ewm(span=ema_period, adjust=False).mean()
         
         # Calculate RSI 14
@@ -7660,57 +8143,62 @@ def api_backtest_mountain_signal():
         # Store signal candle info in active trade for exit logic
         active_trade_signal_candle = None
 
+        # Plain per-column lists for scalar access in the candle loop (df.iloc[i]
+        # builds a Series per call), plus the signal conditions evaluated over
+        # the whole frame at once; rsi14 may be all None for short ranges.
+        dates = df['date'].tolist()
+        highs = df['high'].tolist()
+        lows = df['low'].tolist()
+        closes = df['close'].tolist()
+        emas = df['ema'].tolist()
+        square_off_mask = _square_off_window_mask(df['date'])
+        rsi_values = df['rsi14'].to_numpy(dtype=float)
+        pe_signal_mask = ((df['low'].to_numpy() > df['ema'].to_numpy()) & (rsi_values > rsi_threshold)).tolist()
+        ce_signal_mask = ((df['high'].to_numpy() < df['ema'].to_numpy()) & (rsi_values < 30)).tolist()
+
         # Process each candle
         for i in range(1, len(df)):
-            current_candle = df.iloc[i]
-            previous_candle = df.iloc[i-1]
-            current_ema = current_candle['ema']
-            previous_ema = previous_candle['ema']
-            previous_rsi = df.iloc[i-1]['rsi14'] if 'rsi14' in df.columns else None
-
             # Signal Identification (using previous candle)
             # PE Signal: LOW > 5 EMA AND RSI exceeds threshold
-            if previous_candle['low'] > previous_ema:
-                if previous_rsi is not None and previous_rsi > rsi_threshold:
-                    if pe_signal_candle is not None:
-                        pe_signal_price_above_low = False
-                        if 'index' in pe_signal_candle:
-                            signal_candles_with_entry.discard(pe_signal_candle['index'])
-                    pe_signal_candle = {
-                        'date': previous_candle['date'],
-                        'high': previous_candle['high'],
-                        'low': previous_candle['low'],
-                        'index': i - 1
-                    }
-                    ce_signal_candle = None
+            if pe_signal_mask[i - 1]:
+                if pe_signal_candle is not None:
+                    pe_signal_price_above_low = False
+                    if 'index' in pe_signal_candle:
+                        signal_candles_with_entry.discard(pe_signal_candle['index'])
+                pe_signal_candle = {
+                    'date': dates[i - 1],
+                    'high': highs[i - 1],
+                    'low': lows[i - 1],
+                    'index': i - 1
+                }
+                ce_signal_candle = None
 
             # CE Signal: HIGH < 5 EMA AND RSI < 30
             # NOTE: CE signals are IGNORED in live trading - only PE trades are allowed
             # CE signals are detected but not processed for trade entry
-            if previous_candle['high'] < previous_ema:
-                if previous_rsi is not None and previous_rsi < 30:
-                    # CE signal detected but ignored - clear any existing CE signal
-                    if ce_signal_candle is not None:
-                        ce_signal_price_below_high = False
-                        if 'index' in ce_signal_candle:
-                            signal_candles_with_entry.discard(ce_signal_candle['index'])
-                    ce_signal_candle = None  # Clear CE signal instead of setting it
-                    # Don't clear PE signal when CE is detected
+            if ce_signal_mask[i - 1]:
+                # CE signal detected but ignored - clear any existing CE signal
+                if ce_signal_candle is not None:
+                    ce_signal_price_below_high = False
+                    if 'index' in ce_signal_candle:
+                        signal_candles_with_entry.discard(ce_signal_candle['index'])
+                ce_signal_candle = None  # Clear CE signal instead of setting it
+                # Don't clear PE signal when CE is detected
 
             # Price action validation for re-entry
             if pe_signal_candle is not None and not trade_placed and not pe_signal_price_above_low:
-                if current_candle['high'] > pe_signal_candle['low']:
+                if highs[i] > pe_signal_candle['low']:
                     pe_signal_price_above_low = True
 
             # CE price action validation disabled - CE signals are ignored
             # if ce_signal_candle is not None and not trade_placed and not ce_signal_price_below_high:
-            #     if current_candle['low'] < ce_signal_candle['high']:
+            #     if lows[i] < ce_signal_candle['high']:
             #         ce_signal_price_below_high = True
 
             # Entry Logic
             if not trade_placed:
                 # PE Entry
-                if pe_signal_candle is not None and current_candle['close'] < pe_signal_candle['low']:
+                if pe_signal_candle is not None and closes[i] < pe_signal_candle['low']:
                     signal_candle_index = pe_signal_candle['index']
                     is_first_entry = signal_candle_index not in signal_candles_with_entry
                     entry_allowed = is_first_entry or pe_signal_price_above_low
@@ -7718,7 +8206,7 @@ def api_backtest_mountain_signal():
                     if entry_allowed:
                         trade_placed = True
                         position = -1  # PE (short)
-                        entry_price = current_candle['close']
+                        entry_price = closes[i]
                         signal_candles_with_entry.add(signal_candle_index)
                         pe_signal_price_above_low = False
                         # Store signal candle info for exit logic
@@ -7727,73 +8215,19 @@ def api_backtest_mountain_signal():
                             'low': pe_signal_candle['low'],
                             'type': 'PE'
                         }
-                        trades.append({
-                            'signal_time': pe_signal_candle['date'],
-                            'signal_type': 'PE',
-                            'signal_high': pe_signal_candle['high'],
-                            'signal_low': pe_signal_candle['low'],
-                            'entry_time': current_candle['date'],
-                            'entry_price': entry_price,
-                            'exit_time': None,
-                            'exit_price': None,
-                            'exit_type': None,
-                            'pnl': None,
-                            'pnl_percent': None,
-                            'date': current_candle['date'].date() if isinstance(current_candle['date'], datetime.datetime) else current_candle['date'],
-                            'lot_size': lot_size_value,
-                            'option_trade_id': None,
-                            'option_symbol': None,
-                            'option_entry_price': None,
-                            'stop_loss_price': None,
-                            'target_price': None,
-                            'option_exit_price': None
-                        })
+                        trade_record, active_option_trade = _open_mountain_signal_trade(
+                            'PE', pe_signal_candle, dates[i], entry_price, len(trades), option_trade_sequence,
+                            instrument_key, lot_size_value, strike_step, stop_loss_percent, target_percent,
+                        )
+                        trades.append(trade_record)
+                        option_trades.append(active_option_trade)
+                        option_trade_sequence += 1
                         consecutive_candles_for_target = 0
                         last_candle_high_less_than_ema = False
 
-                        trade_index = len(trades) - 1
-                        trade_date_value = trades[trade_index]['date']
-                        atm_strike = round_to_atm_price(entry_price, strike_step)
-                        option_symbol = get_option_symbol_from_components(instrument_key, atm_strike, 'PE', current_candle['date'])
-                        option_entry_price = simulate_option_premium(entry_price, atm_strike, 'PE')
-                        stop_loss_price_abs = round(option_entry_price * (1 + stop_loss_percent), 2)
-                        target_price_abs = round(option_entry_price * (1 + target_percent), 2)
-
-                        option_trade = {
-                            'id': option_trade_sequence,
-                            'index_trade_index': trade_index,
-                            'signal_time': pe_signal_candle['date'],
-                            'signal_type': 'PE',
-                            'signal_high': float(pe_signal_candle['high']),
-                            'signal_low': float(pe_signal_candle['low']),
-                            'entry_time': current_candle['date'],
-                            'index_at_entry': float(entry_price),
-                            'atm_strike': float(atm_strike),
-                            'option_symbol': option_symbol,
-                            'option_entry_price': float(option_entry_price),
-                            'stop_loss_price': float(stop_loss_price_abs),
-                            'target_price': float(target_price_abs),
-                            'option_exit_price': None,
-                            'exit_time': None,
-                            'exit_type': None,
-                            'pnl': None,
-                            'pnl_percent': None,
-                            'status': 'open',
-                            'lot_size': lot_size_value,
-                            'date': trade_date_value
-                        }
-                        option_trades.append(option_trade)
-                        option_trade_sequence += 1
-                        trades[trade_index]['option_trade_id'] = option_trade['id']
-                        trades[trade_index]['option_symbol'] = option_symbol
-                        trades[trade_index]['option_entry_price'] = float(option_entry_price)
-                        trades[trade_index]['stop_loss_price'] = float(stop_loss_price_abs)
-                        trades[trade_index]['target_price'] = float(target_price_abs)
-                        active_option_trade = option_trade
-
                 # CE Entry: DISABLED for live trading - only PE trades allowed
                 # CE signals are ignored and no trades are entered
-                elif False:  # Disabled: ce_signal_candle is not None and current_candle['close'] > ce_signal_candle['high']:
+                elif False:  # Disabled: ce_signal_candle is not None and closes[i] > ce_signal_candle['high']:
                     signal_candle_index = ce_signal_candle['index']
                     is_first_entry = signal_candle_index not in signal_candles_with_entry
                     entry_allowed = is_first_entry or ce_signal_price_below_high
@@ -7801,7 +8235,7 @@ def api_backtest_mountain_signal():
                     if entry_allowed:
                         trade_placed = True
                         position = 1  # CE (long)
-                        entry_price = current_candle['close']
+                        entry_price = closes[i]
                         signal_candles_with_entry.add(signal_candle_index)
                         ce_signal_price_below_high = False
                         # Store signal candle info for exit logic
@@ -7810,126 +8244,66 @@ def api_backtest_mountain_signal():
                             'low': ce_signal_candle['low'],
                             'type': 'CE'
                         }
-                        trades.append({
-                            'signal_time': ce_signal_candle['date'],
-                            'signal_type': 'CE',
-                            'signal_high': ce_signal_candle['high'],
-                            'signal_low': ce_signal_candle['low'],
-                            'entry_time': current_candle['date'],
-                            'entry_price': entry_price,
-                            'exit_time': None,
-                            'exit_price': None,
-                            'exit_type': None,
-                            'pnl': None,
-                            'pnl_percent': None,
-                            'date': current_candle['date'].date() if isinstance(current_candle['date'], datetime.datetime) else current_candle['date'],
-                            'lot_size': lot_size_value,
-                            'option_trade_id': None,
-                            'option_symbol': None,
-                            'option_entry_price': None,
-                            'stop_loss_price': None,
-                            'target_price': None,
-                            'option_exit_price': None
-                        })
+                        trade_record, active_option_trade = _open_mountain_signal_trade(
+                            'CE', ce_signal_candle, dates[i], entry_price, len(trades), option_trade_sequence,
+                            instrument_key, lot_size_value, strike_step, stop_loss_percent, target_percent,
+                        )
+                        trades.append(trade_record)
+                        option_trades.append(active_option_trade)
+                        option_trade_sequence += 1
                         consecutive_candles_for_target = 0
                         last_candle_low_greater_than_ema = False
 
-                        trade_index = len(trades) - 1
-                        trade_date_value = trades[trade_index]['date']
-                        atm_strike = round_to_atm_price(entry_price, strike_step)
-                        option_symbol = get_option_symbol_from_components(instrument_key, atm_strike, 'CE', current_candle['date'])
-                        option_entry_price = simulate_option_premium(entry_price, atm_strike, 'CE')
-                        stop_loss_price_abs = round(option_entry_price * (1 + stop_loss_percent), 2)
-                        target_price_abs = round(option_entry_price * (1 + target_percent), 2)
-
-                        option_trade = {
-                            'id': option_trade_sequence,
-                            'index_trade_index': trade_index,
-                            'signal_time': ce_signal_candle['date'],
-                            'signal_type': 'CE',
-                            'signal_high': float(ce_signal_candle['high']),
-                            'signal_low': float(ce_signal_candle['low']),
-                            'entry_time': current_candle['date'],
-                            'index_at_entry': float(entry_price),
-                            'atm_strike': float(atm_strike),
-                            'option_symbol': option_symbol,
-                            'option_entry_price': float(option_entry_price),
-                            'stop_loss_price': float(stop_loss_price_abs),
-                            'target_price': float(target_price_abs),
-                            'option_exit_price': None,
-                            'exit_time': None,
-                            'exit_type': None,
-                            'pnl': None,
-                            'pnl_percent': None,
-                            'status': 'open',
-                            'lot_size': lot_size_value,
-                            'date': trade_date_value
-                        }
-                        option_trades.append(option_trade)
-                        option_trade_sequence += 1
-                        trades[trade_index]['option_trade_id'] = option_trade['id']
-                        trades[trade_index]['option_symbol'] = option_symbol
-                        trades[trade_index]['option_entry_price'] = float(option_entry_price)
-                        trades[trade_index]['stop_loss_price'] = float(stop_loss_price_abs)
-                        trades[trade_index]['target_price'] = float(target_price_abs)
-                        active_option_trade = option_trade
-
             # Exit Logic with DSL-driven priorities
             elif trade_placed:
-                candle_time_obj = current_candle['date']
-                if isinstance(candle_time_obj, datetime.datetime):
-                    candle_time_check = candle_time_obj.time()
-                else:
-                    candle_time_check = datetime.datetime.now().time()
-
                 current_trade_index = len(trades) - 1
                 current_trade = trades[current_trade_index] if current_trade_index >= 0 else None
 
                 linked_option_trade = None
-                option_exit_price = None
-                option_exit_type = None
+                exit_type = None
                 if active_option_trade and current_trade and current_trade.get('option_trade_id') == active_option_trade.get('id'):
                     linked_option_trade = active_option_trade
                     option_exit_price = simulate_option_premium(
-                        current_candle['close'],
+                        closes[i],
                         linked_option_trade['atm_strike'],
                         linked_option_trade['signal_type']
                     )
                     if option_exit_price <= linked_option_trade['stop_loss_price']:
-                        option_exit_type = 'OPTION_STOP_LOSS'
+                        exit_type = 'OPTION_STOP_LOSS'
                     elif option_exit_price >= linked_option_trade['target_price']:
-                        option_exit_type = 'OPTION_TARGET'
-
-                if option_exit_type and current_trade:
-                    lot_size_for_trade = current_trade.get('lot_size', lot_size_value)
-                    entry_price_value = current_trade['entry_price']
-                    exit_price_value = current_candle['close']
-                    if position == -1:
-                        pnl_val = (entry_price_value - exit_price_value) * lot_size_for_trade
-                        pnl_percent_val = ((entry_price_value - exit_price_value) / entry_price_value) * 100 if entry_price_value else 0
-                    else:
-                        pnl_val = (exit_price_value - entry_price_value) * lot_size_for_trade
-                        pnl_percent_val = ((exit_price_value - entry_price_value) / entry_price_value) * 100 if entry_price_value else 0
-
-                    current_trade['exit_time'] = current_candle['date']
-                    current_trade['exit_price'] = exit_price_value
-                    current_trade['exit_type'] = option_exit_type
-                    current_trade['pnl'] = pnl_val
-                    current_trade['pnl_percent'] = pnl_percent_val
-                    current_trade['option_exit_price'] = option_exit_price
-
+                        exit_type = 'OPTION_TARGET'
+
+                # Exit priority: option SL/target, market-close square-off, then index stop/target
+                if exit_type is None:
+                    if current_trade and square_off_mask[i]:
+                        exit_type = 'MKT_CLOSE'
+                    elif position == -1 and active_trade_signal_candle is not None and active_trade_signal_candle['type'] == 'PE':
+                        if closes[i] > active_trade_signal_candle['high']:
+                            exit_type = 'INDEX_STOP'
+                        elif highs[i] < emas[i]:
+                            last_candle_high_less_than_ema = True
+                            consecutive_candles_for_target = 0
+                        elif last_candle_high_less_than_ema and closes[i] > emas[i]:
+                            consecutive_candles_for_target += 1
+                            if consecutive_candles_for_target >= 2:
+                                exit_type = 'INDEX_TARGET'
+                    elif position == 1 and active_trade_signal_candle is not None and active_trade_signal_candle['type'] == 'CE':
+                        if closes[i] < active_trade_signal_candle['low']:
+                            exit_type = 'INDEX_STOP'
+                        elif lows[i] > emas[i]:
+                            last_candle_low_greater_than_ema = True
+                            consecutive_candles_for_target = 0
+                        elif last_candle_low_greater_than_ema and closes[i] < emas[i]:
+                            consecutive_candles_for_target += 1
+                            if consecutive_candles_for_target >= 2:
+                                exit_type = 'INDEX_TARGET'
+
+                if exit_type and current_trade:
+                    _close_mountain_signal_trade(
+                        current_trade, linked_option_trade, position, dates[i], closes[i], exit_type, lot_size_value
+                    )
                     if linked_option_trade:
-                        entry_opt_price = linked_option_trade.get('option_entry_price')
-                        lot_size_opt = linked_option_trade.get('lot_size', lot_size_for_trade)
-                        linked_option_trade['option_exit_price'] = option_exit_price
-                        linked_option_trade['exit_time'] = current_candle['date']
-                        linked_option_trade['exit_type'] = option_exit_type
-                        if entry_opt_price:
-                            linked_option_trade['pnl'] = (option_exit_price - entry_opt_price) * lot_size_opt
-                            linked_option_trade['pnl_percent'] = ((option_exit_price - entry_opt_price) / entry_opt_price) * 100 if entry_opt_price else None
-                        linked_option_trade['status'] = 'closed'
                         active_option_trade = None
-
                     trade_placed = False
                     position = 0
                     active_trade_signal_candle = None
@@ -7940,260 +8314,17 @@ def api_backtest_mountain_signal():
                     else:
                         ce_signal_price_below_high = False
                         last_candle_low_greater_than_ema = False
-                    continue
-
-                if current_trade:
-                    market_close_square_off_time = datetime.time(15, 15)
-                    if market_close_square_off_time <= candle_time_check < datetime.time(15, 30):
-                        lot_size_for_trade = current_trade.get('lot_size', lot_size_value)
-                        entry_price_value = current_trade['entry_price']
-                        exit_price_value = current_candle['close']
-                        if position == -1:
-                            pnl_val = (entry_price_value - exit_price_value) * lot_size_for_trade
-                            pnl_percent_val = ((entry_price_value - exit_price_value) / entry_price_value) * 100 if entry_price_value else 0
-                        else:
-                            pnl_val = (exit_price_value - entry_price_value) * lot_size_for_trade
-                            pnl_percent_val = ((exit_price_value - entry_price_value) / entry_price_value) * 100 if entry_price_value else 0
-
-                        option_exit_price_mc = None
-                        if linked_option_trade:
-                            option_exit_price_mc = simulate_option_premium(
-                                current_candle['close'],
-                                linked_option_trade['atm_strike'],
-                                linked_option_trade['signal_type']
-                            )
-                            entry_opt_price = linked_option_trade.get('option_entry_price')
-                            lot_size_opt = linked_option_trade.get('lot_size', lot_size_for_trade)
-                            linked_option_trade['option_exit_price'] = option_exit_price_mc
-                            linked_option_trade['exit_time'] = current_candle['date']
-                            linked_option_trade['exit_type'] = 'MARKET_CLOSE'
-                            if entry_opt_price:
-                                linked_option_trade['pnl'] = (option_exit_price_mc - entry_opt_price) * lot_size_opt
-                                linked_option_trade['pnl_percent'] = ((option_exit_price_mc - entry_opt_price) / entry_opt_price) * 100 if entry_opt_price else None
-                            linked_option_trade['status'] = 'closed'
-                            active_option_trade = None
-
-                        current_trade['exit_time'] = current_candle['date']
-                        current_trade['exit_price'] = exit_price_value
-                        current_trade['exit_type'] = 'MKT_CLOSE'
-                        current_trade['pnl'] = pnl_val
-                        current_trade['pnl_percent'] = pnl_percent_val
-                        current_trade['option_exit_price'] = option_exit_price_mc
-
-                        trade_placed = False
-                        position = 0
-                        active_trade_signal_candle = None
-                        consecutive_candles_for_target = 0
-                        if current_trade['signal_type'] == 'PE':
-                            pe_signal_price_above_low = False
-                            last_candle_high_less_than_ema = False
-                        else:
-                            ce_signal_price_below_high = False
-                            last_candle_low_greater_than_ema = False
-                        continue
-
-                if position == -1 and active_trade_signal_candle is not None and active_trade_signal_candle['type'] == 'PE':
-                    lot_size_for_trade = current_trade.get('lot_size', lot_size_value) if current_trade else lot_size_value
-                    entry_price_value = current_trade['entry_price'] if current_trade else 0
-
-                    if current_candle['close'] > active_trade_signal_candle['high']:
-                        exit_price_value = current_candle['close']
-                        pnl_val = (entry_price_value - exit_price_value) * lot_size_for_trade
-                        pnl_percent_val = ((entry_price_value - exit_price_value) / entry_price_value) * 100 if entry_price_value else 0
-                        option_exit_price_idx = None
-                        if linked_option_trade:
-                            option_exit_price_idx = simulate_option_premium(
-                                current_candle['close'],
-                                linked_option_trade['atm_strike'],
-                                linked_option_trade['signal_type']
-                            )
-                            entry_opt_price = linked_option_trade.get('option_entry_price')
-                            lot_size_opt = linked_option_trade.get('lot_size', lot_size_for_trade)
-                            linked_option_trade['option_exit_price'] = option_exit_price_idx
-                            linked_option_trade['exit_time'] = current_candle['date']
-                            linked_option_trade['exit_type'] = 'INDEX_STOP'
-                            if entry_opt_price:
-                                linked_option_trade['pnl'] = (option_exit_price_idx - entry_opt_price) * lot_size_opt
-                                linked_option_trade['pnl_percent'] = ((option_exit_price_idx - entry_opt_price) / entry_opt_price) * 100 if entry_opt_price else None
-                            linked_option_trade['status'] = 'closed'
-                            active_option_trade = None
-
-                        current_trade['exit_time'] = current_candle['date']
-                        current_trade['exit_price'] = exit_price_value
-                        current_trade['exit_type'] = 'INDEX_STOP'
-                        current_trade['pnl'] = pnl_val
-                        current_trade['pnl_percent'] = pnl_percent_val
-                        current_trade['option_exit_price'] = option_exit_price_idx
-                        trade_placed = False
-                        position = 0
-                        active_trade_signal_candle = None
-                        pe_signal_price_above_low = False
-                        consecutive_candles_for_target = 0
-                        last_candle_high_less_than_ema = False
-                    elif current_candle['high'] < current_ema:
-                        last_candle_high_less_than_ema = True
-                        consecutive_candles_for_target = 0
-                    elif last_candle_high_less_than_ema and current_candle['close'] > current_ema:
-                        consecutive_candles_for_target += 1
-                        if consecutive_candles_for_target >= 2:
-                            exit_price_value = current_candle['close']
-                            pnl_val = (entry_price_value - exit_price_value) * lot_size_for_trade
-                            pnl_percent_val = ((entry_price_value - exit_price_value) / entry_price_value) * 100 if entry_price_value else 0
-                            option_exit_price_idx = None
-                            if linked_option_trade:
-                                option_exit_price_idx = simulate_option_premium(
-                                    current_candle['close'],
-                                    linked_option_trade['atm_strike'],
-                                    linked_option_trade['signal_type']
-                                )
-                                entry_opt_price = linked_option_trade.get('option_entry_price')
-                                lot_size_opt = linked_option_trade.get('lot_size', lot_size_for_trade)
-                                linked_option_trade['option_exit_price'] = option_exit_price_idx
-                                linked_option_trade['exit_time'] = current_candle['date']
-                                linked_option_trade['exit_type'] = 'INDEX_TARGET'
-                                if entry_opt_price:
-                                    linked_option_trade['pnl'] = (option_exit_price_idx - entry_opt_price) * lot_size_opt
-                                    linked_option_trade['pnl_percent'] = ((option_exit_price_idx - entry_opt_price) / entry_opt_price) * 100 if entry_opt_price else None
-                                linked_option_trade['status'] = 'closed'
-                                active_option_trade = None
-
-                            current_trade['exit_time'] = current_candle['date']
-                            current_trade['exit_price'] = exit_price_value
-                            current_trade['exit_type'] = 'INDEX_TARGET'
-                            current_trade['pnl'] = pnl_val
-                            current_trade['pnl_percent'] = pnl_percent_val
-                            current_trade['option_exit_price'] = option_exit_price_idx
-                            trade_placed = False
-                            position = 0
-                            active_trade_signal_candle = None
-                            pe_signal_price_above_low = False
-                            consecutive_candles_for_target = 0
-                            last_candle_high_less_than_ema = False
-
-                elif position == 1 and active_trade_signal_candle is not None and active_trade_signal_candle['type'] == 'CE':
-                    lot_size_for_trade = current_trade.get('lot_size', lot_size_value) if current_trade else lot_size_value
-                    entry_price_value = current_trade['entry_price'] if current_trade else 0
-
-                    if current_candle['close'] < active_trade_signal_candle['low']:
-                        exit_price_value = current_candle['close']
-                        pnl_val = (exit_price_value - entry_price_value) * lot_size_for_trade
-                        pnl_percent_val = ((exit_price_value - entry_price_value) / entry_price_value) * 100 if entry_price_value else 0
-                        option_exit_price_idx = None
-                        if linked_option_trade:
-                            option_exit_price_idx = simulate_option_premium(
-                                current_candle['close'],
-                                linked_option_trade['atm_strike'],
-                                linked_option_trade['signal_type']
-                            )
-                            entry_opt_price = linked_option_trade.get('option_entry_price')
-                            lot_size_opt = linked_option_trade.get('lot_size', lot_size_for_trade)
-                            linked_option_trade['option_exit_price'] = option_exit_price_idx
-                            linked_option_trade['exit_time'] = current_candle['date']
-                            linked_option_trade['exit_type'] = 'INDEX_STOP'
-                            if entry_opt_price:
-                                linked_option_trade['pnl'] = (option_exit_price_idx - entry_opt_price) * lot_size_opt
-                                linked_option_trade['pnl_percent'] = ((option_exit_price_idx - entry_opt_price) / entry_opt_price) * 100 if entry_opt_price else None
-                            linked_option_trade['status'] = 'closed'
-                            active_option_trade = None
-
-                        current_trade['exit_time'] = current_candle['date']
-                        current_trade['exit_price'] = exit_price_value
-                        current_trade['exit_type'] = 'INDEX_STOP'
-                        current_trade['pnl'] = pnl_val
-                        current_trade['pnl_percent'] = pnl_percent_val
-                        current_trade['option_exit_price'] = option_exit_price_idx
-                        trade_placed = False
-                        position = 0
-                        active_trade_signal_candle = None
-                        ce_signal_price_below_high = False
-                        consecutive_candles_for_target = 0
-                        last_candle_low_greater_than_ema = False
-                    elif current_candle['low'] > current_ema:
-                        last_candle_low_greater_than_ema = True
-                        consecutive_candles_for_target = 0
-                    elif last_candle_low_greater_than_ema and current_candle['close'] < current_ema:
-                        consecutive_candles_for_target += 1
-                        if consecutive_candles_for_target >= 2:
-                            exit_price_value = current_candle['close']
-                            pnl_val = (exit_price_value - entry_price_value) * lot_size_for_trade
-                            pnl_percent_val = ((exit_price_value - entry_price_value) / entry_price_value) * 100 if entry_price_value else 0
-                            option_exit_price_idx = None
-                            if linked_option_trade:
-                                option_exit_price_idx = simulate_option_premium(
-                                    current_candle['close'],
-                                    linked_option_trade['atm_strike'],
-                                    linked_option_trade['signal_type']
-                                )
-                                entry_opt_price = linked_option_trade.get('option_entry_price')
-                                lot_size_opt = linked_option_trade.get('lot_size', lot_size_for_trade)
-                                linked_option_trade['option_exit_price'] = option_exit_price_idx
-                                linked_option_trade['exit_time'] = current_candle['date']
-                                linked_option_trade['exit_type'] = 'INDEX_TARGET'
-                                if entry_opt_price:
-                                    linked_option_trade['pnl'] = (option_exit_price_idx - entry_opt_price) * lot_size_opt
-                                    linked_option_trade['pnl_percent'] = ((option_exit_price_idx - entry_opt_price) / entry_opt_price) * 100 if entry_opt_price else None
-                                linked_option_trade['status'] = 'closed'
-                                active_option_trade = None
-
-                            current_trade['exit_time'] = current_candle['date']
-                            current_trade['exit_price'] = exit_price_value
-                            current_trade['exit_type'] = 'INDEX_TARGET'
-                            current_trade['pnl'] = pnl_val
-                            current_trade['pnl_percent'] = pnl_percent_val
-                            current_trade['option_exit_price'] = option_exit_price_idx
-                            trade_placed = False
-                            position = 0
-                            active_trade_signal_candle = None
-                            ce_signal_price_below_high = False
-                            consecutive_candles_for_target = 0
-                            last_candle_low_greater_than_ema = False
 
         # Force-close any remaining open trade at the end of the dataset
         if trade_placed and trades:
             last_trade = trades[-1]
-            last_candle = df.iloc[-1]
-            exit_price_value = last_candle['close']
-            lot_size_for_trade = last_trade.get('lot_size', lot_size_value)
-            entry_price_value = last_trade['entry_price']
-            if position == -1:
-                pnl_val = (entry_price_value - exit_price_value) * lot_size_for_trade
-                pnl_percent_val = ((entry_price_value - exit_price_value) / entry_price_value) * 100 if entry_price_value else 0
-            else:
-                pnl_val = (exit_price_value - entry_price_value) * lot_size_for_trade
-                pnl_percent_val = ((exit_price_value - entry_price_value) / entry_price_value) * 100 if entry_price_value else 0
-
-            option_exit_price_forced = None
+            linked_option_trade = None
             if active_option_trade and last_trade.get('option_trade_id') == active_option_trade.get('id'):
-                option_exit_price_forced = simulate_option_premium(
-                    exit_price_value,
-                    active_option_trade['atm_strike'],
-                    active_option_trade['signal_type']
-                )
-                entry_opt_price = active_option_trade.get('option_entry_price')
-                lot_size_opt = active_option_trade.get('lot_size', lot_size_for_trade)
-                active_option_trade['option_exit_price'] = option_exit_price_forced
-                active_option_trade['exit_time'] = last_candle['date']
-                active_option_trade['exit_type'] = 'FORCED_CLOSE'
-                if entry_opt_price:
-                    active_option_trade['pnl'] = (option_exit_price_forced - entry_opt_price) * lot_size_opt
-                    active_option_trade['pnl_percent'] = ((option_exit_price_forced - entry_opt_price) / entry_opt_price) * 100 if entry_opt_price else None
-                active_option_trade['status'] = 'closed'
+                linked_option_trade = active_option_trade
                 active_option_trade = None
-
-            last_trade['exit_time'] = last_candle['date']
-            last_trade['exit_price'] = exit_price_value
-            last_trade['exit_type'] = 'FORCED_CLOSE'
-            last_trade['pnl'] = pnl_val
-            last_trade['pnl_percent'] = pnl_percent_val
-            last_trade['option_exit_price'] = option_exit_price_forced
-            trade_placed = False
-            position = 0
-            active_trade_signal_candle = None
-            pe_signal_price_above_low = False
-            ce_signal_price_below_high = False
-            consecutive_candles_for_target = 0
-            last_candle_high_less_than_ema = False
-            last_candle_low_greater_than_ema = False
+            _close_mountain_signal_trade(
+                last_trade, linked_option_trade, position, dates[-1], closes[-1], 'FORCED_CLOSE', lot_size_value
+            )
 
         if active_option_trade and active_option_trade.get('status') != 'closed':
             active_option_trade['status'] = 'open'
@@ -8202,81 +8333,43 @@ def api_backtest_mountain_signal():
         # Calculate summary metrics
         closed_trades = [t for t in trades if t['exit_time'] is not None]
         total_trades = len(closed_trades)
-        winning_trades = len([t for t in closed_trades if t['pnl'] and t['pnl'] > 0])
-        losing_trades = len([t for t in closed_trades if t['pnl'] and t['pnl'] <= 0])
+        # Realised P&L (None dropped) as one array for the counts, total and equity curve;
+        # cumsum adds in trade order, so the total matches a running sum exactly.
+        closed_pnls = np.array([t['pnl'] for t in closed_trades if t['pnl'] is not None], dtype=float)
+        equity = np.cumsum(closed_pnls)
+        winning_trades = int(np.count_nonzero(closed_pnls > 0))
+        losing_trades = int(np.count_nonzero(closed_pnls < 0))
         win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
-        total_pnl = sum([t['pnl'] for t in closed_trades if t['pnl'] is not None])
+        total_pnl = float(equity[-1]) if equity.size else 0
         average_pnl = total_pnl / total_trades if total_trades > 0 else 0
 
         option_closed_trades = [ot for ot in option_trades if ot.get('exit_time') is not None]
         option_total_trades = len(option_closed_trades)
-        option_winning_trades = len([ot for ot in option_closed_trades if ot.get('pnl') and ot['pnl'] > 0])
-        option_losing_trades = len([ot for ot in option_closed_trades if ot.get('pnl') and ot['pnl'] <= 0])
+        option_closed_pnls = np.array(
+            [ot['pnl'] for ot in option_closed_trades if ot.get('pnl') is not None], dtype=float
+        )
+        option_winning_trades = int(np.count_nonzero(option_closed_pnls > 0))
+        option_losing_trades = int(np.count_nonzero(option_closed_pnls < 0))
         option_win_rate = (option_winning_trades / option_total_trades * 100) if option_total_trades > 0 else 0
-        option_total_pnl = sum([ot['pnl'] for ot in option_closed_trades if ot.get('pnl') is not None])
+        option_total_pnl = float(np.cumsum(option_closed_pnls)[-1]) if option_closed_pnls.size else 0
         option_average_pnl = option_total_pnl / option_total_trades if option_total_trades > 0 else 0
 
-        # Calculate Max Drawdown
-        cumulative_pnl = 0
-        equity_curve = [0]
-        for trade in closed_trades:
-            if trade['pnl'] is not None:
-                cumulative_pnl += trade['pnl']
-                equity_curve.append(cumulative_pnl)
-        
-        if len(equity_curve) > 1:
-            running_max = [equity_curve[0]]
-            for i in range(1, len(equity_curve)):
-                running_max.append(max(running_max[-1], equity_curve[i]))
-            
-            drawdowns = [(equity_curve[i] - running_max[i]) for i in range(len(equity_curve))]
-            max_drawdown = min(drawdowns) if drawdowns else 0
-            max_drawdown_percent = abs((max_drawdown / running_max[drawdowns.index(max_drawdown)]) * 100) if running_max[drawdowns.index(max_drawdown)] != 0 else 0
+        # Calculate Max Drawdown on the equity curve starting from 0
+        if equity.size:
+            equity_curve = np.concatenate(([0.0], equity))
+            running_max = np.maximum.accumulate(equity_curve)
+            drawdowns = equity_curve - running_max
+            trough = int(drawdowns.argmin())
+            max_drawdown = float(drawdowns[trough])
+            peak = float(running_max[trough])
+            max_drawdown_percent = abs((max_drawdown / peak) * 100) if peak != 0 else 0
         else:
             max_drawdown = 0
             max_drawdown_percent = 0
 
         # Calculate Max Winning Day and Max Losing Day
-        daily_pnl = {}
-        for trade in closed_trades:
-            if trade['pnl'] is not None:
-                trade_date = trade['date']
-                if isinstance(trade_date, datetime.date):
-                    date_key = trade_date.isoformat()
-                else:
-                    date_key = str(trade_date)
-                if date_key not in daily_pnl:
-                    daily_pnl[date_key] = 0
-                daily_pnl[date_key] += trade['pnl']
-
-        max_winning_day = {'date': from_date_str, 'pnl': 0}
-        max_losing_day = {'date': from_date_str, 'pnl': 0}
-        for date_key, pnl in daily_pnl.items():
-            if pnl > max_winning_day['pnl']:
-                max_winning_day = {'date': date_key, 'pnl': pnl}
-            if pnl < max_losing_day['pnl']:
-                max_losing_day = {'date': date_key, 'pnl': pnl}
-
-        option_daily_pnl: Dict[str, float] = {}
-        for opt_trade in option_closed_trades:
-            pnl_val = opt_trade.get('pnl')
-            if pnl_val is None:
-                continue
-            opt_date = opt_trade.get('date')
-            if isinstance(opt_date, datetime.date):
-                opt_date_key = opt_date.isoformat()
-            else:
-                opt_date_key = str(opt_date)
-            option_daily_pnl.setdefault(opt_date_key, 0.0)
-            option_daily_pnl[opt_date_key] += pnl_val
-
-        option_max_winning_day = {'date': from_date_str, 'pnl': 0}
-        option_max_losing_day = {'date': from_date_str, 'pnl': 0}
-        for date_key, pnl in option_daily_pnl.items():
-            if pnl > option_max_winning_day['pnl']:
-                option_max_winning_day = {'date': date_key, 'pnl': pnl}
-            if pnl < option_max_losing_day['pnl']:
-                option_max_losing_day = {'date': date_key, 'pnl': pnl}
+        max_winning_day, max_losing_day = _best_and_worst_pnl_days(closed_trades, from_date_str)
+        option_max_winning_day, option_max_losing_day = _best_and_worst_pnl_days(option_closed_trades, from_date_str)
 
         # Format trades for response
         formatted_trades = []
@@ -8487,44 +8580,16 @@ def api_optimizer_mountain_signal():
         else:
             return jsonify({'status': 'error', 'message': 'Invalid instrument'}), 400
 
-        all_candles: List[Dict[str, Any]] = []
-        current_date = from_date
-        kite_interval = f"{candle_time}minute"
-
-        while current_date <= to_date:
-            if current_date.weekday() < 5:
-                start_dt = datetime.datetime.combine(current_date, datetime.time(9, 15))
-                end_dt = datetime.datetime.combine(current_date, datetime.time(15, 30))
-                try:
-                    hist = execute_with_retries(
-                        f"fetching {kite_interval} historical data for token {token} on {current_date}",
-                        lambda: kite.historical_data(token, start_dt, end_dt, kite_interval)
-                    )
-                    if hist:
-                        all_candles.extend(hist)
-                except kite_exceptions.TokenException:
-                    raise
-                except Exception as e:
-                    logging.error(f"Error fetching historical data for {current_date}: {e}")
-            current_date += datetime.timedelta(days=1)
+        all_candles = _fetch_historical_candles(
+            kite, token, from_date, to_date, f"{candle_time}minute"
+        )
 
         if not all_candles:
             return jsonify({'status': 'error', 'message': 'No historical data found for the selected date range'}), 404
 
         all_candles.sort(key=lambda x: x['date'])
 
-        from utils.indicators import calculate_rsi
-        import pandas as pd
-
-        df_data = [{
-            'date': candle['date'],
-            'open': candle['open'],
-            'high': candle['high'],
-            'low': candle['low'],
-            'close': candle['close']
-        } for candle in all_candles]
-
-        df = pd.DataFrame(df_data)
+        df = pd.DataFrame.from_records(all_candles, columns=['date', 'open', 'high', 'low', 'close'])
         df['ema'] = df['close'].ewm(span=ema_period, adjust=False).mean()
 
         if len(df) >= 15:
@@ -8542,40 +8607,39 @@ def api_optimizer_mountain_signal():
             rsi_overbought_threshold=rsi_threshold,
         )
 
-        closed_trades = [t for t in trades if t.get('exit_time') is not None and t.get('pnl') is not None]
-        closed_option_trades = [t for t in option_trades if t.get('exit_time') is not None and t.get('pnl') is not None]
+        closed_trades, open_trades_count = _split_closed_and_open_trades(trades)
+        closed_option_trades, open_option_trades_count = _split_closed_and_open_trades(option_trades)
 
-        total_trades = len(closed_trades)
-        winning_trades = len([t for t in closed_trades if t['pnl'] > 0])
-        losing_trades = len([t for t in closed_trades if t['pnl'] <= 0])
+        # One P&L array per trade set for the counts and totals; cumsum adds in
+        # trade order, so the total matches a running sum exactly.
+        closed_pnls = np.fromiter((t['pnl'] for t in closed_trades), dtype=float, count=len(closed_trades))
+        total_trades = int(closed_pnls.size)
+        winning_trades = int(np.count_nonzero(closed_pnls > 0))
+        losing_trades = total_trades - winning_trades
         win_rate = (winning_trades / total_trades * 100) if total_trades > 0 else 0
-        total_pnl = sum(t['pnl'] for t in closed_trades)
+        total_pnl = float(np.cumsum(closed_pnls)[-1]) if total_trades > 0 else 0
         average_pnl = total_pnl / total_trades if total_trades > 0 else 0
 
-        total_option_trades = len(closed_option_trades)
-        option_wins = len([t for t in closed_option_trades if t['pnl'] > 0])
-        option_losses = len([t for t in closed_option_trades if t['pnl'] <= 0])
+        option_closed_pnls = np.fromiter(
+            (t['pnl'] for t in closed_option_trades), dtype=float, count=len(closed_option_trades)
+        )
+        total_option_trades = int(option_closed_pnls.size)
+        option_wins = int(np.count_nonzero(option_closed_pnls > 0))
+        option_losses = total_option_trades - option_wins
         option_win_rate = (option_wins / total_option_trades * 100) if total_option_trades > 0 else 0
-        option_total_pnl = sum(t['pnl'] for t in closed_option_trades)
+        option_total_pnl = float(np.cumsum(option_closed_pnls)[-1]) if total_option_trades > 0 else 0
         option_average_pnl = option_total_pnl / total_option_trades if total_option_trades > 0 else 0
 
-        daily_stats = aggregate_trades_by_period(closed_trades, 'daily')
-        weekly_stats = aggregate_trades_by_period(closed_trades, 'weekly')
-        monthly_stats = aggregate_trades_by_period(closed_trades, 'monthly')
-        yearly_stats = aggregate_trades_by_period(closed_trades, 'yearly')
-
-        option_daily_stats = aggregate_trades_by_period(closed_option_trades, 'daily')
-        option_weekly_stats = aggregate_trades_by_period(closed_option_trades, 'weekly')
-        option_monthly_stats = aggregate_trades_by_period(closed_option_trades, 'monthly')
-        option_yearly_stats = aggregate_trades_by_period(closed_option_trades, 'yearly')
-
-        best_day = max(daily_stats, key=lambda item: item['pnl']) if daily_stats else None
-        worst_day = min(daily_stats, key=lambda item: item['pnl']) if daily_stats else None
-        option_best_day = max(option_daily_stats, key=lambda item: item['pnl']) if option_daily_stats else None
-        option_worst_day = min(option_daily_stats, key=lambda item: item['pnl']) if option_daily_stats else None
+        periods = ('daily', 'weekly', 'monthly', 'yearly')
+        daily_stats, weekly_stats, monthly_stats, yearly_stats = (
+            aggregate_trades_by_periods(closed_trades, periods).values()
+        )
+        option_daily_stats, option_weekly_stats, option_monthly_stats, option_yearly_stats = (
+            aggregate_trades_by_periods(closed_option_trades, periods).values()
+        )
 
-        open_trades_count = len([t for t in trades if t.get('exit_time') is None])
-        open_option_trades_count = len([t for t in option_trades if t.get('exit_time') is None])
+        best_day, worst_day = _best_and_worst_by_pnl(daily_stats)
+        option_best_day, option_worst_day = _best_and_worst_by_pnl(option_daily_stats)
 
         max_drawdown_abs, max_drawdown_percent, roi_percent = compute_drawdown_metrics(closed_trades, initial_investment)
         option_max_drawdown_abs, option_max_drawdown_percent, option_roi_percent = compute_drawdown_metrics(closed_option_trades, initial_investment)
@@ -8798,10 +8862,7 @@ def connect(auth=None):
                             },
                             "H1",
                         )
-                        if (
-                            "Invalid `api_key` or `access_token`" in error_msg
-                            or "Incorrect `api_key` or `access_token`" in error_msg
-                        ):
+                        if _is_invalid_kite_credentials_error(e):
                             try:
                                 session.pop('access_token', None)
                             except Exception:
@@ -9489,6 +9550,7 @@ def api_paper_trade_start():
             }
         }, room=f'paper_trade_{strategy_id}')
 
+        invalidate_running_strategies_json(session['user_id'])
         return jsonify({
             'status': 'success',
             'message': 'Paper trading started successfully',
@@ -9556,6 +9618,7 @@ def api_paper_trade_stop():
                 }, room=f'paper_trade_{strategy_id}')
                 del paper_trade_strategies[strategy_id]
         conn.close()
+        invalidate_running_strategies_json(session['user_id'])
 
         return jsonify({
             'status': 'success',
@@ -9968,8 +10031,9 @@ def strategy_status(strategy_id):
         return jsonify({'status': 'error', 'message': 'Invalid strategy ID'}), 400
 
     # Find the running strategy by its db_id
-    for unique_run_id, running_strat_info in running_strategies.items():
-        if running_strat_info.get('db_id') == strategy_id_int:
+    for unique_run_id in running_strategies.run_ids_for(strategy_id_int):
+        running_strat_info = running_strategies.get(unique_run_id)
+        if running_strat_info is not None:
             try:
                 strategy_obj = running_strat_info.get('strategy')
                 status_data = {}
@@ -9992,7 +10056,6 @@ def strategy_status(strategy_id):
                                 # Handle numpy types BEFORE basic types (np.float64 is not a regular float)
                                 elif hasattr(value, '__class__'):
                                     try:
-                                        import numpy as np
                                         if isinstance(value, (np.integer, np.floating)):
                                             status_data[key] = None if np.isnan(value) else value.item()
                                         elif hasattr(value, 'item'):
@@ -10533,10 +10596,8 @@ def api_aiml_train_compat():
     return api_aiml_train()
 
 
-@app.route('/api/ai/lstm/train', methods=['POST', 'OPTIONS'])
+@app.route('/api/ai/lstm/train', methods=['POST'])
 def api_ai_lstm_train():
-    if request.method == 'OPTIONS':
-        return ('', 204)
     return api_aiml_train()
 
 
@@ -11017,6 +11078,7 @@ def api_live_trade_deploy():
         except Exception:
             logging.exception("Failed to initialize live strategy monitor for deployment %s", deployment.get('id'))
 
+    invalidate_running_strategies_json(user_id)
     return jsonify({
         'status': 'success',
         'deployment': _serialize_live_deployment(deployment)
@@ -11936,10 +11998,8 @@ def api_mountain_signal_live_square_off_all():
     })
 
 
-@app.route("/api/live_trade/delete", methods=['DELETE', 'OPTIONS'])
+@app.route("/api/live_trade/delete", methods=['DELETE'])
 def api_live_trade_delete():
-    if request.method == 'OPTIONS':
-        return jsonify({'status': 'success'}), 200
     if 'user_id' not in session:
         return jsonify({'status': 'error', 'message': 'User not logged in'}), 401
 
@@ -12300,10 +12360,6 @@ def api_live_trade_replay_data():
             })
 
         # Convert to DataFrame and run strategy simulation
-        import pandas as pd
-        from strategies.capture_mountain_signal import CaptureMountainSignal
-        from utils.indicators import calculate_rsi
-
         df = pd.DataFrame(historical_data)
         df['date'] = pd.to_datetime(df['date'])
         # Ensure all dates are timezone-aware (IST)
@@ -12350,7 +12406,6 @@ def api_live_trade_replay_data():
             current_datetime = current_datetime.replace(tzinfo=IST)
         
         # Convert current_datetime to pandas Timestamp for comparison
-        import pandas as pd
         current_timestamp = pd.Timestamp(current_datetime)
         # Ensure both are timezone-aware
         if current_timestamp.tz is None:
@@ -12508,14 +12563,9 @@ def api_rl_status():
         'registered_routes': rl_routes
     })
 
-@app.route('/api/rl/train', methods=['GET', 'POST', 'OPTIONS'])
+@app.route('/api/rl/train', methods=['GET', 'POST'])
 def api_rl_train():
     """Train RL agent on historical data"""
-    # Handle CORS preflight
-    if request.method == 'OPTIONS':
-        response = jsonify({'status': 'ok'})
-        return response
-    
     # Allow GET for testing
     if request.method == 'GET':
         return jsonify({
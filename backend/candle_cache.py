@@ -0,0 +1,91 @@
+"""
+SQLite cache of completed trading days of Kite historical candles.
+
+Past sessions never change, so backtest and optimizer runs that revisit a date
+range (typically while tuning SL/TP/RSI) only fetch the days not cached yet.
+Rows live in ``historical_candle_cache`` keyed by (instrument_token, interval,
+trading_day). A day Kite returned nothing for is stored as an empty list; it is
+usually a holiday, but could be a truncated response, so empty days are only
+trusted for CANDLE_CACHE_EMPTY_DAY_TTL_HOURS before being fetched again.
+
+Retention is keyed on the trading day itself, not on when it was fetched: days
+older than CANDLE_CACHE_RETENTION_DAYS are neither stored nor kept, however
+often they are requested, and recent days stay cached for that whole period.
+"""
+from __future__ import annotations
+
+import datetime
+import json
+from typing import Any, Dict, List
+
+from database import get_db_connection
+
+# Trading days older than this are dropped whenever new days are stored, which
+# bounds the table to the recent sessions backtests and the optimizer revisit.
+CANDLE_CACHE_RETENTION_DAYS = 180
+CANDLE_CACHE_EMPTY_DAY_TTL_HOURS = 24
+
+_SELECT_CACHED_DAYS_SQL = (
+    'SELECT trading_day, candles FROM historical_candle_cache '
+    'WHERE instrument_token = ? AND interval = ? AND trading_day BETWEEN ? AND ? '
+    "AND (candles != '[]' OR fetched_at >= datetime('now', ?))"
+)
+_UPSERT_CACHED_DAY_SQL = (
+    'INSERT OR REPLACE INTO historical_candle_cache (instrument_token, interval, trading_day, candles) '
+    'VALUES (?, ?, ?, ?)'
+)
+_EVICT_CACHED_DAYS_SQL = 'DELETE FROM historical_candle_cache WHERE trading_day < ?'
+
+
+def _encode_candles(candles: List[Dict[str, Any]]) -> str:
+    return json.dumps([{**candle, 'date': candle['date'].isoformat()} for candle in candles])
+
+
+def _decode_candles(payload: str) -> List[Dict[str, Any]]:
+    candles = json.loads(payload)
+    for candle in candles:
+        candle['date'] = datetime.datetime.fromisoformat(candle['date'])
+    return candles
+
+
+def load_cached_candles(
+    instrument_token: int, interval: str, from_date: datetime.date, to_date: datetime.date
+) -> Dict[datetime.date, List[Dict[str, Any]]]:
+    """Cached candles per trading day in [from_date, to_date]; days not cached (or
+    empty days past their TTL) are absent."""
+    conn = get_db_connection()
+    try:
+        rows = conn.execute(
+            _SELECT_CACHED_DAYS_SQL,
+            (
+                instrument_token,
+                interval,
+                from_date.isoformat(),
+                to_date.isoformat(),
+                f'-{CANDLE_CACHE_EMPTY_DAY_TTL_HOURS} hours',
+            ),
+        ).fetchall()
+    finally:
+        conn.close()
+    return {datetime.date.fromisoformat(day): _decode_candles(payload) for day, payload in rows}
+
+
+def store_cached_candles(
+    instrument_token: int, interval: str, candles_by_day: Dict[datetime.date, List[Dict[str, Any]]]
+) -> None:
+    """Cache completed days (callers must not pass today) and evict days past retention."""
+    cutoff = datetime.date.today() - datetime.timedelta(days=CANDLE_CACHE_RETENTION_DAYS)
+    rows = [
+        (instrument_token, interval, day.isoformat(), _encode_candles(candles))
+        for day, candles in candles_by_day.items()
+        if day >= cutoff
+    ]
+    if not rows:
+        return
+    conn = get_db_connection()
+    try:
+        conn.executemany(_UPSERT_CACHED_DAY_SQL, rows)
+        conn.execute(_EVICT_CACHED_DAYS_SQL, (cutoff.isoformat(),))
+        conn.commit()
+    finally:
+        conn.close()
@@ -9,12 +9,20 @@ SMTP_SERVER = os.getenv('SMTP_SERVER', 'smtp.gmail.com')
 USERNAME_EMAIL = os.getenv('USERNAME_EMAIL', '')
 PASSWORD_EMAIL = os.getenv('PASSWORD_EMAIL', '')
 EMAIL_FROM = os.getenv('EMAIL_FROM', '')
+# Send OTP mails on the request thread instead of the background sender (tests/debugging)
+EMAIL_SYNC = os.getenv('EMAIL_SYNC', 'False').lower() == 'true'
 
 # Flask Configuration
 SECRET_KEY = os.getenv('SECRET_KEY', secrets.token_hex(32))
+# 'memory' keeps session data server-side in this process; 'cookie' is Flask's signed cookie.
+# WARNING: 'memory' only works with ONE worker process (gunicorn workers = 1). Each worker
+# has its own store, so more workers randomly log users out; startup refuses that setup.
+SESSION_BACKEND = os.getenv('SESSION_BACKEND', 'memory').lower()
 
 # Database Configuration
 DATABASE_PATH = os.getenv('DATABASE_PATH', 'database.db')
+# Idle SQLite connections kept open per process (see database.get_db_connection)
+DB_POOL_SIZE = int(os.getenv('DB_POOL_SIZE', 8))
 
 # Server Configuration
 SERVER_HOST = os.getenv('SERVER_HOST', '0.0.0.0')
@@ -1,8 +1,11 @@
 import os
+import queue
 import sqlite3
+import threading
 import config
 import time
 import logging
+from typing import Optional
 
 
 def ensure_core_schema():
@@ -55,6 +58,9 @@ def ensure_core_schema():
         ):
             if column_name not in user_columns:
                 cur.execute(f"ALTER TABLE users ADD COLUMN {column_name} {column_def}")
+        # email already has the UNIQUE autoindex; this covers the LOWER(email)
+        # fallback used by login/verify for legacy mixed-case rows.
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_users_email_lower ON users(LOWER(email))")
 
         cur.execute("""
             CREATE TABLE IF NOT EXISTS user_contact_messages (
@@ -106,6 +112,15 @@ def ensure_core_schema():
                 FOREIGN KEY (user_id) REFERENCES users (id)
             )
         """)
+        # Per-user strategy lists and the running-strategies lookup filter on
+        # (user_id[, status]); the admin queue filters on approval_status, a
+        # column older databases only gain through migrate_strategy_approval.py.
+        cur.execute("CREATE INDEX IF NOT EXISTS idx_strategies_user_status ON strategies(user_id, status)")
+        strategy_columns = {row[1] for row in cur.execute("PRAGMA table_info(strategies)")}
+        if "approval_status" in strategy_columns:
+            cur.execute(
+                "CREATE INDEX IF NOT EXISTS idx_strategies_approval_status ON strategies(approval_status)"
+            )
 
         cur.execute("""
             CREATE TABLE IF NOT EXISTS market_data (
@@ -154,6 +169,25 @@ def ensure_core_schema():
                 ema REAL
             )
         """)
+        # Pending login/signup OTPs shared by all workers (see otp_store.py).
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS pending_otps (
+                email TEXT PRIMARY KEY,
+                otp TEXT NOT NULL,
+                expires_at REAL NOT NULL
+            )
+        """)
+        # Completed trading days of Kite historical candles (see candle_cache.py).
+        cur.execute("""
+            CREATE TABLE IF NOT EXISTS historical_candle_cache (
+                instrument_token INTEGER NOT NULL,
+                interval TEXT NOT NULL,
+                trading_day TEXT NOT NULL,
+                candles TEXT NOT NULL,
+                fetched_at DATETIME NOT NULL DEFAULT CURRENT_TIMESTAMP,
+                PRIMARY KEY (instrument_token, interval, trading_day)
+            )
+        """)
         cur.execute("""
             CREATE TABLE IF NOT EXISTS legacy_kite_accounts (
                 id INTEGER PRIMARY KEY AUTOINCREMENT,
@@ -238,40 +272,160 @@ def ensure_core_schema():
             pass
 
 
+# Per-connection tuning, applied once when a pooled connection is first opened.
+# journal_mode is persisted in the database file; the rest live as long as the
+# connection does, which is why the connections themselves are kept around.
+_CONNECTION_PRAGMAS = (
+    'PRAGMA journal_mode=WAL',
+    'PRAGMA synchronous=NORMAL',
+    'PRAGMA temp_store=MEMORY',
+    'PRAGMA mmap_size=268435456',
+    'PRAGMA cache_size=-20000',  # ~20 MB page cache per pooled connection
+)
+# sqlite3 keeps compiled statements per connection keyed by SQL text (LRU, 128
+# by default). The backend issues several hundred distinct statements, so the
+# default lets hot queries get evicted by one-off admin/migration SQL.
+_STATEMENT_CACHE_SIZE = 512
+
+
+class PooledConnection(sqlite3.Connection):
+    """
+    sqlite3 connection whose close() hands it back to its pool.
+
+    Callers keep the usual ``conn = get_db_connection() ... conn.close()``
+    pattern; the underlying file handle, page cache and statement cache
+    survive across requests.
+    """
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool: Optional['SQLiteConnectionPool'] = None
+        self._pooled = False
+        self._timeout: Optional[float] = None
+
+    def close(self):
+        pool = self._pool
+        if pool is None:
+            super().close()
+            return
+        pool.release(self)
+
+    def _close_physical(self):
+        self._pool = None
+        super().close()
+
+
+class SQLiteConnectionPool:
+    """Keeps up to ``size`` idle connections to one database file."""
+
+    def __init__(self, path: str, size: int):
+        self.path = path
+        self.size = size
+        self._idle: 'queue.LifoQueue[PooledConnection]' = queue.LifoQueue(maxsize=max(size, 1))
+
+    def _connect(self, timeout: float, retries: int) -> PooledConnection:
+        for attempt in range(retries):
+            try:
+                conn = sqlite3.connect(
+                    self.path,
+                    timeout=timeout,
+                    check_same_thread=False,  # Allow use from multiple threads/eventlet
+                    factory=PooledConnection,
+                    cached_statements=_STATEMENT_CACHE_SIZE,
+                )
+                conn.row_factory = sqlite3.Row
+                for pragma in _CONNECTION_PRAGMAS:
+                    conn.execute(pragma)
+                conn._pool = self
+                conn._timeout = timeout
+                return conn
+            except sqlite3.OperationalError as e:
+                if 'locked' in str(e).lower() and attempt < retries - 1:
+                    wait_time = (attempt + 1) * 0.1  # Exponential backoff: 0.1s, 0.2s, 0.3s
+                    logging.warning(f"Database locked, retrying in {wait_time}s (attempt {attempt + 1}/{retries})")
+                    time.sleep(wait_time)
+                    continue
+                logging.error(f"Database connection failed after {retries} attempts: {e}")
+                raise
+            except Exception as e:
+                logging.error(f"Unexpected error connecting to database: {e}")
+                raise
+
+    def acquire(self, timeout: float = 30.0, retries: int = 3) -> PooledConnection:
+        try:
+            conn = self._idle.get_nowait()
+        except queue.Empty:
+            return self._connect(timeout, retries)
+        conn._pooled = False
+        if conn._timeout != timeout:
+            conn.execute(f'PRAGMA busy_timeout={int(timeout * 1000)}')
+            conn._timeout = timeout
+        return conn
+
+    def release(self, conn: PooledConnection) -> None:
+        if conn._pooled:
+            # Already returned (double close) - never hand one connection out twice.
+            return
+        try:
+            if conn.in_transaction:
+                # Match sqlite3 close(): uncommitted work is discarded.
+                conn.rollback()
+            conn.row_factory = sqlite3.Row
+            conn._pooled = True
+            self._idle.put_nowait(conn)
+        except (queue.Full, sqlite3.Error):
+            conn._pooled = False
+            conn._close_physical()
+
+    def close_all(self) -> None:
+        while True:
+            try:
+                conn = self._idle.get_nowait()
+            except queue.Empty:
+                return
+            conn._close_physical()
+
+
+_pool: Optional[SQLiteConnectionPool] = None
+_pool_lock = threading.Lock()
+
+
+def _get_pool() -> SQLiteConnectionPool:
+    global _pool
+    pool = _pool
+    if pool is not None and pool.path == config.DATABASE_PATH:
+        return pool
+    with _pool_lock:
+        if _pool is None or _pool.path != config.DATABASE_PATH:
+            if _pool is not None:
+                _pool.close_all()
+            _pool = SQLiteConnectionPool(config.DATABASE_PATH, config.DB_POOL_SIZE)
+        return _pool
+
+
+def close_pooled_connections() -> None:
+    """Close every idle pooled connection (e.g. before deleting/replacing the DB file)."""
+    with _pool_lock:
+        if _pool is not None:
+            _pool.close_all()
+
+
 def get_db_connection(timeout=30.0, retries=3):
     """
-    Get a database connection with proper timeout and retry logic.
-    
+    Get a database connection from the process-wide pool.
+
+    Connections are opened lazily with WAL and the other _CONNECTION_PRAGMAS
+    applied once; ``conn.close()`` returns the connection to the pool instead
+    of closing the file.
+
     Args:
         timeout: Timeout in seconds for database operations (default: 30)
         retries: Number of retries if database is locked (default: 3)
-    
+
     Returns:
         sqlite3.Connection with row_factory set
     """
-    for attempt in range(retries):
-        try:
-            conn = sqlite3.connect(
-                config.DATABASE_PATH,
-                timeout=timeout,
-                check_same_thread=False  # Allow use from multiple threads/eventlet
-            )
-            conn.row_factory = sqlite3.Row
-            # Enable WAL mode for better concurrency
-            conn.execute('PRAGMA journal_mode=WAL')
-            return conn
-        except sqlite3.OperationalError as e:
-            if 'locked' in str(e).lower() and attempt < retries - 1:
-                wait_time = (attempt + 1) * 0.1  # Exponential backoff: 0.1s, 0.2s, 0.3s
-                logging.warning(f"Database locked, retrying in {wait_time}s (attempt {attempt + 1}/{retries})")
-                time.sleep(wait_time)
-                continue
-            else:
-                logging.error(f"Database connection failed after {retries} attempts: {e}")
-                raise
-        except Exception as e:
-            logging.error(f"Unexpected error connecting to database: {e}")
-            raise
+    return _get_pool().acquire(timeout=timeout, retries=retries)
 
 def create_tables():
     conn = get_db_connection()
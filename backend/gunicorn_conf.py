@@ -11,6 +11,18 @@ accesslog = "-"
 errorlog = "-"
 
 
+def on_starting(server):
+    # SESSION_BACKEND=memory (the default) keeps sessions in each worker's memory;
+    # a second worker would not see sessions created by the first.
+    import os
+
+    backend = os.getenv("SESSION_BACKEND", "memory").lower()
+    if backend == "memory" and server.cfg.workers > 1:
+        raise RuntimeError(
+            "SESSION_BACKEND=memory requires workers = 1; set SESSION_BACKEND=cookie to run more workers"
+        )
+
+
 def post_worker_init(worker):
     import logging
 
@@ -0,0 +1,60 @@
+"""
+Pending login/signup OTPs, kept in SQLite so every gunicorn worker sees them.
+
+An OTP issued by one worker is verified by whichever worker receives the verify
+request, so the store cannot be per-process. Rows live in ``pending_otps`` keyed
+by email with an absolute ``expires_at`` (epoch seconds); expired rows are
+pruned whenever a new OTP is issued.
+"""
+from __future__ import annotations
+
+import secrets
+import time
+
+from database import get_db_connection
+
+OTP_TTL_SECONDS = 600
+
+_PRUNE_EXPIRED_OTPS_SQL = 'DELETE FROM pending_otps WHERE expires_at <= ?'
+_UPSERT_OTP_SQL = 'INSERT OR REPLACE INTO pending_otps (email, otp, expires_at) VALUES (?, ?, ?)'
+_SELECT_OTP_SQL = 'SELECT otp, expires_at FROM pending_otps WHERE email = ?'
+_DELETE_OTP_SQL = 'DELETE FROM pending_otps WHERE email = ? AND otp = ?'
+
+
+def new_otp() -> str:
+    return f"{secrets.randbelow(1_000_000):06d}"
+
+
+def store_otp(email: str, otp: str) -> None:
+    """Make otp the pending OTP for email, replacing any earlier one."""
+    now = time.time()
+    conn = get_db_connection()
+    try:
+        conn.execute(_PRUNE_EXPIRED_OTPS_SQL, (now,))
+        conn.execute(_UPSERT_OTP_SQL, (email, otp, now + OTP_TTL_SECONDS))
+        conn.commit()
+    finally:
+        conn.close()
+
+
+def consume_otp(email: str, otp_entered: str) -> bool:
+    """Return True and drop the pending OTP if otp_entered matches and has not expired."""
+    conn = get_db_connection()
+    try:
+        row = conn.execute(_SELECT_OTP_SQL, (email,)).fetchone()
+        if row is None:
+            return False
+        otp, expires_at = row[0], row[1]
+        if expires_at <= time.time():
+            conn.execute(_DELETE_OTP_SQL, (email, otp))
+            conn.commit()
+            return False
+        if not secrets.compare_digest(otp, otp_entered or ''):
+            return False
+        # Conditional on the OTP we compared, so two workers racing on the same
+        # code cannot both accept it.
+        consumed = conn.execute(_DELETE_OTP_SQL, (email, otp)).rowcount == 1
+        conn.commit()
+        return consumed
+    finally:
+        conn.close()
@@ -1,7 +1,7 @@
 """Utilities for loading strategy business rules defined in DSL files."""
 
-from .loader import load_mountain_signal_pe_rules
+from .loader import invalidate_rules_cache, load_mountain_signal_pe_rules
 
-__all__ = ["load_mountain_signal_pe_rules"]
+__all__ = ["invalidate_rules_cache", "load_mountain_signal_pe_rules"]
 
 
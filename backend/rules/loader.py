@@ -1,10 +1,21 @@
 import os
 import re
-from typing import Dict, Any, Optional
+from threading import Lock
+from typing import Dict, Any, Optional, Tuple
 
 
 RULES_DIR = os.path.join(os.path.dirname(__file__), "")
 
+# Parsed rules keyed by file path, reused while the file's mtime/size are unchanged.
+_rules_cache: Dict[str, Tuple[Tuple[int, int], Dict[str, Any]]] = {}
+_rules_cache_lock = Lock()
+
+
+def invalidate_rules_cache() -> None:
+    """Drop parsed rules so the next load re-reads the DSL file."""
+    with _rules_cache_lock:
+        _rules_cache.clear()
+
 
 def _parse_mapping(line: str) -> Dict[str, float]:
     """Parse mapping strings like 'BANKNIFTY -> 35, NIFTY -> 75'."""
@@ -33,15 +44,31 @@ def load_mountain_signal_pe_rules(rules_path: Optional[str] = None) -> Dict[str,
 
     Returns a dictionary containing the core parameters needed by the
     strategy and visualization layers. The parser is intentionally focused on
-    the constructs currently defined in the DSL.
+    the constructs currently defined in the DSL. The result is cached until the
+    file changes on disk and is shared between callers, so treat it as read-only.
     """
 
     if rules_path is None:
         rules_path = os.path.join(RULES_DIR, "mountain_signal_pe.rules")
 
-    if not os.path.exists(rules_path):
-        raise FileNotFoundError(f"Rules file not found: {rules_path}")
+    try:
+        stat = os.stat(rules_path)
+    except FileNotFoundError:
+        raise FileNotFoundError(f"Rules file not found: {rules_path}") from None
+    version = (stat.st_mtime_ns, stat.st_size)
+
+    with _rules_cache_lock:
+        cached = _rules_cache.get(rules_path)
+    if cached and cached[0] == version:
+        return cached[1]
+
+    data = _parse_mountain_signal_pe_rules(rules_path)
+    with _rules_cache_lock:
+        _rules_cache[rules_path] = (version, data)
+    return data
+
 
+def _parse_mountain_signal_pe_rules(rules_path: str) -> Dict[str, Any]:
     with open(rules_path, "r", encoding="utf-8") as handle:
         lines = [line.rstrip() for line in handle]
 
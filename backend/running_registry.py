@@ -0,0 +1,74 @@
+"""
+In-memory registry of running strategy instances.
+
+``running_strategies`` is keyed by a per-run id, but most routes look entries
+up by the strategy's database id. ``RunningStrategies`` is a plain dict (the
+Ticker and post-schedule actions iterate and mutate it directly) that also keeps
+a ``db_id -> run ids`` index in step with every insert and delete, so those
+lookups no longer scan the whole fleet.
+"""
+from __future__ import annotations
+
+from threading import RLock
+from typing import Any, Dict, List, Optional
+
+_MISSING = object()
+
+
+class RunningStrategies(dict):
+    """``run_id -> info`` dict with an O(1) reverse index on ``info['db_id']``."""
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._by_db_id: Dict[Any, Dict[str, None]] = {}
+        self._lock = RLock()
+
+    def __setitem__(self, run_id: str, info: Dict[str, Any]) -> None:
+        with self._lock:
+            if dict.__contains__(self, run_id):
+                self._unindex(run_id, dict.__getitem__(self, run_id))
+            super().__setitem__(run_id, info)
+            db_id = info.get('db_id')
+            if db_id is not None:
+                self._by_db_id.setdefault(db_id, {})[run_id] = None
+
+    def __delitem__(self, run_id: str) -> None:
+        with self._lock:
+            info = dict.__getitem__(self, run_id)
+            super().__delitem__(run_id)
+            self._unindex(run_id, info)
+
+    def pop(self, run_id: str, default: Any = _MISSING) -> Any:
+        with self._lock:
+            if not dict.__contains__(self, run_id):
+                if default is _MISSING:
+                    raise KeyError(run_id)
+                return default
+            info = dict.__getitem__(self, run_id)
+            del self[run_id]
+            return info
+
+    def clear(self) -> None:
+        with self._lock:
+            super().clear()
+            self._by_db_id.clear()
+
+    def run_ids_for(self, db_id: Any) -> List[str]:
+        """Run ids registered for ``db_id``, oldest first (a snapshot)."""
+        with self._lock:
+            return list(self._by_db_id.get(db_id, ()))
+
+    def run_id_for(self, db_id: Any) -> Optional[str]:
+        """The oldest run id registered for ``db_id``, or None."""
+        with self._lock:
+            run_ids = self._by_db_id.get(db_id)
+            return next(iter(run_ids)) if run_ids else None
+
+    def _unindex(self, run_id: str, info: Dict[str, Any]) -> None:
+        db_id = info.get('db_id')
+        run_ids = self._by_db_id.get(db_id)
+        if run_ids is None:
+            return
+        run_ids.pop(run_id, None)
+        if not run_ids:
+            del self._by_db_id[db_id]
@@ -0,0 +1,130 @@
+"""
+Server-side Flask sessions kept in process memory.
+
+The session cookie carries only an opaque random id; the session dict itself
+stays on the server, so responses no longer ship a signed copy of
+``access_token`` and friends, and clearing a session revokes it immediately.
+Sessions already die with the process (SERVER_STARTUP_TIME check in
+/api/user-data), so an in-process store does not change that behaviour.
+
+Only valid while the app runs as a single worker process: every worker has its
+own store, so with several workers a request routed to another worker finds no
+session and the user is logged out. check_single_worker() refuses that setup.
+"""
+from __future__ import annotations
+
+import os
+import secrets
+import time
+from threading import Lock
+from typing import Any, Dict, Optional, Tuple
+
+from flask.sessions import SessionInterface, SessionMixin
+from werkzeug.datastructures import CallbackDict
+
+SWEEP_INTERVAL_SECONDS = 300
+
+
+class ServerSideSession(CallbackDict, SessionMixin):
+    def __init__(self, initial: Optional[Dict[str, Any]] = None, sid: Optional[str] = None):
+        def on_update(self: "ServerSideSession") -> None:
+            self.modified = True
+
+        super().__init__(initial, on_update)
+        self.sid = sid
+        self.new = sid is None
+        self.modified = False
+        self.discarded_sid: Optional[str] = None
+
+    def regenerate(self) -> None:
+        """Issue a new id on save and drop the old one (call on login/privilege change)."""
+        if self.sid is not None:
+            self.discarded_sid = self.sid
+            self.sid = None
+        self.modified = True
+
+
+class InMemorySessionInterface(SessionInterface):
+    """Store session dicts in this process, keyed by a random cookie id."""
+
+    session_class = ServerSideSession
+
+    def __init__(self) -> None:
+        self._store: Dict[str, Tuple[float, Dict[str, Any]]] = {}
+        self._lock = Lock()
+        self._next_sweep = time.monotonic() + SWEEP_INTERVAL_SECONDS
+
+    def open_session(self, app, request) -> ServerSideSession:
+        sid = request.cookies.get(self.get_cookie_name(app))
+        if sid:
+            now = time.monotonic()
+            with self._lock:
+                entry = self._store.get(sid)
+            if entry and entry[0] > now:
+                return self.session_class(dict(entry[1]), sid=sid)
+        return self.session_class()
+
+    def save_session(self, app, session: ServerSideSession, response) -> None:
+        name = self.get_cookie_name(app)
+        domain = self.get_cookie_domain(app)
+        path = self.get_cookie_path(app)
+
+        if session.discarded_sid is not None:
+            self.discard(session.discarded_sid)
+
+        if not session:
+            if session.sid is not None or session.discarded_sid is not None:
+                if session.sid is not None:
+                    self.discard(session.sid)
+                response.delete_cookie(name, domain=domain, path=path)
+            return
+
+        if not session.modified and not session.new:
+            return
+
+        now = time.monotonic()
+        expires_at = now + app.permanent_session_lifetime.total_seconds()
+        issue_cookie = session.sid is None
+        if issue_cookie:
+            session.sid = secrets.token_urlsafe(32)
+
+        with self._lock:
+            self._store[session.sid] = (expires_at, dict(session))
+            if now >= self._next_sweep:
+                for key in [k for k, (exp, _) in self._store.items() if exp <= now]:
+                    del self._store[key]
+                self._next_sweep = now + SWEEP_INTERVAL_SECONDS
+
+        if issue_cookie:
+            response.set_cookie(
+                name,
+                session.sid,
+                expires=self.get_expiration_time(app, session),
+                httponly=self.get_cookie_httponly(app),
+                domain=domain,
+                path=path,
+                secure=self.get_cookie_secure(app),
+                samesite=self.get_cookie_samesite(app),
+            )
+
+    def discard(self, sid: str) -> None:
+        with self._lock:
+            self._store.pop(sid, None)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return len(self._store)
+
+
+def check_single_worker() -> None:
+    """Raise if the server is configured for more than one worker process.
+
+    Gunicorn reads WEB_CONCURRENCY as its default worker count; gunicorn_conf.py
+    additionally checks the resolved worker count in its on_starting hook.
+    """
+    workers = os.getenv('WEB_CONCURRENCY', '').strip()
+    if workers.isdigit() and int(workers) > 1:
+        raise RuntimeError(
+            f"SESSION_BACKEND=memory keeps sessions per process and cannot run with "
+            f"WEB_CONCURRENCY={workers}; use one worker or set SESSION_BACKEND=cookie"
+        )
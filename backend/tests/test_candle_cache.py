@@ -0,0 +1,100 @@
+import datetime
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import config
+from candle_cache import CANDLE_CACHE_RETENTION_DAYS, load_cached_candles, store_cached_candles
+from database import close_pooled_connections, ensure_core_schema, get_db_connection
+
+IST = datetime.timezone(datetime.timedelta(hours=5, minutes=30))
+
+
+def _days_ago(days: int) -> datetime.date:
+    return datetime.date.today() - datetime.timedelta(days=days)
+
+
+def _candle(day: datetime.date, minute: int) -> dict:
+    return {
+        "date": datetime.datetime.combine(day, datetime.time(9, 15), IST) + datetime.timedelta(minutes=minute),
+        "open": 100.0,
+        "high": 101.5,
+        "low": 99.25,
+        "close": 100.75,
+        "volume": 1200,
+    }
+
+
+class CandleCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        db_path = os.path.join(self._tmpdir.name, "test.db")
+        for patcher in (
+            mock.patch.dict(os.environ, {"DATABASE_PATH": db_path}),
+            mock.patch.object(config, "DATABASE_PATH", db_path),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # Registered last so pooled connections to the temp DB close first.
+        self.addCleanup(close_pooled_connections)
+        ensure_core_schema()
+
+    def test_round_trip_keeps_timezone_aware_dates(self) -> None:
+        day = _days_ago(10)
+        candles = [_candle(day, 0), _candle(day, 5)]
+        store_cached_candles(260105, "5minute", {day: candles})
+        self.assertEqual(load_cached_candles(260105, "5minute", day, day), {day: candles})
+
+    def test_empty_day_is_cached(self) -> None:
+        holiday = _days_ago(6)
+        store_cached_candles(260105, "5minute", {holiday: []})
+        self.assertEqual(load_cached_candles(260105, "5minute", holiday, holiday), {holiday: []})
+
+    def test_stale_empty_day_is_not_served(self) -> None:
+        days = [_days_ago(7), _days_ago(6)]
+        store_cached_candles(260105, "5minute", {days[0]: [_candle(days[0], 0)], days[1]: []})
+        conn = get_db_connection()
+        conn.execute("UPDATE historical_candle_cache SET fetched_at = datetime('now', '-2 days')")
+        conn.commit()
+        conn.close()
+        self.assertEqual(sorted(load_cached_candles(260105, "5minute", days[0], days[1])), days[:1])
+
+    def test_load_filters_by_range_token_and_interval(self) -> None:
+        days = [_days_ago(10), _days_ago(9), _days_ago(8)]
+        store_cached_candles(260105, "5minute", {day: [_candle(day, 0)] for day in days})
+        store_cached_candles(256265, "5minute", {days[1]: [_candle(days[1], 0)]})
+
+        cached = load_cached_candles(260105, "5minute", days[1], days[2])
+        self.assertEqual(sorted(cached), days[1:])
+        self.assertEqual(load_cached_candles(260105, "minute", days[0], days[2]), {})
+
+    def test_days_past_retention_are_not_stored(self) -> None:
+        old_day = _days_ago(CANDLE_CACHE_RETENTION_DAYS + 1)
+        store_cached_candles(260105, "5minute", {old_day: [_candle(old_day, 0)]})
+        self.assertEqual(load_cached_candles(260105, "5minute", old_day, old_day), {})
+
+    def test_eviction_is_keyed_on_trading_day_not_fetch_time(self) -> None:
+        old_day = _days_ago(CANDLE_CACHE_RETENTION_DAYS + 1)
+        recent_days = [_days_ago(31), _days_ago(30)]
+        store_cached_candles(260105, "5minute", {recent_days[0]: [_candle(recent_days[0], 0)]})
+        conn = get_db_connection()
+        conn.execute("UPDATE historical_candle_cache SET fetched_at = datetime('now', '-400 days')")
+        conn.execute(
+            "INSERT INTO historical_candle_cache (instrument_token, interval, trading_day, candles) "
+            "VALUES (260105, '5minute', ?, '[]')",
+            (old_day.isoformat(),),
+        )
+        conn.commit()
+        conn.close()
+
+        # Storing evicts the old trading day but keeps the recent one fetched long ago.
+        store_cached_candles(260105, "5minute", {recent_days[1]: [_candle(recent_days[1], 0)]})
+        conn = get_db_connection()
+        days = sorted(row[0] for row in conn.execute("SELECT trading_day FROM historical_candle_cache"))
+        conn.close()
+        self.assertEqual(days, [day.isoformat() for day in recent_days])
+
+if __name__ == "__main__":
+    unittest.main()
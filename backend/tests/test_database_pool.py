@@ -0,0 +1,63 @@
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import config
+from database import close_pooled_connections, get_db_connection
+
+
+class ConnectionPoolTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        db_path = os.path.join(self._tmpdir.name, "test.db")
+        for patcher in (
+            mock.patch.dict(os.environ, {"DATABASE_PATH": db_path}),
+            mock.patch.object(config, "DATABASE_PATH", db_path),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.addCleanup(close_pooled_connections)
+
+        conn = get_db_connection()
+        conn.execute("CREATE TABLE items (value INTEGER)")
+        conn.commit()
+        conn.close()
+
+    def test_close_returns_connection_for_reuse(self) -> None:
+        first = get_db_connection()
+        first.close()
+        second = get_db_connection()
+        self.assertIs(first, second)
+        second.close()
+
+    def test_double_close_does_not_share_connection(self) -> None:
+        conn = get_db_connection()
+        conn.close()
+        conn.close()
+        a = get_db_connection()
+        b = get_db_connection()
+        self.assertIsNot(a, b)
+        a.close()
+        b.close()
+
+    def test_uncommitted_work_is_discarded_on_release(self) -> None:
+        conn = get_db_connection()
+        conn.execute("INSERT INTO items (value) VALUES (1)")
+        conn.close()
+
+        conn = get_db_connection()
+        count = conn.execute("SELECT COUNT(*) FROM items").fetchone()[0]
+        conn.close()
+        self.assertEqual(count, 0)
+
+    def test_wal_enabled(self) -> None:
+        conn = get_db_connection()
+        mode = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        conn.close()
+        self.assertEqual(mode.lower(), "wal")
+
+
+if __name__ == "__main__":
+    unittest.main()
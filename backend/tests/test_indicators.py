@@ -0,0 +1,39 @@
+import unittest
+
+import pandas as pd
+
+from utils.indicators import calculate_rsi
+
+
+class CalculateRsiTests(unittest.TestCase):
+    def test_short_series_is_all_none(self) -> None:
+        rsi = calculate_rsi(pd.Series([1.0, 2.0, 3.0]), period=14)
+        self.assertEqual(rsi.tolist(), [None, None, None])
+
+    def test_matches_wilder_smoothing(self) -> None:
+        closes = pd.Series([44.0, 44.5, 44.2, 45.1, 45.6, 45.3, 46.0, 45.8], index=range(10, 18))
+        rsi = calculate_rsi(closes, period=3)
+
+        deltas = closes.diff().tolist()
+        gains = [max(d, 0.0) for d in deltas[1:]]
+        losses = [max(-d, 0.0) for d in deltas[1:]]
+        avg_gain = sum(gains[:3]) / 3
+        avg_loss = sum(losses[:3]) / 3
+        expected = [None, None, None, 100 - 100 / (1 + avg_gain / avg_loss)]
+        for gain, loss in zip(gains[3:], losses[3:]):
+            avg_gain = (avg_gain * 2 + gain) / 3
+            avg_loss = (avg_loss * 2 + loss) / 3
+            expected.append(100 - 100 / (1 + avg_gain / avg_loss))
+
+        self.assertEqual(list(rsi.index), list(closes.index))
+        self.assertEqual(rsi.tolist()[:3], [None, None, None])
+        for actual, wanted in zip(rsi.tolist()[3:], expected[3:]):
+            self.assertAlmostEqual(actual, wanted)
+
+    def test_no_losses_pins_rsi_at_100(self) -> None:
+        rsi = calculate_rsi(pd.Series([float(v) for v in range(6)]), period=3)
+        self.assertEqual(rsi.tolist()[3:], [100.0, 100.0, 100.0])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,60 @@
+import importlib
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import config
+import otp_store
+from database import close_pooled_connections, ensure_core_schema
+
+
+class OtpStoreTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.addCleanup(self._tmpdir.cleanup)
+        db_path = os.path.join(self._tmpdir.name, "test.db")
+        for patcher in (
+            mock.patch.dict(os.environ, {"DATABASE_PATH": db_path}),
+            mock.patch.object(config, "DATABASE_PATH", db_path),
+        ):
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        # Registered last so pooled connections to the temp DB close first.
+        self.addCleanup(close_pooled_connections)
+        ensure_core_schema()
+
+    def test_otp_issued_by_one_worker_verifies_on_another(self) -> None:
+        otp_store.store_otp("trader@example.com", "123456")
+        # A different worker: no pooled connections and freshly imported module state.
+        close_pooled_connections()
+        fresh_store = importlib.reload(otp_store)
+        self.assertTrue(fresh_store.consume_otp("trader@example.com", "123456"))
+
+    def test_otp_is_single_use(self) -> None:
+        otp_store.store_otp("trader@example.com", "123456")
+        self.assertTrue(otp_store.consume_otp("trader@example.com", "123456"))
+        self.assertFalse(otp_store.consume_otp("trader@example.com", "123456"))
+
+    def test_wrong_otp_keeps_pending_one(self) -> None:
+        otp_store.store_otp("trader@example.com", "123456")
+        self.assertFalse(otp_store.consume_otp("trader@example.com", "654321"))
+        self.assertFalse(otp_store.consume_otp("trader@example.com", None))
+        self.assertTrue(otp_store.consume_otp("trader@example.com", "123456"))
+
+    def test_expired_otp_is_rejected(self) -> None:
+        with mock.patch.object(otp_store.time, "time", return_value=1_000.0):
+            otp_store.store_otp("trader@example.com", "123456")
+        expired = 1_000.0 + otp_store.OTP_TTL_SECONDS
+        with mock.patch.object(otp_store.time, "time", return_value=expired):
+            self.assertFalse(otp_store.consume_otp("trader@example.com", "123456"))
+
+    def test_new_otp_replaces_previous(self) -> None:
+        otp_store.store_otp("trader@example.com", "111111")
+        otp_store.store_otp("trader@example.com", "222222")
+        self.assertFalse(otp_store.consume_otp("trader@example.com", "111111"))
+        self.assertTrue(otp_store.consume_otp("trader@example.com", "222222"))
+
+
+if __name__ == "__main__":
+    unittest.main()
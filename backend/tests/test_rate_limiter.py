@@ -0,0 +1,37 @@
+import unittest
+
+from utils.rate_limiter import TokenBucket
+
+
+class FakeClock:
+    def __init__(self) -> None:
+        self.now = 0.0
+        self.sleeps = []
+
+    def __call__(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float) -> None:
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+class TokenBucketTests(unittest.TestCase):
+    def test_burst_up_to_capacity_without_waiting(self) -> None:
+        clock = FakeClock()
+        bucket = TokenBucket(rate=3, capacity=3, clock=clock, sleep=clock.sleep)
+        for _ in range(3):
+            bucket.acquire()
+        self.assertEqual(clock.sleeps, [])
+
+    def test_calls_beyond_capacity_are_spaced_by_rate(self) -> None:
+        clock = FakeClock()
+        bucket = TokenBucket(rate=3, capacity=3, clock=clock, sleep=clock.sleep)
+        for _ in range(9):
+            bucket.acquire()
+        # Three immediately, then the remaining six at 3 per second.
+        self.assertAlmostEqual(clock.now, 2.0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,39 @@
+import os
+import shutil
+import tempfile
+import unittest
+
+from rules import invalidate_rules_cache, load_mountain_signal_pe_rules
+from rules.loader import RULES_DIR
+
+
+class RulesLoaderCacheTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self._tmpdir = tempfile.TemporaryDirectory()
+        self.path = os.path.join(self._tmpdir.name, "mountain_signal_pe.rules")
+        shutil.copyfile(os.path.join(RULES_DIR, "mountain_signal_pe.rules"), self.path)
+
+    def tearDown(self) -> None:
+        invalidate_rules_cache()
+        self._tmpdir.cleanup()
+
+    def test_unchanged_file_is_parsed_once(self) -> None:
+        first = load_mountain_signal_pe_rules(self.path)
+        self.assertIs(load_mountain_signal_pe_rules(self.path), first)
+
+    def test_edited_file_is_reparsed(self) -> None:
+        first = load_mountain_signal_pe_rules(self.path)
+        with open(self.path, "a", encoding="utf-8") as handle:
+            handle.write("\n# edited\n")
+        self.assertIsNot(load_mountain_signal_pe_rules(self.path), first)
+
+    def test_invalidate_forces_reparse(self) -> None:
+        first = load_mountain_signal_pe_rules(self.path)
+        invalidate_rules_cache()
+        second = load_mountain_signal_pe_rules(self.path)
+        self.assertIsNot(second, first)
+        self.assertEqual(second, first)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,40 @@
+import unittest
+
+from running_registry import RunningStrategies
+
+
+class RunningStrategiesTests(unittest.TestCase):
+    def setUp(self) -> None:
+        self.registry = RunningStrategies()
+
+    def test_lookup_by_db_id(self) -> None:
+        self.registry["run-a"] = {"db_id": 7, "status": "running"}
+        self.registry["run-b"] = {"db_id": 7, "status": "paused"}
+        self.registry["run-c"] = {"db_id": None}
+        self.assertEqual(self.registry.run_id_for(7), "run-a")
+        self.assertEqual(self.registry.run_ids_for(7), ["run-a", "run-b"])
+        self.assertIsNone(self.registry.run_id_for(None))
+
+    def test_index_follows_deletes(self) -> None:
+        self.registry["run-a"] = {"db_id": 7}
+        self.registry["run-b"] = {"db_id": 7}
+        del self.registry["run-a"]
+        self.assertEqual(self.registry.run_id_for(7), "run-b")
+        self.assertIsNotNone(self.registry.pop("run-b", None))
+        self.assertIsNone(self.registry.run_id_for(7))
+        self.assertIsNone(self.registry.pop("run-b", None))
+
+    def test_overwrite_reindexes(self) -> None:
+        self.registry["run-a"] = {"db_id": 7}
+        self.registry["run-a"] = {"db_id": 8}
+        self.assertIsNone(self.registry.run_id_for(7))
+        self.assertEqual(self.registry.run_id_for(8), "run-a")
+
+    def test_is_a_plain_dict_for_iterating_callers(self) -> None:
+        self.registry["run-a"] = {"db_id": 7}
+        self.assertIsInstance(self.registry, dict)
+        self.assertEqual(list(self.registry.items()), [("run-a", {"db_id": 7})])
+
+
+if __name__ == "__main__":
+    unittest.main()
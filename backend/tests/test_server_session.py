@@ -0,0 +1,76 @@
+import os
+import unittest
+from unittest import mock
+
+from flask import Flask, session
+
+from server_session import InMemorySessionInterface, check_single_worker
+
+
+class InMemorySessionTests(unittest.TestCase):
+    def setUp(self) -> None:
+        app = Flask(__name__)
+        app.secret_key = "test"
+        self.interface = InMemorySessionInterface()
+        app.session_interface = self.interface
+
+        @app.route("/login")
+        def login():
+            session["user_id"] = 7
+            session["access_token"] = "secret-token"
+            return "ok"
+
+        @app.route("/relogin")
+        def relogin():
+            session.clear()
+            session.regenerate()
+            session["user_id"] = 8
+            return "ok"
+
+        @app.route("/whoami")
+        def whoami():
+            return str(session.get("user_id"))
+
+        @app.route("/logout")
+        def logout():
+            session.clear()
+            return "bye"
+
+        self.client = app.test_client()
+
+    def test_cookie_holds_only_opaque_id(self) -> None:
+        response = self.client.get("/login")
+        cookie = response.headers["Set-Cookie"]
+        self.assertNotIn("secret-token", cookie)
+        self.assertEqual(self.client.get("/whoami").get_data(as_text=True), "7")
+
+    def test_unmodified_session_sets_no_cookie(self) -> None:
+        self.client.get("/login")
+        response = self.client.get("/whoami")
+        self.assertNotIn("Set-Cookie", response.headers)
+
+    def test_clear_revokes_server_side_entry(self) -> None:
+        self.client.get("/login")
+        self.assertEqual(len(self.interface), 1)
+        self.client.get("/logout")
+        self.assertEqual(len(self.interface), 0)
+        self.assertEqual(self.client.get("/whoami").get_data(as_text=True), "None")
+
+    def test_regenerate_issues_new_id_and_drops_old(self) -> None:
+        self.client.get("/whoami")
+        first = self.client.get("/login").headers["Set-Cookie"].split(";")[0]
+        second = self.client.get("/relogin").headers["Set-Cookie"].split(";")[0]
+        self.assertNotEqual(first, second)
+        self.assertEqual(len(self.interface), 1)
+        self.assertEqual(self.client.get("/whoami").get_data(as_text=True), "8")
+
+    def test_check_single_worker_rejects_several_workers(self) -> None:
+        with mock.patch.dict(os.environ, {"WEB_CONCURRENCY": "1"}):
+            check_single_worker()
+        with mock.patch.dict(os.environ, {"WEB_CONCURRENCY": "4"}):
+            with self.assertRaises(RuntimeError):
+                check_single_worker()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -69,9 +69,12 @@ def calculate_rsi(data: pd.Series, period: int = 14) -> pd.Series:
     gain = delta.where(delta > 0, 0)
     loss = -delta.where(delta < 0, 0)
     
-    # Initialize RSI series with None values
-    rsi = pd.Series([None] * len(data), index=data.index)
-    
+    # Warm-up positions stay None; the Wilder recursion runs over plain floats
+    # rather than per-element .iloc reads and writes on the Series.
+    rsi_values: List[Optional[float]] = [None] * len(data)
+    gains = gain.tolist()
+    losses = loss.tolist()
+
     # Calculate initial average gain and loss (simple average of first 'period' values)
     if len(data) > period:
         avg_gain = gain.iloc[1:period+1].mean()  # Skip first NaN from diff()
@@ -80,28 +83,25 @@ def calculate_rsi(data: pd.Series, period: int = 14) -> pd.Series:
         # Calculate first RSI value
         if avg_loss != 0:
             rs = avg_gain / avg_loss
-            rsi.iloc[period] = 100 - (100 / (1 + rs))
+            rsi_values[period] = 100 - (100 / (1 + rs))
         else:
-            rsi.iloc[period] = 100.0  # All gains, no losses
+            rsi_values[period] = 100.0  # All gains, no losses
         
         # Use Wilder's smoothing for subsequent values
         # avg_gain = (prev_avg_gain * (period - 1) + current_gain) / period
         # avg_loss = (prev_avg_loss * (period - 1) + current_loss) / period
         for i in range(period + 1, len(data)):
-            current_gain = gain.iloc[i]
-            current_loss = loss.iloc[i]
-            
             # Wilder's smoothing method
-            avg_gain = (avg_gain * (period - 1) + current_gain) / period
-            avg_loss = (avg_loss * (period - 1) + current_loss) / period
+            avg_gain = (avg_gain * (period - 1) + gains[i]) / period
+            avg_loss = (avg_loss * (period - 1) + losses[i]) / period
             
             if avg_loss != 0:
                 rs = avg_gain / avg_loss
-                rsi.iloc[i] = 100 - (100 / (1 + rs))
+                rsi_values[i] = 100 - (100 / (1 + rs))
             else:
-                rsi.iloc[i] = 100.0  # All gains, no losses
+                rsi_values[i] = 100.0  # All gains, no losses
     
-    return rsi
+    return pd.Series(rsi_values, index=data.index, dtype=object)
 
 
 def calculate_macd(data: pd.Series, fast: int = 12, slow: int = 26, signal: int = 9) -> Tuple[pd.Series, pd.Series, pd.Series]:
@@ -0,0 +1,40 @@
+"""
+Token-bucket rate limiter shared by threads calling a rate-limited API.
+"""
+import threading
+import time
+from typing import Callable
+
+
+class TokenBucket:
+    """Allow at most ``rate`` calls per second, with bursts of up to ``capacity``.
+
+    acquire() reserves the caller's slot under a lock and then sleeps until it,
+    so any number of worker threads sharing one bucket stay under the limit
+    together. Slots are scheduled rather than polled, so there is no retry loop.
+    """
+
+    def __init__(
+        self,
+        rate: float,
+        capacity: int,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep,
+    ):
+        self.rate = rate
+        self.capacity = capacity
+        self._clock = clock
+        self._sleep = sleep
+        self._interval = 1.0 / rate
+        self._burst = (capacity - 1) * self._interval
+        self._next_slot = clock()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> None:
+        with self._lock:
+            now = self._clock()
+            slot = max(self._next_slot, now)
+            self._next_slot = slot + self._interval
+        wait = slot - self._burst - now
+        if wait > 0:
+            self._sleep(wait)
@@ -3,6 +3,10 @@ import { ComposedChart, Line, XAxis, YAxis, CartesianGrid, Tooltip, Legend, Resp
 import { io, Socket } from 'socket.io-client';
 import { apiUrl, SOCKET_BASE_URL } from '../config/api';
 
+// Async backtest jobs are polled this often, and given up on after the timeout.
+const BACKTEST_POLL_INTERVAL_MS = 1000;
+const BACKTEST_POLL_TIMEOUT_MS = 10 * 60 * 1000;
+
 interface Strategy {
   id: number;
   strategy_name: string;
@@ -478,6 +482,7 @@ const MountainSignalChart: React.FC<MountainSignalChartProps> = ({ strategy, act
   const sentSignalKeysRef = useRef<Set<string>>(new Set());
   const lastLiveOrderBlockRef = useRef<'market_closed' | 'session_expired' | null>(null);
   const processMountainSignalLogicRef = useRef<(data: ChartDataResponse) => void>(() => {});
+  const backtestAbortRef = useRef<AbortController | null>(null);
   const [expandedDates, setExpandedDates] = useState<Set<string>>(new Set());
   const [backtestResults, setBacktestResults] = useState<{
     trades: Array<{
@@ -2097,6 +2102,9 @@ const MountainSignalChart: React.FC<MountainSignalChartProps> = ({ strategy, act
     return null;
   };
 
+  // Stop polling a running backtest when the component unmounts.
+  useEffect(() => () => backtestAbortRef.current?.abort(), []);
+
   const runBacktest = async () => {
     const validationError = validateDateRange(backtestFromDate, backtestToDate);
     if (validationError) {
@@ -2104,6 +2112,11 @@ const MountainSignalChart: React.FC<MountainSignalChartProps> = ({ strategy, act
       return;
     }
 
+    backtestAbortRef.current?.abort();
+    const controller = new AbortController();
+    backtestAbortRef.current = controller;
+    const { signal } = controller;
+
     setBacktestLoading(true);
     setBacktestError(null);
     setBacktestResults(null);
@@ -2115,6 +2128,7 @@ const MountainSignalChart: React.FC<MountainSignalChartProps> = ({ strategy, act
           'Content-Type': 'application/json',
         },
         credentials: 'include',
+        signal,
         body: JSON.stringify({
           strategy_id: strategy.id,
           from_date: backtestFromDate,
@@ -2122,6 +2136,7 @@ const MountainSignalChart: React.FC<MountainSignalChartProps> = ({ strategy, act
           instrument: strategy.instrument,
           candle_time: strategy.candle_time,
           ema_period: strategy.ema_period || 5,
+          async: true,
         }),
       });
 
@@ -2129,17 +2144,42 @@ const MountainSignalChart: React.FC<MountainSignalChartProps> = ({ strategy, act
         throw new Error('Failed to run backtest');
       }
 
-      const data = await response.json();
+      let data = await response.json();
+      // The backtest runs as a background job; poll until it finishes or times out.
+      const jobId = data.job_id;
+      const maxPolls = Math.ceil(BACKTEST_POLL_TIMEOUT_MS / BACKTEST_POLL_INTERVAL_MS);
+      for (let poll = 0; data.status === 'accepted' || data.status === 'pending'; poll++) {
+        if (poll >= maxPolls) {
+          throw new Error('Backtest is taking too long. Please try again with a shorter date range.');
+        }
+        await new Promise((resolve) => setTimeout(resolve, BACKTEST_POLL_INTERVAL_MS));
+        if (signal.aborted) {
+          return;
+        }
+        const statusResponse = await fetch(apiUrl(`/api/backtest_mountain_signal/status/${jobId}`), {
+          credentials: 'include',
+          signal,
+        });
+        data = await statusResponse.json().catch(() => ({}));
+        if (!statusResponse.ok) {
+          throw new Error(data.message || 'Failed to fetch backtest status');
+        }
+      }
       if (data.status === 'success') {
         setBacktestResults(data);
       } else {
         throw new Error(data.message || 'Backtest failed');
       }
     } catch (err) {
+      if (signal.aborted) {
+        return;
+      }
       console.error('Error running backtest:', err);
       setBacktestError(err instanceof Error ? err.message : 'An error occurred while running backtest');
     } finally {
-      setBacktestLoading(false);
+      if (!signal.aborted) {
+        setBacktestLoading(false);
+      }
     }
   };
 